@@ -0,0 +1,98 @@
+"""
+Benchmark da correção de nomes: `difflib.get_close_matches` sobre a lista
+inteira vs `FuzzyIndex`, para catálogos de 1k a 100k nomes.
+
+Uso:
+    python -m app.benchmarks.bench_fuzzy_index --sizes 1000 10000 100000 --queries 50
+"""
+
+import argparse
+import random
+import statistics
+import time
+from difflib import get_close_matches
+
+from app.models.fuzzy_index import FuzzyIndex
+
+SYLLABLES = [
+    "an", "ak", "ar", "bo", "da", "dar", "ek", "en", "fa", "ga", "ho", "ja",
+    "ka", "ki", "lu", "ma", "na", "ne", "ob", "or", "pa", "qui", "ra", "sa",
+    "sky", "ta", "th", "to", "va", "wa", "wo", "yo", "za",
+]  # fmt: skip
+
+CUTOFF = 0.7
+
+
+def make_names(size: int, rng: random.Random) -> list[str]:
+    names = set()
+    while len(names) < size:
+        words = [
+            "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4)))
+            for _ in range(rng.randint(1, 3))
+        ]
+        names.add(" ".join(words).title())
+    return sorted(names)
+
+
+def make_typo(name: str, rng: random.Random) -> str:
+    chars = list(name)
+    for _ in range(rng.randint(0, 2)):
+        position = rng.randrange(len(chars))
+        operation = rng.choice(("delete", "insert", "replace"))
+        if operation == "delete" and len(chars) > 1:
+            chars.pop(position)
+        elif operation == "insert":
+            chars.insert(position, rng.choice("aeiourst"))
+        else:
+            chars[position] = rng.choice("aeiourst")
+    return "".join(chars)
+
+
+def _time(function, queries: list[str]) -> tuple[list[float], list]:
+    timings, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(function(query))
+        timings.append(time.perf_counter() - start)
+    return timings, results
+
+
+def run(size: int, queries: int, seed: int):
+    rng = random.Random(seed)
+    names = make_names(size, rng)
+    words = [make_typo(rng.choice(names), rng) for _ in range(queries)]
+
+    start = time.perf_counter()
+    index = FuzzyIndex(names)
+    build = time.perf_counter() - start
+
+    linear, expected = _time(
+        lambda word: get_close_matches(word, names, n=1, cutoff=CUTOFF), words
+    )
+    indexed, results = _time(
+        lambda word: index.get_close_matches(word, n=1, cutoff=CUTOFF), words
+    )
+    assert results == expected, "FuzzyIndex divergiu do difflib"
+
+    print(
+        f"{size:>7} nomes  índice={build * 1000:8.1f} ms  "
+        f"difflib={statistics.mean(linear) * 1000:8.2f} ms/consulta  "
+        f"FuzzyIndex={statistics.mean(indexed) * 1000:7.2f} ms/consulta  "
+        f"({statistics.mean(linear) / statistics.mean(indexed):5.1f}x)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000]
+    )
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size, args.queries, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark de `NLPService.parse_many` vs `parse_sentence` chamado frase a
+frase, com um catálogo grande de nomes (`known_people` sintético) e consultas
+com erros de digitação, sem o cache de resultados.
+
+Uso:
+    python -m app.benchmarks.bench_nlp_batch --names 20000 --queries 500
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import time
+
+from app.benchmarks.bench_fuzzy_index import make_names, make_typo
+from app.models.cache import TTLCache
+from app.models.database import FirestoreManager
+from app.models.local_firestore import LocalFirestoreClient, MemoryStore
+from app.models.nlp_service import NLPService
+from app.tools.nlp_metadado_bootstrap import bootstrap_nlp_config
+
+TEMPLATES = [
+    "Qual a altura de {}?",
+    "Qual o peso do {}?",
+    "Qual o planeta natal de {}?",
+    "What is the homeworld of {}?",
+    "How tall is {}?",
+]
+
+
+def _service(client) -> NLPService:
+    return NLPService(
+        FirestoreManager("bench", client=client), parse_cache=TTLCache(max_size=0)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--names", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    client = LocalFirestoreClient(MemoryStore())
+    with contextlib.redirect_stdout(io.StringIO()):
+        bootstrap_nlp_config(client)
+    names = make_names(args.names, rng)
+    client.collection("metadata").document("nlp_settings").update(
+        {"known_people": names}
+    )
+    queries = [
+        rng.choice(TEMPLATES).format(make_typo(rng.choice(names), rng))
+        for _ in range(args.queries)
+    ]
+
+    single = _service(client)
+    single.parse_sentence(queries[0])
+    start = time.perf_counter()
+    expected = [single.parse_sentence(query) for query in queries]
+    before = time.perf_counter() - start
+
+    batch = _service(client)
+    # A matriz do índice é montada na primeira chamada, uma vez por versão.
+    batch.parse_many(queries[:1])
+    start = time.perf_counter()
+    results = batch.parse_many(queries)
+    after = time.perf_counter() - start
+    assert results == expected, "Resultados divergentes"
+
+    print(f"{len(queries)} frases, {len(names)} nomes conhecidos:")
+    print(f"parse_sentence  {before:8.2f} s  ({len(queries) / before:8.1f} frases/s)")
+    print(f"parse_many      {after:8.2f} s  ({len(queries) / after:8.1f} frases/s)")
+    print(f"ganho: {before / after:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
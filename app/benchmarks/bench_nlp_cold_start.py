@@ -0,0 +1,110 @@
+"""
+Benchmark do cold start do NLP: tempo até o primeiro `parse_sentence` em um
+processo novo, com os dados distribuídos em `app.models.nlp_data` vs o
+download dos recursos do NLTK (comportamento anterior, que precisa de rede).
+
+Cada medida roda em um processo Python separado, com um diretório de dados do
+NLTK vazio, como em uma instância nova do Cloud Functions.
+
+Uso:
+    python -m app.benchmarks.bench_nlp_cold_start --runs 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+_BUNDLED = """
+import contextlib, io, json, time
+from app.models.database import FirestoreManager
+from app.models.local_firestore import LocalFirestoreClient
+from app.tools.nlp_metadado_bootstrap import bootstrap_nlp_config
+
+client = LocalFirestoreClient()
+with contextlib.redirect_stdout(io.StringIO()):
+    bootstrap_nlp_config(client)
+db = FirestoreManager("bench", client=client)
+
+start = time.perf_counter()
+from app.models.nlp_service import NLPService
+result = NLPService(db).parse_sentence("Qual a altura do Yoda?")
+print(json.dumps({"seconds": time.perf_counter() - start, "name": result["name"]}))
+"""
+
+_LEGACY = """
+import json, sys, time
+start = time.perf_counter()
+import nltk
+from nltk.corpus import stopwords
+from nltk.tokenize import word_tokenize
+path = sys.argv[1]
+nltk.data.path.append(path)
+for resource in ["punkt", "punkt_tab", "stopwords"]:
+    nltk.download(resource, download_dir=path, quiet=True)
+words = set(stopwords.words("portuguese")) | set(stopwords.words("english"))
+tokens = word_tokenize("qual a altura do yoda?", language="portuguese")
+print(json.dumps({
+    "seconds": time.perf_counter() - start,
+    "name": " ".join(t for t in tokens if t.isalnum() and t not in words),
+}))
+"""
+
+
+def _measure(script: str, runs: int) -> list[float]:
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    timings = []
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as nltk_data:
+            output = subprocess.run(
+                [sys.executable, "-c", script, nltk_data],
+                cwd=root,
+                capture_output=True,
+                text=True,
+                timeout=300,
+            )
+        if output.returncode != 0:
+            errors = [line for line in output.stderr.splitlines() if "Error" in line]
+            raise RuntimeError(errors[-1].strip() if errors else output.stderr)
+        timings.append(json.loads(output.stdout.strip().splitlines()[-1])["seconds"])
+    return timings
+
+
+def _report(label: str, timings: list[float]):
+    print(
+        f"{label:<10} média={statistics.mean(timings) * 1000:9.1f} ms  "
+        f"p50={statistics.median(timings) * 1000:9.1f} ms  "
+        f"máx={max(timings) * 1000:9.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--skip-legacy",
+        action="store_true",
+        help="Não mede o download do NLTK (por exemplo, sem acesso à rede).",
+    )
+    args = parser.parse_args()
+
+    print(f"Tempo até o primeiro parse_sentence ({args.runs} processos):")
+    after = _measure(_BUNDLED, args.runs)
+    if not args.skip_legacy:
+        try:
+            before = _measure(_LEGACY, args.runs)
+        except RuntimeError as e:
+            print(f"antes      indisponível: {e}")
+        else:
+            _report("antes", before)
+            _report("depois", after)
+            print(f"ganho: {statistics.mean(before) / statistics.mean(after):.2f}x")
+            return
+    _report("depois", after)
+
+
+if __name__ == "__main__":
+    main()
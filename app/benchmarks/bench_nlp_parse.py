@@ -0,0 +1,143 @@
+"""
+Benchmark de `NLPService.parse_sentence` sobre um corpus de perguntas em
+português e inglês: estruturas de busca refeitas a cada chamada (comportamento
+anterior) vs compiladas uma vez por versão de `nlp_settings`, sem e com o
+cache de resultados.
+
+Uso:
+    python -m app.benchmarks.bench_nlp_parse --rounds 20
+"""
+
+import argparse
+import contextlib
+import io
+import statistics
+import time
+from difflib import get_close_matches
+
+from app.models.cache import TTLCache
+from app.models.database import FirestoreManager
+from app.models.local_firestore import LocalFirestoreClient, MemoryStore
+from app.models.nlp_service import NLPService
+from app.tools.nlp_metadado_bootstrap import bootstrap_nlp_config
+
+QUERIES = [
+    "Qual a altura do Yoda?",
+    "Quem dirigiu a New Hope?",
+    "Qual o planeta natal de Luke Skywalker?",
+    "Quantos habitantes tem Tatooine?",
+    "Qual o clima de Hoth?",
+    "Quem pilotou a Millennium Falcon?",
+    "Qual o modelo da X-wing?",
+    "Qual a velocidade da Death Star?",
+    "Qual o peso do Chewbacca?",
+    "Em quais filmes aparece a Leia Organa?",
+    "Qual o idioma dos Wookiees?",
+    "Quem produziu O Império Contra-Ataca?",
+    "Quando foi o lancamento de Uma Nova Esperança?",
+    "Qual o genero de R2-D2?",
+    "Qual a gravidade de Dagobah?",
+    "Quais os residentes de Naboo?",
+    "Qual a tripulacao do Star Destroyer?",
+    "Qual o fabricante da Slave 1?",
+    "How tall is Darth Vader?",
+    "Who directed Return of the Jedi?",
+    "What is the population of Coruscant?",
+    "What is the climate of Endor?",
+    "Which starships did Han Solo fly?",
+    "What is the mass of Jabba Desilijic Tiure?",
+    "What is the homeworld of Obi-Wan Kenobi?",
+    "What is the terrain of Bespin?",
+    "Qual a altra do Yodda?",
+    "Quem dirijiu a Nwe Hope?",
+    "Qual o diametro de Alderan?",
+    "Qual o custo da Millenium Falcon?",
+]
+
+
+class _LegacyNLP(NLPService):
+    """Comportamento anterior: listas e conjuntos refeitos a cada chamada."""
+
+    def _fuzzy_correction(self, name, lookup=None):
+        lookup = lookup or self._current_lookup()
+        if not lookup.known_entities:
+            return name
+        matches = get_close_matches(name, list(lookup.known_entities), n=1, cutoff=0.7)
+        corrected = matches[0] if matches else name
+        return lookup.translations.get(corrected, corrected)
+
+    def _fuzzy_intent(self, word, lookup=None):
+        lookup = lookup or self._current_lookup()
+        matches = get_close_matches(word, list(lookup.intents.keys()), n=1, cutoff=0.9)
+        return lookup.intents[matches[0]] if matches else None
+
+    def _infer_type(self, name, lookup):
+        config = lookup.config
+        category_map = {
+            "planets": set(config.get("known_planets", [])),
+            "starships": set(config.get("known_starships", [])),
+            "vehicles": set(config.get("known_vehicles", [])),
+            "species": set(config.get("known_species", [])),
+            "films": set(config.get("known_films", [])).union(
+                set(lookup.translations.keys())
+            ),
+            "people": set(config.get("known_people", [])),
+        }
+        for category, entities in category_map.items():
+            if name in entities:
+                return category
+        return None
+
+
+def _no_cache() -> TTLCache:
+    return TTLCache(max_size=0)
+
+
+def _run(nlp: NLPService, rounds: int) -> tuple[list[float], list[dict]]:
+    timings, results = [], []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        results = [nlp.parse_sentence(query) for query in QUERIES]
+        timings.append((time.perf_counter() - start) / len(QUERIES))
+    return timings, results
+
+
+def _report(label: str, timings: list[float]):
+    print(
+        f"{label:<10} média={statistics.mean(timings) * 1e6:9.1f} µs/frase  "
+        f"p50={statistics.median(timings) * 1e6:9.1f} µs  "
+        f"({1 / statistics.mean(timings):8.0f} frases/s)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    client = LocalFirestoreClient(MemoryStore())
+    with contextlib.redirect_stdout(io.StringIO()):
+        bootstrap_nlp_config(client)
+    db = FirestoreManager("bench", client=client)
+
+    before, expected = _run(_LegacyNLP(db, parse_cache=_no_cache()), args.rounds)
+    compiled, results = _run(NLPService(db, parse_cache=_no_cache()), args.rounds)
+    assert results == expected, "Resultados divergentes"
+    cached_nlp = NLPService(db)
+    cached, results = _run(cached_nlp, args.rounds)
+    assert results == expected, "Resultados divergentes com cache"
+
+    print(f"parse_sentence ({len(QUERIES)} frases x {args.rounds} rodadas):")
+    _report("antes", before)
+    _report("compilado", compiled)
+    _report("com cache", cached)
+    print(
+        f"ganho: {statistics.mean(before) / statistics.mean(compiled):.2f}x "
+        f"(compilado), {statistics.mean(before) / statistics.mean(cached):.2f}x "
+        f"(com cache, taxa de acerto "
+        f"{cached_nlp.parse_cache_stats()['hit_ratio']:.0%})"
+    )
+
+
+if __name__ == "__main__":
+    main()
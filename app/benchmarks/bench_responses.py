@@ -0,0 +1,120 @@
+"""
+Benchmark da montagem das respostas de insight com uma entidade do tamanho de
+um filme completo (hidratado): `InsightResponse.model_dump_json` (comportamento
+anterior) vs o envelope escrito com o orjson, sem e com o cache de entidades
+já serializadas.
+
+Uso:
+    python -m app.benchmarks.bench_responses --iterations 20000
+"""
+
+import argparse
+import time
+
+from app.views import json_writer
+from app.views.responses import (
+    InsightResponse,
+    format_insight_response,
+    new_body_cache,
+)
+
+A_NEW_HOPE = {
+    "title": "A New Hope",
+    "episode_id": 4,
+    "opening_crawl": (
+        "It is a period of civil war.\r\nRebel spaceships, striking\r\nfrom a "
+        "hidden base, have won\r\ntheir first victory against\r\nthe evil "
+        "Galactic Empire.\r\n\r\nDuring the battle, Rebel\r\nspies managed to "
+        "steal secret\r\nplans to the Empire's\r\nultimate weapon, the DEATH\r\n"
+        "STAR, an armored space\r\nstation with enough power\r\nto destroy an "
+        "entire planet.\r\n\r\nPursued by the Empire's\r\nsinister agents, "
+        "Princess\r\nLeia races home aboard her\r\nstarship, custodian of the\r\n"
+        "stolen plans that can save her\r\npeople and restore\r\nfreedom to the "
+        "galaxy...."
+    ),
+    "director": "George Lucas",
+    "producer": "Gary Kurtz, Rick McCallum",
+    "release_date": "1977-05-25",
+    "characters": [
+        "Luke Skywalker", "C-3PO", "R2-D2", "Darth Vader", "Leia Organa",
+        "Owen Lars", "Beru Whitesun lars", "R5-D4", "Biggs Darklighter",
+        "Obi-Wan Kenobi", "Wilhuff Tarkin", "Chewbacca", "Han Solo", "Greedo",
+        "Jabba Desilijic Tiure", "Wedge Antilles", "Jek Tono Porkins", "Raymus Antilles",
+    ],
+    "planets": ["Tatooine", "Alderaan", "Yavin IV"],
+    "starships": [
+        "CR90 corvette", "Star Destroyer", "Sentinel-class landing craft",
+        "Death Star", "Millennium Falcon", "Y-wing", "X-wing", "TIE Advanced x1",
+    ],
+    "vehicles": ["Sand Crawler", "T-16 skyhopper", "X-34 landspeeder", "TIE/LN starfighter"],
+    "species": ["Human", "Droid", "Wookie", "Rodian", "Hutt"],
+    "created": "2014-12-10T14:23:31.880000Z",
+    "edited": "2014-12-20T19:49:45.256000Z",
+    "url": "https://swapi.dev/api/films/1/",
+    "type": "films",
+}  # fmt: skip
+
+
+def _before(data: dict) -> str:
+    return InsightResponse(
+        entity=data.get("name") or data.get("title", "Unknown"),
+        category=data.get("type", "generic"),
+        insight_value=data,
+        source="firestore",
+        suggestion=None,
+    ).model_dump_json(by_alias=True)
+
+
+def _measure(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def _report(label: str, seconds: float, baseline: float):
+    print(
+        f"{label:<10} {seconds * 1e6:8.2f} µs/resposta  "
+        f"({1 / seconds:9.0f} respostas/s, {baseline / seconds:5.2f}x)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    if json_writer.orjson is None:
+        print("⚠️ orjson não instalado: as respostas usam o pydantic.")
+
+    data = dict(A_NEW_HOPE)
+    cache = new_body_cache()
+    key = ("films", "a_new_hope", "2026-01-01T00:00:00+00:00")
+    expected = _before(data)
+    assert format_insight_response(data, None, "firestore")[0] == expected
+    assert (
+        format_insight_response(
+            data, None, "firestore", body_cache=cache, body_key=key
+        )[0]
+        == expected
+    )
+
+    before = _measure(lambda: _before(data), args.iterations)
+    direct = _measure(
+        lambda: format_insight_response(data, None, "firestore"), args.iterations
+    )
+    cached = _measure(
+        lambda: format_insight_response(
+            data, None, "firestore", body_cache=cache, body_key=key
+        ),
+        args.iterations,
+    )
+
+    print(f"Resposta de um filme completo ({len(expected.encode())} bytes):")
+    _report("antes", before, before)
+    _report("orjson", direct, before)
+    _report("com cache", cached, before)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark da latência por entidade hidratada: `requests.get` avulso vs sessão
+com pool de conexões.
+
+Uso:
+    python -m app.benchmarks.bench_swapi_session --entities 20 --handshake-ms 30
+"""
+
+import argparse
+import logging
+import statistics
+import time
+
+import requests
+
+from app.models.cache import TTLCache
+from app.models.data_service import DataService
+from app.models.swapi import SWAPIClient
+from app.tools.swapi_stub import StubSWAPIClient, SWAPIStubServer
+
+
+class _StubRoutingClient(StubSWAPIClient):
+    """Cliente sem cache de URLs, para medir apenas o efeito do pool de conexões."""
+
+    def __init__(self, stub: SWAPIStubServer, **kwargs):
+        kwargs.setdefault("url_cache", TTLCache(max_size=0))
+        super().__init__(stub, **kwargs)
+
+
+class _LegacyClient(_StubRoutingClient):
+    """Comportamento anterior: uma conexão nova a cada requisição."""
+
+    def _get_request(self, url: str):
+        try:
+            response = requests.get(self.stub.local_url(url), timeout=self.timeout)
+            response.raise_for_status()
+            return response.json()
+        except requests.RequestException as e:
+            logging.error(f"Erro ao buscar URL {url}: {e}")
+            return None
+
+
+def _run(client: SWAPIClient, names: list[str]) -> list[float]:
+    service = DataService(db_manager=None, swapi_client=client)
+    timings = []
+    for name in names:
+        start = time.perf_counter()
+        data = client.fetch_hydrated(name, "people").model_dump()
+        service.hydrate_all_parallel(data)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _report(label: str, timings: list[float]):
+    print(
+        f"{label:<10} média={statistics.mean(timings) * 1000:8.2f} ms  "
+        f"p50={statistics.median(timings) * 1000:8.2f} ms  "
+        f"máx={max(timings) * 1000:8.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entities", type=int, default=20)
+    parser.add_argument("--handshake-ms", type=float, default=30.0)
+    parser.add_argument("--response-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    names = [f"Person {i}" for i in range(1, args.entities + 1)]
+    with SWAPIStubServer(
+        handshake_delay=args.handshake_ms / 1000,
+        response_delay=args.response_ms / 1000,
+    ) as stub:
+        before = _run(_LegacyClient(stub), names)
+        pooled = _StubRoutingClient(stub)
+        after = _run(pooled, names)
+        pooled.close()
+
+    print(f"Latência por entidade hidratada ({args.entities} entidades):")
+    _report("antes", before)
+    _report("depois", after)
+    print(f"ganho: {statistics.mean(before) / statistics.mean(after):.2f}x")
+
+
+if __name__ == "__main__":
+    main()
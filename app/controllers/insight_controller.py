@@ -1,10 +1,33 @@
-from app.models.data_service import DataService
+from datetime import datetime, timezone
+
+from app.models.data_service import (
+    CACHED_AT_FIELD,
+    INTERNAL_FIELDS,
+    PENDING_HYDRATION_FIELD,
+    DataService,
+)
+from app.models.metadata_cache import MetadataCache
 from app.models.nlp_service import NLPService
+from app.models.singleflight import SingleFlight
 from app.views.responses import format_insight_response
 
+HISTORY_PAGE_SIZE = 20
+HISTORY_MAX_PAGE_SIZE = 100
+
 
 class InsightController:
-    def __init__(self, db_manager, swapi_client):
+    def __init__(
+        self,
+        db_manager,
+        swapi_client,
+        name_index=None,
+        negative_cache=None,
+        write_behind=None,
+        quota=None,
+        metadata_cache=None,
+        body_cache=None,
+        trusted_proxy_hops: int = 1,
+    ):
         """
         Inicializa o controlador de insights.
 
@@ -14,6 +37,27 @@ class InsightController:
             Gerenciador de banco de dados do Firebase.
         swapi_client : app.models.swapi.SWAPIClient
             Cliente da API do SWAPI.
+        name_index : app.models.name_index.UrlNameIndex
+            Índice URL -> nome usado na hidratação, se houver.
+        negative_cache : app.models.negative_cache.NegativeCache
+            Cache de buscas sem resultado na SWAPI, se houver.
+        write_behind : app.models.write_behind.WriteBehindQueue
+            Fila para o histórico e as listas `known_*`, gravados fora do
+            caminho da resposta. Se omitida, essas escritas vão no lote da
+            requisição.
+        quota : app.models.quota.QuotaManager
+            Controle de cota por usuário (ou por IP, se anônimo), se houver.
+        metadata_cache : app.models.metadata_cache.MetadataCache
+            Cópia em memória de `metadata/nlp_settings`, compartilhada pelo
+            NLP e pelo endpoint `/metadata`. Se omitida, uma própria é criada.
+        body_cache : app.models.cache.TTLCache
+            Cache das entidades do Firestore já serializadas em JSON
+            (`app.views.responses.new_body_cache`), usado nas respostas sem
+            filtro, se houver.
+        trusted_proxy_hops : int
+            Número de proxies confiáveis na frente da função (o API Gateway),
+            que acrescentam o IP visto ao final de `X-Forwarded-For`. Com 0,
+            o IP é o `remote_addr` da requisição.
 
         Attributes
         -------
@@ -25,49 +69,90 @@ class InsightController:
             Controlador de entidades nomeadas.
         data_service : app.models.data_service.DataService
             Servi o de dados do Star Wars.
+        live_flight : app.models.singleflight.SingleFlight
+            Coalescência das buscas ao vivo concorrentes pela mesma entidade.
+        metadata : app.models.metadata_cache.MetadataCache
+            Cópia em memória de `metadata/nlp_settings`.
         """
         self.db = db_manager
         self.swapi = swapi_client
-        self.nlp = NLPService(self.db)
+        self.write_behind = write_behind
+        self.quota = quota
+        self.body_cache = body_cache
+        self.trusted_proxy_hops = trusted_proxy_hops
+        self.metadata = metadata_cache or MetadataCache(self.db)
+        self.nlp = NLPService(self.db, metadata_cache=self.metadata)
+
+        self.data_service = DataService(
+            self.db,
+            self.swapi,
+            name_index=name_index,
+            negative_cache=negative_cache,
+            write_behind=write_behind,
+            metadata_cache=self.metadata,
+        )
+        self.live_flight = SingleFlight()
 
-        self.data_service = DataService(self.db, self.swapi)
+    def get_known_entities(self, request=None):
+        """Retorna todas as entidades conhecidas catalogadas no sistema.
 
-    def get_known_entities(self):
-        """Retorna todas as entidades conhecidas catalogadas no sistema."""
-        settings = self.db.get_metadata("nlp_settings") or {}
+        A resposta vem da cópia em memória de `nlp_settings` e leva um `ETag`;
+        se o cliente enviar o mesmo valor em `If-None-Match`, retorna 304 sem
+        corpo."""
+        known_data = self.metadata.known_entities()
+        headers = {"ETag": self.metadata.etag, "Cache-Control": "no-cache"}
 
-        known_data = {
-            key: value for key, value in settings.items() if key.startswith("known_")
-        }
-
-        default_structure = {
-            "known_films": [],
-            "known_people": [],
-            "known_planets": [],
-            "known_starships": [],
-            "known_species": [],
-            "known_vehicles": [],
-        }
+        if_none_match = (getattr(request, "headers", None) or {}).get("If-None-Match")
+        if if_none_match and self.metadata.etag in (
+            tag.strip() for tag in if_none_match.split(",")
+        ):
+            return "", 304, headers
 
-        return {**default_structure, **known_data}, 200
+        return known_data, 200, headers
 
-    def get_my_history(self, user_data=None):
-        """Retorna a lista de histórico de buscas do usuário.
+    def get_my_history(self, user_data=None, params=None):
+        """Retorna uma página do histórico de buscas do usuário.
 
         Parameters
         ----------
         user_data : dict
             Dados do usuário, incluindo o e-mail.
+        params : dict
+            Parâmetros da requisição: `limit` (tamanho da página, até
+            `HISTORY_MAX_PAGE_SIZE`) e `before` (cursor `next_before` devolvido
+            pela página anterior).
 
         Notes
         -----
-        Se o usuário não estiver autenticado, retorna um erro 401."""
+        Se o usuário não estiver autenticado, retorna um erro 401.
+        Parâmetros de paginação inválidos retornam um erro 400."""
 
         if not user_data:
             return {"error": "User not authenticated"}, 401
 
+        params = params or {}
+        try:
+            limit = int(params.get("limit") or HISTORY_PAGE_SIZE)
+            before, _, before_id = (params.get("before") or "").partition("/")
+            before = datetime.fromisoformat(before) if before else None
+            if before is not None and before.tzinfo is None:
+                before = before.replace(tzinfo=timezone.utc)
+        except ValueError:
+            limit = 0
+        if not 0 < limit <= HISTORY_MAX_PAGE_SIZE:
+            return {
+                "error": "Invalid pagination",
+                "message": f"'limit' must be between 1 and {HISTORY_MAX_PAGE_SIZE} "
+                "and 'before' must be the 'next_before' of a previous page.",
+            }, 400
+
         user_email = user_data.get("email")
-        return self.db.get_my_search_history(user_email), 200
+        return (
+            self.db.get_my_search_history(
+                user_email, limit=limit, before=before, before_id=before_id or None
+            ),
+            200,
+        )
 
     def handle_insight(self, request, user_data=None):
         """Trata uma requisição de insight, podendo vir de uma busca natural ou de uma busca parametrizada.
@@ -76,6 +161,8 @@ class InsightController:
         Se a requisição vier de uma busca parametrizada, usa as informações passadas como parâmetro.
 
         Em seguida, busca a entidade no banco de dados e, se não encontrar, tenta buscar na API do SWAPI.
+        Se o tipo da entidade for ambíguo, os tipos possíveis são lidos do banco em uma única chamada
+        e buscados em paralelo na SWAPI; o primeiro encontrado vence.
         Se encontrar a entidade, a retorna com a resposta formatada.
         Caso contrário, retorna um erro ao front.
 
@@ -126,51 +213,201 @@ class InsightController:
                 "error": "No query provided",
                 "message": "See the documentation: https://lucasedson.github.io/starwars-insights-api/",
             }, 400
+
+        if self.quota is not None:
+            email = (user_data or {}).get("email")
+            if email:
+                allowed, retry_after = self.quota.check(email)
+            else:
+                allowed, retry_after = self.quota.check(
+                    f"anon:{self._client_ip(request)}", anonymous=True
+                )
+            if not allowed:
+                return (
+                    {
+                        "error": "Too Many Requests",
+                        "message": f"Quota exceeded. Try again in {retry_after} seconds.",
+                    },
+                    429,
+                    {"Retry-After": str(retry_after)},
+                )
+
         query_natural = params.get("q")
 
         if query_natural:
             nlp_res = self.nlp.parse_sentence(query_natural)
             search_name = nlp_res.get("name")
             display_name = nlp_res.get("raw_name")
-            entity_type = nlp_res.get("type")
+            entity_types = tuple(
+                nlp_res.get("candidate_types") or (nlp_res.get("type"),)
+            )
             raw_filters = nlp_res.get("filter")
+            if nlp_res.get("type_source") not in (None, "name") and (
+                "people" not in entity_types
+            ):
+                # Sem a pista da intenção, o nome desconhecido seria buscado
+                # em `people`: uma leitura no Firestore e uma busca na SWAPI.
+                self.data_service.resolution.add(
+                    firestore_reads_avoided=1, swapi_searches_avoided=1
+                )
         else:
             display_name = params.get("name")
             search_name = self.nlp._fuzzy_correction(display_name)
-            entity_type = params.get("type")
+            entity_types = (params.get("type"),)
             raw_filters = params.get("filter")
+        self.data_service.resolution.add(requests=1)
 
         suggestion = None
         if search_name.lower() != display_name.lower():
             suggestion = search_name
 
-        data = self.db.get(entity_type, search_name)
+        filters = self.data_service.parse_filters(raw_filters)
+        body_key = None
+        writes = self.db.batch()
+        entity_type, data = self.data_service.get_cached_any(entity_types, search_name)
         source = "firestore"
 
         if not data:
             source = "live"
-            data = self.data_service.fetch_and_learn(search_name, entity_type)
+            flight_key = (entity_types, " ".join(search_name.lower().split()))
+            data = self.live_flight.do(
+                flight_key, self._fetch_live, search_name, entity_types, filters, writes
+            )
             if not data or "error" in data:
+                writes.commit()
                 return format_insight_response(
                     data or {"error": "Not found"},
-                    self.data_service.parse_filters(raw_filters),
+                    filters,
                     "error",
                 )
-
-            data = self.data_service.hydrate_all_parallel(data)
-            data["type"] = entity_type
-            self.data_service.cache_new_data(
-                entity_type, (data.get("name") or data.get("title")), data
-            )
+            # O mesmo dicionário é compartilhado com as chamadas coalescidas.
+            data = dict(data)
+            self.data_service.hydrate_requested(data, filters)
         else:
+            if not data.get(PENDING_HYDRATION_FIELD) and data.get(CACHED_AT_FIELD):
+                # O documento é regravado (com novo `_cached_at`) sempre que
+                # muda, então a chave identifica o corpo serializado.
+                body_key = (
+                    entity_type,
+                    self.db.doc_id(search_name),
+                    data[CACHED_AT_FIELD],
+                )
             data["type"] = entity_type
+            if self.data_service.is_stale(data):
+                source = "firestore-stale"
+                self.data_service.revalidate_in_background(entity_type, data)
+            hydrated = self.data_service.hydrate_requested(data, filters)
+            if data.get(PENDING_HYDRATION_FIELD):
+                # Campos que o filtro não pediu continuam pendentes no
+                # documento: são completados fora do caminho da resposta.
+                self.data_service.complete_hydration_in_background(entity_type, data)
+            elif hydrated:
+                # Tudo foi hidratado nesta requisição: o documento completo
+                # vai no lote, para não ser hidratado de novo a cada acesso.
+                self.data_service.cache_new_data(
+                    entity_type,
+                    data.get("name") or data.get("title"),
+                    dict(data),
+                    writes,
+                )
+                if self.data_service.name_index is not None:
+                    self.data_service.name_index.flush(writes)
+
+        for field in INTERNAL_FIELDS:
+            data.pop(field, None)
 
         if user_data:
-            self.db.create_or_update_my_search_history(user_data.get("email"), params)
+            (self.write_behind or writes).create_or_update_my_search_history(
+                user_data.get("email"), params
+            )
+        writes.commit()
 
         return format_insight_response(
             data,
-            self.data_service.parse_filters(raw_filters),
+            filters,
             source,
             suggestion=suggestion,
+            body_cache=self.body_cache,
+            body_key=body_key,
+        )
+
+    def _client_ip(self, request) -> str:
+        """
+        IP de origem da requisição, considerando os proxies confiáveis.
+
+        As primeiras entradas de `X-Forwarded-For` são enviadas pelo próprio
+        cliente e não servem para identificá-lo. Só vale a entrada adicionada
+        pelo proxy confiável mais externo (o API Gateway): a
+        `trusted_proxy_hops`-ésima a partir do fim. Sem proxies confiáveis, ou
+        se o cabeçalho tiver menos entradas que isso, usa `remote_addr`.
+        """
+        headers = getattr(request, "headers", None) or {}
+        forwarded = [
+            address.strip()
+            for address in (headers.get("X-Forwarded-For") or "").split(",")
+            if address.strip()
+        ]
+        hops = self.trusted_proxy_hops
+        if hops and len(forwarded) >= hops:
+            return forwarded[-hops]
+        return getattr(request, "remote_addr", None) or "unknown"
+
+    def _fetch_live(self, search_name, entity_types, filters=None, writes=None):
+        """Busca a entidade na SWAPI, hidrata os campos relacionais e salva no cache.
+
+        Se houver mais de um tipo possível, eles são buscados em paralelo e o
+        primeiro encontrado vence (`DataService.fetch_and_learn_any`).
+
+        Apenas os campos relacionais pedidos em `filters` são hidratados antes
+        da resposta. O documento é salvo com os demais campos marcados como
+        pendentes e completado em segundo plano.
+
+        Chamadas concorrentes para a mesma entidade são coalescidas em
+        `live_flight`, de modo que apenas uma delas executa este método.
+
+        Parameters
+        ----------
+        search_name : str
+            Nome da entidade a ser buscada.
+        entity_types : tuple[str, ...]
+            Tipos possíveis da entidade, em ordem de preferência.
+        filters : Optional[list[str]]
+            Campos pedidos pelo usuário.
+        writes : app.models.database.FirestoreBatch
+            Lote onde as escritas são agrupadas. Se omitido, um lote próprio é
+            criado e enviado ao final.
+
+        Returns
+        -------
+        dict or None
+            A entidade hidratada ou None se não for encontrada.
+        """
+        own_batch = writes is None
+        if own_batch:
+            writes = self.db.batch()
+
+        entity_type, data = self.data_service.fetch_and_learn_any(
+            search_name, entity_types, writes
+        )
+        if not data or "error" in data:
+            return data
+
+        data["type"] = entity_type
+        self.data_service.mark_pending_hydration(data)
+        self.data_service.hydrate_requested(data, filters)
+        self.data_service.cache_new_data(
+            entity_type, (data.get("name") or data.get("title")), data, writes
+        )
+        if self.data_service.name_index is not None:
+            self.data_service.name_index.flush(writes)
+        # Só depois do commit, para que o documento completo não seja
+        # sobrescrito pela versão parcial do lote.
+        snapshot = dict(data)
+        writes.after_commit(
+            lambda: self.data_service.complete_hydration_in_background(
+                entity_type, snapshot
+            )
         )
+        if own_batch:
+            writes.commit()
+        return data
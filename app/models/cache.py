@@ -0,0 +1,138 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+_MISSING = object()
+
+
+class TTLCache:
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl: float = 3600.0,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = None,
+    ):
+        """
+        Cache em memória com expiração (TTL) e descarte LRU.
+
+        É seguro para uso entre threads e foi pensado para ser compartilhado
+        por todas as requisições atendidas por uma mesma instância.
+
+        Parameters
+        ----------
+        max_size : int
+            Número máximo de entradas mantidas no cache.
+        ttl : float
+            Tempo de vida de cada entrada, em segundos.
+        max_bytes : Optional[int]
+            Limite do tamanho total das entradas, medido por `sizeof`.
+        sizeof : Optional[Callable[[Any], int]]
+            Função que mede o tamanho de um valor, em bytes. Obrigatória quando
+            `max_bytes` é informado.
+
+        Attributes
+        ----------
+        hits : int
+            Número de leituras atendidas pelo cache.
+        misses : int
+            Número de leituras que não encontraram entrada válida.
+        evictions : int
+            Número de entradas descartadas por falta de espaço.
+        expirations : int
+            Número de entradas descartadas por TTL vencido.
+        resident_bytes : int
+            Tamanho total das entradas atuais, medido por `sizeof`.
+        """
+        if max_bytes is not None and sizeof is None:
+            raise ValueError("sizeof é obrigatório quando max_bytes é informado.")
+        self.max_size = max_size
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._data: "OrderedDict[Hashable, tuple[float, Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.resident_bytes = 0
+
+    def _remove(self, key: Hashable):
+        _, _, size = self._data.pop(key)
+        self.resident_bytes -= size
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Retorna o valor associado à chave ou `default` se ausente/expirado."""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            expires_at, value, _ = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float = None):
+        """Armazena um valor, descartando as entradas menos usadas se necessário."""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        size = self.sizeof(value) if self.sizeof else 0
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._data[key] = (expires_at, value, size)
+            self.resident_bytes += size
+            while len(self._data) > self.max_size or (
+                self.max_bytes is not None and self.resident_bytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove e retorna o valor associado à chave, se existir."""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            self._remove(key)
+            return entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.resident_bytes = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            return entry is not _MISSING and entry[0] > time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        """Retorna os contadores de uso do cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "resident_bytes": self.resident_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
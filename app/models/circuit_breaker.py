@@ -0,0 +1,84 @@
+import logging
+import threading
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Disjuntor para chamadas a um serviço externo instável.
+
+        Após `failure_threshold` falhas consecutivas o circuito abre e as
+        chamadas seguintes falham imediatamente, sem esperar o timeout da
+        rede. Passados `reset_timeout` segundos, uma única chamada de teste é
+        liberada (meio-aberto): se tiver sucesso o circuito fecha, se falhar
+        ele volta a abrir.
+
+        Parameters
+        ----------
+        failure_threshold : int
+            Número de falhas consecutivas que abre o circuito.
+        reset_timeout : float
+            Tempo, em segundos, que o circuito fica aberto antes do teste.
+
+        Attributes
+        ----------
+        rejected : int
+            Número de chamadas recusadas com o circuito aberto.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if (
+            self._state == OPEN
+            and time.monotonic() - self._opened_at >= self.reset_timeout
+        ):
+            self._state = HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def allow(self) -> bool:
+        """Indica se uma nova chamada pode ser feita."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    logging.warning(
+                        f"⚡ [CIRCUIT] Aberto após {self._failures} falhas consecutivas."
+                    )
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
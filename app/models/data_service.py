@@ -1,11 +1,110 @@
-from concurrent.futures import ThreadPoolExecutor
-from datetime import date
+import asyncio
+import logging
+import threading
+from concurrent.futures import as_completed
+from datetime import date, datetime, timezone
+
+from app.models.executor import hydration_executor
+from app.models.swapi import HYDRATION_CONCURRENCY
+
+# Campo interno que marca, no documento salvo, os campos relacionais que ainda
+# estão em formato de URL e precisam ser hidratados.
+PENDING_HYDRATION_FIELD = "_pending_hydration"
+
+# Momento (ISO, UTC) em que o documento foi salvo no cache.
+CACHED_AT_FIELD = "_cached_at"
+
+# Campos de controle que nunca devem aparecer na resposta.
+INTERNAL_FIELDS = (PENDING_HYDRATION_FIELD, CACHED_AT_FIELD)
+
+
+class ResolutionStats:
+    def __init__(self):
+        """
+        Contadores da resolução do tipo das entidades: leituras no Firestore e
+        buscas na SWAPI feitas para encontrar a entidade (sem a hidratação) e
+        as evitadas por saber o tipo de antemão.
+
+        Attributes
+        ----------
+        requests : int
+            Número de entidades resolvidas.
+        probes : int
+            Número de resoluções com mais de um tipo buscado em paralelo na SWAPI.
+        firestore_reads : int
+            Leituras (`get_many`) feitas no Firestore.
+        swapi_searches : int
+            Buscas (`?search=`) feitas na SWAPI.
+        firestore_reads_avoided : int
+            Leituras que o tipo padrão (`people`) teria feito à toa.
+        swapi_searches_avoided : int
+            Buscas que o tipo padrão (`people`) teria feito à toa.
+        """
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.probes = 0
+        self.firestore_reads = 0
+        self.swapi_searches = 0
+        self.firestore_reads_avoided = 0
+        self.swapi_searches_avoided = 0
+
+    def add(self, **counts):
+        """Soma `counts` aos contadores (ex: `add(swapi_searches=1)`)."""
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def stats(self) -> dict:
+        """Retorna os contadores e as médias por entidade resolvida."""
+        with self._lock:
+            requests = self.requests
+            return {
+                "requests": requests,
+                "probes": self.probes,
+                "firestore_reads": self.firestore_reads,
+                "swapi_searches": self.swapi_searches,
+                "firestore_reads_avoided": self.firestore_reads_avoided,
+                "swapi_searches_avoided": self.swapi_searches_avoided,
+                "firestore_reads_per_request": (
+                    self.firestore_reads / requests if requests else 0.0
+                ),
+                "swapi_searches_per_request": (
+                    self.swapi_searches / requests if requests else 0.0
+                ),
+                "avoided_per_request": (
+                    (self.firestore_reads_avoided + self.swapi_searches_avoided)
+                    / requests
+                    if requests
+                    else 0.0
+                ),
+            }
 
 
 class DataService:
-    def __init__(self, db_manager, swapi_client):
+    def __init__(
+        self,
+        db_manager,
+        swapi_client,
+        name_index=None,
+        executor=None,
+        negative_cache=None,
+        stale_after: float = 24 * 3600,
+        write_behind=None,
+        metadata_cache=None,
+    ):
         self.db = db_manager
+        self.write_behind = write_behind
+        self.metadata_cache = metadata_cache
         self.swapi = swapi_client
+        self.name_index = name_index
+        self.negative_cache = negative_cache
+        self.stale_after = stale_after
+        # Documentos sendo regravados em segundo plano (revalidação ou
+        # hidratação), para que acessos seguidos não repitam o trabalho.
+        self._refreshing = set()
+        self._refreshing_lock = threading.Lock()
+        self.executor = hydration_executor if executor is None else executor
+        self.resolution = ResolutionStats()
         self.hydration_map = {
             "films": "title",
             "pilots": "name",
@@ -26,10 +125,134 @@ class DataService:
             return [f.strip() for f in raw_filters.split(",")]
         return None
 
-    def fetch_and_learn(self, name, entity_type):
-        pydantic_data = self.swapi.fetch_hydrated(name, entity_type)
+    def get_cached(self, entity_type: str, name: str):
+        """
+        Busca a entidade no Firestore junto com a marcação do cache negativo.
+
+        Os dois documentos são lidos em uma única chamada (`get_many`), de modo
+        que uma falta no cache não gera uma segunda leitura em `fetch_and_learn`.
+        """
+        return self.get_cached_any((entity_type,), name)[1]
+
+    def get_cached_any(self, entity_types, name: str) -> tuple:
+        """
+        `get_cached` para vários tipos possíveis, em uma única leitura.
+
+        Parameters
+        ----------
+        entity_types : Sequence[str]
+            Tipos possíveis da entidade, em ordem de preferência.
+        name : str
+            Nome da entidade.
+
+        Returns
+        -------
+        tuple
+            `(tipo, documento)` do primeiro tipo com documento no Firestore,
+            ou `(None, None)`.
+        """
+        refs = [(entity_type, self.db.doc_id(name)) for entity_type in entity_types]
+        prefetch_negative = [
+            entity_type
+            for entity_type in entity_types
+            if self.negative_cache is not None
+            and self.negative_cache.cached(entity_type, name) is None
+        ]
+        refs += [self.negative_cache.ref(t, name) for t in prefetch_negative]
+
+        docs = self.db.get_many(refs)
+        self.resolution.add(firestore_reads=1)
+        found = dict(zip(entity_types, docs))
+        for entity_type, doc in zip(prefetch_negative, docs[len(entity_types) :]):
+            if not found[entity_type]:
+                self.negative_cache.prime(entity_type, name, doc)
+        return next(
+            ((t, found[t]) for t in entity_types if found[t]),
+            (None, None),
+        )
+
+    def fetch_and_learn(self, name, entity_type, writes=None):
+        if self.negative_cache is not None and self.negative_cache.is_missing(
+            entity_type, name
+        ):
+            return None
+
+        pydantic_data = self._search(name, entity_type, writes)
         if not pydantic_data:
             return None
+        return self._learn(entity_type, pydantic_data, writes)
+
+    def fetch_and_learn_any(self, name, entity_types, writes=None) -> tuple:
+        """
+        `fetch_and_learn` para vários tipos possíveis.
+
+        Os tipos sem busca vazia registrada são buscados na SWAPI em paralelo,
+        no executor compartilhado, e o primeiro que encontrar a entidade
+        vence. As buscas que ainda não começaram são canceladas; as que já
+        estão em andamento terminam em segundo plano e só registram as buscas
+        vazias no cache negativo.
+
+        Parameters
+        ----------
+        name : str
+            Nome da entidade.
+        entity_types : Sequence[str]
+            Tipos possíveis da entidade.
+        writes : app.models.database.FirestoreBatch
+            Lote onde as escritas são agrupadas.
+
+        Returns
+        -------
+        tuple
+            `(tipo, entidade)` do tipo encontrado, ou `(None, None)`.
+        """
+        candidates = [
+            entity_type
+            for entity_type in entity_types
+            if self.negative_cache is None
+            or not self.negative_cache.is_missing(entity_type, name)
+        ]
+        if len(candidates) == 1:
+            data = self.fetch_and_learn(name, candidates[0], writes)
+            return (candidates[0], data) if data else (None, None)
+        if not candidates:
+            return None, None
+
+        self.resolution.add(probes=1)
+        # As buscas rodam em outros threads e podem terminar depois do commit
+        # do lote da requisição: o cache negativo não usa `writes` aqui.
+        futures = {
+            self.executor.submit(self._search, name, entity_type): entity_type
+            for entity_type in candidates
+        }
+        try:
+            for future in as_completed(futures):
+                pydantic_data = future.result()
+                if pydantic_data:
+                    entity_type = futures[future]
+                    return entity_type, self._learn(entity_type, pydantic_data, writes)
+        finally:
+            for future in futures:
+                future.cancel()
+        return None, None
+
+    def _search(self, name, entity_type, writes=None):
+        """Busca a entidade na SWAPI, registrando a busca vazia no cache negativo."""
+        self.resolution.add(swapi_searches=1)
+        pydantic_data = self.swapi.fetch_hydrated(name, entity_type)
+        # Falhas de rede não são cacheadas: apenas buscas sem resultado.
+        if (
+            not pydantic_data
+            and self.negative_cache is not None
+            and not self.swapi.last_request_failed()
+        ):
+            self.negative_cache.record_miss(
+                entity_type, name, self.write_behind or writes
+            )
+        return pydantic_data
+
+    def _learn(self, entity_type, pydantic_data, writes=None) -> dict:
+        """Registra o nome real da entidade encontrada e a retorna como dict."""
         data = pydantic_data.model_dump(by_alias=True)
         real_name = data.get("name") or data.get("title")
         metadata_map = {
@@ -40,58 +263,315 @@ class DataService:
         }
         target_list = metadata_map.get(entity_type)
         if target_list:
-            self.db.add_to_metadata_list(target_list, real_name)
+            # O usuário não precisa da lista atualizada antes da resposta.
+            (self.write_behind or writes or self.db).add_to_metadata_list(
+                target_list, real_name
+            )
+            if self.metadata_cache is not None:
+                self.metadata_cache.learn(target_list, real_name)
+        # A marcação pode ter sido gravada por outra instância, sem passar pela
+        # camada em memória desta: a remoção é sempre enviada, junto com as
+        # demais escritas, sem custar uma chamada a mais.
+        if self.negative_cache is not None:
+            self.negative_cache.invalidate(
+                entity_type, real_name, self.write_behind or writes
+            )
+        if self.name_index is not None:
+            self.name_index.learn(data.get("url", ""), real_name)
         return data
 
-    def cache_new_data(self, entity_type, name, data):
+    def cache_new_data(self, entity_type, name, data, writes=None):
         if "release_date" in data and isinstance(data["release_date"], date):
             data["release_date"] = data["release_date"].isoformat()
-        self.db.set(entity_type, name, data)
+        data[CACHED_AT_FIELD] = datetime.now(timezone.utc).isoformat()
+        (writes or self.db).set(entity_type, name, data)
 
-    def hydrate_all_parallel(self, data):
-        fields_to_hydrate = [f for f in self.hydration_map.keys() if f in data]
-        if not fields_to_hydrate:
+    def is_stale(self, data: dict) -> bool:
+        """
+        Indica se o documento do cache passou de `stale_after` segundos.
+
+        Documentos salvos antes da existência de `CACHED_AT_FIELD` são
+        considerados atualizados até a próxima regravação, que os marca:
+        tratá-los como vencidos faria cada um deles gerar uma busca na SWAPI
+        na primeira leitura depois do deploy.
+        """
+        cached_at = data.get(CACHED_AT_FIELD)
+        if not cached_at:
+            return False
+        try:
+            age = datetime.now(timezone.utc) - datetime.fromisoformat(cached_at)
+        except (TypeError, ValueError):
+            return True
+        return age.total_seconds() > self.stale_after
+
+    def revalidate_in_background(self, entity_type: str, data: dict):
+        """
+        Atualiza um documento vencido em segundo plano (stale-while-revalidate).
+
+        A entidade é buscada novamente na SWAPI e comparada pelo timestamp
+        `edited`: se não mudou, apenas `CACHED_AT_FIELD` é renovado; se mudou,
+        o documento é refeito e hidratado. Se a SWAPI estiver fora do ar, o
+        documento antigo continua sendo servido.
+        """
+        name = data.get("name") or data.get("title")
+        key = (entity_type, name)
+        if not self._start_refresh(key):
+            return None
+
+        def revalidate(cached):
+            try:
+                fresh = self.swapi.fetch_hydrated(name, entity_type)
+                if not fresh:
+                    return
+                fresh = fresh.model_dump(by_alias=True)
+                if fresh.get("url") != cached.get("url"):
+                    return
+                if fresh.get("edited") == cached.get("edited"):
+                    refreshed = cached
+                else:
+                    refreshed = self.mark_pending_hydration(
+                        {**fresh, "type": entity_type}
+                    )
+                # Completa também os campos pendentes da cópia antiga, para não
+                # regravar um documento menos hidratado que o atual.
+                self.hydrate_requested(refreshed)
+                self.cache_new_data(entity_type, name, refreshed)
+            except Exception as e:
+                logging.error(f"Erro ao revalidar '{name}': {e}")
+            finally:
+                self._end_refresh(key)
+
+        thread = threading.Thread(target=revalidate, args=(dict(data),), daemon=True)
+        thread.start()
+        return thread
+
+    def _start_refresh(self, key) -> bool:
+        with self._refreshing_lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def _end_refresh(self, key):
+        with self._refreshing_lock:
+            self._refreshing.discard(key)
+
+    def mark_pending_hydration(self, data: dict) -> dict:
+        """Marca todos os campos relacionais com URLs como pendentes de hidratação."""
+        pending = [f for f in self.hydration_map if self._hydratable_urls(data.get(f))]
+        if pending:
+            data[PENDING_HYDRATION_FIELD] = pending
+        return data
+
+    def hydrate_requested(self, data: dict, filters=None) -> bool:
+        """
+        Hidrata apenas os campos pendentes que a requisição realmente usa.
+
+        Parameters
+        ----------
+        data : dict
+            Entidade, possivelmente marcada com `PENDING_HYDRATION_FIELD`.
+        filters : Optional[list[str]]
+            Campos pedidos pelo usuário. Sem filtro, todos os campos pendentes
+            são hidratados.
+
+        Returns
+        -------
+        bool
+            True se algum campo foi hidratado.
+        """
+        pending = data.get(PENDING_HYDRATION_FIELD)
+        if not pending:
+            data.pop(PENDING_HYDRATION_FIELD, None)
+            return False
+
+        wanted = [f for f in pending if not filters or f in filters]
+        if not wanted:
+            return False
+
+        self.hydrate_all_parallel(data, fields=wanted)
+        remaining = [f for f in pending if f not in wanted]
+        if remaining:
+            data[PENDING_HYDRATION_FIELD] = remaining
+        else:
+            data.pop(PENDING_HYDRATION_FIELD)
+        return True
+
+    def complete_hydration_in_background(self, entity_type: str, data: dict):
+        """
+        Hidrata os campos ainda pendentes fora do caminho da resposta e salva o
+        documento completo no cache.
+
+        Não faz nada se o documento já estiver sendo revalidado ou hidratado
+        em segundo plano: a revalidação também completa os campos pendentes.
+        """
+        if not data.get(PENDING_HYDRATION_FIELD):
+            return None
+        name = data.get("name") or data.get("title")
+        key = (entity_type, name)
+        if not self._start_refresh(key):
+            return None
+
+        def complete(snapshot):
+            try:
+                self.hydrate_requested(snapshot)
+                self.cache_new_data(entity_type, name, snapshot)
+                if self.name_index is not None:
+                    self.name_index.flush()
+            except Exception as e:
+                logging.error(f"Erro ao completar a hidratação em segundo plano: {e}")
+            finally:
+                self._end_refresh(key)
+
+        thread = threading.Thread(target=complete, args=(dict(data),), daemon=True)
+        thread.start()
+        return thread
+
+    def hydrate_all_parallel(self, data, fields=None):
+        """
+        Hidrata os campos relacionais da entidade usando o executor compartilhado.
+
+        Cada URL distinta, de todos os campos, vira uma tarefa no executor da
+        instância, de modo que um filme com 40 personagens é resolvido em
+        paralelo e todas as requisições disputam o mesmo orçamento global de
+        concorrência contra a SWAPI.
+
+        Parameters
+        ----------
+        data : dict
+            Entidade com campos relacionais em formato de URL.
+        fields : Optional[list[str]]
+            Restringe a hidratação a estes campos.
+
+        Returns
+        -------
+        dict
+            A própria entidade, com as URLs substituídas pelos nomes.
+        """
+        fields_to_hydrate = [
+            f
+            for f in self.hydration_map.keys()
+            if f in data and (fields is None or f in fields)
+        ]
+        urls = {
+            url: self.hydration_map[field]
+            for field in fields_to_hydrate
+            for url in self._hydratable_urls(data.get(field))
+        }
+        if not urls:
             return data
 
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            list(
-                executor.map(
-                    lambda f: self.hydrate_field(data, f, self.hydration_map[f]),
-                    fields_to_hydrate,
-                )
-            )
+        futures = {
+            url: self.executor.submit(self.resolve_name, url, lookup_key)
+            for url, lookup_key in urls.items()
+        }
+        resolved = {url: future.result() for url, future in futures.items()}
+
+        for field in fields_to_hydrate:
+            value = data.get(field)
+            if isinstance(value, list):
+                data[field] = [
+                    resolved.get(item) or item if isinstance(item, str) else item
+                    for item in value
+                ]
+            elif isinstance(value, str) and resolved.get(value):
+                data[field] = resolved[value]
         return data
 
-    def hydrate_field(self, data: dict, field_name: str, lookup_key: str) -> dict:
+    async def hydrate_all_async(
+        self, data, async_swapi, max_concurrency: int = HYDRATION_CONCURRENCY
+    ):
+        """
+        Versão assíncrona de `hydrate_all_parallel`.
+
+        Todas as URLs de todos os campos relacionais são disparadas de uma vez,
+        limitadas por um semáforo, em vez de resolvidas item a item dentro de
+        cada campo. URLs repetidas são buscadas uma única vez. Como em
+        `resolve_name`, o índice URL -> nome é consultado antes da rede e
+        aprende os nomes buscados; o `flush` do índice fica com quem chama.
 
-        field_value = data.get(field_name)
-        if not field_value:
+        Parameters
+        ----------
+        data : dict
+            Entidade com campos relacionais ainda em formato de URL.
+        async_swapi : app.models.swapi.AsyncSWAPIClient
+            Cliente assíncrono da API do SWAPI.
+        max_concurrency : int
+            Número máximo de requisições simultâneas.
+
+        Returns
+        -------
+        dict
+            A própria entidade, com as URLs substituídas pelos nomes.
+        """
+        fields_to_hydrate = [f for f in self.hydration_map.keys() if f in data]
+        lookup_keys = {}
+        for field in fields_to_hydrate:
+            for url in self._hydratable_urls(data.get(field)):
+                lookup_keys.setdefault(url, self.hydration_map[field])
+        if not lookup_keys:
             return data
 
-        if isinstance(field_value, list):
-            hydrated_items = []
-            for item in field_value:
-                if isinstance(item, str) and "swapi.dev" in item:
-                    item_data = self.swapi.get_entity_by_url(item)
-                    if item_data:
-                        val = getattr(item_data, lookup_key, None) or (
-                            item_data.get(lookup_key)
-                            if isinstance(item_data, dict)
-                            else None
-                        )
-                        hydrated_items.append(val if val else item)
-                    else:
-                        hydrated_items.append(item)
-                else:
-                    hydrated_items.append(item)
-            data[field_name] = hydrated_items
+        names = {}
+        if self.name_index is not None:
+            for url in lookup_keys:
+                name = self.name_index.get(url)
+                if name:
+                    names[url] = name
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def resolve(url):
+            async with semaphore:
+                entity = await async_swapi.get_entity_by_url(url)
+            return url, self._lookup_value(entity, lookup_keys[url])
 
-        elif isinstance(field_value, str) and "swapi.dev" in field_value:
-            item_data = self.swapi.get_entity_by_url(field_value)
-            if item_data:
-                val = getattr(item_data, lookup_key, None) or (
-                    item_data.get(lookup_key) if isinstance(item_data, dict) else None
-                )
-                data[field_name] = val if val else field_value
+        missing = [url for url in lookup_keys if url not in names]
+        for url, name in await asyncio.gather(*(resolve(url) for url in missing)):
+            if name:
+                names[url] = name
+                if self.name_index is not None:
+                    self.name_index.learn(url, name)
 
+        for field in fields_to_hydrate:
+            value = data.get(field)
+            if isinstance(value, list):
+                data[field] = [
+                    names.get(item) or item if isinstance(item, str) else item
+                    for item in value
+                ]
+            elif isinstance(value, str):
+                data[field] = names.get(value) or value
         return data
+
+    @staticmethod
+    def _hydratable_urls(field_value) -> list:
+        """Retorna as URLs da SWAPI presentes no valor de um campo."""
+        values = field_value if isinstance(field_value, list) else [field_value]
+        return [v for v in values if isinstance(v, str) and "swapi.dev" in v]
+
+    @staticmethod
+    def _lookup_value(item_data, lookup_key: str):
+        """Extrai o nome de exibição de uma entidade retornada pela SWAPI."""
+        if not item_data:
+            return None
+        return getattr(item_data, lookup_key, None) or (
+            item_data.get(lookup_key) if isinstance(item_data, dict) else None
+        )
+
+    def resolve_name(self, url: str, lookup_key: str):
+        """
+        Resolve o nome de exibição de uma URL da SWAPI.
+
+        Consulta primeiro o índice URL -> nome; só busca a entidade na rede
+        quando a URL é desconhecida, e ensina o resultado ao índice.
+        """
+        if self.name_index is not None:
+            name = self.name_index.get(url)
+            if name:
+                return name
+
+        name = self._lookup_value(self.swapi.get_entity_by_url(url), lookup_key)
+        if name and self.name_index is not None:
+            self.name_index.learn(url, name)
+        return name
@@ -1,37 +1,170 @@
 import logging
-from datetime import date, datetime
+import pickle
+from datetime import datetime, timezone
+from typing import Callable, Iterable, Optional
 
 from google.cloud import firestore
 
+from app.models.cache import TTLCache
+from app.models.local_firestore import create_client
+
+L1_CACHE_MAX_BYTES = 32 * 1024 * 1024
+L1_CACHE_TTL = 300.0
+
+# Histórico de buscas: um documento por usuário, com uma subcoleção de
+# entradas ordenadas por `created_at`.
+HISTORY_COLLECTION = "search_histories"
+HISTORY_ENTRIES = "queries"
+
+# `created_at` das entradas antigas sem um `timestamp` válido: as mais antigas.
+UNKNOWN_CREATED_AT = datetime.min.replace(tzinfo=timezone.utc)
+
+# Limite de escritas por WriteBatch imposto pelo Firestore.
+BATCH_LIMIT = 500
+
+
+def new_l1_cache(
+    max_bytes: int = L1_CACHE_MAX_BYTES, ttl: float = L1_CACHE_TTL
+) -> TTLCache:
+    """Cria o cache L1 de documentos, limitado pelo tamanho serializado."""
+    return TTLCache(max_size=1_000_000, ttl=ttl, max_bytes=max_bytes, sizeof=len)
+
 
 class FirestoreManager:
-    def __init__(self, project_id: str):
+    def __init__(
+        self,
+        project_id: str,
+        l1_cache: TTLCache = None,
+        history_retention: Optional[int] = None,
+        client=None,
+    ):
+        """
+        Gerenciador de acesso ao Firestore.
+
+        As leituras de `get` e `get_document` passam por um cache L1 em
+        memória (read-through) e as escritas de `set` e `set_document` o
+        atualizam (write-through). Os documentos ficam guardados serializados
+        com `pickle`: o tamanho medido é o real e cada leitura recebe uma
+        cópia própria, que pode ser alterada sem afetar o cache.
+
+        Parameters
+        ----------
+        project_id : str
+            ID do projeto no Google Cloud.
+        l1_cache : TTLCache
+            Cache L1 de documentos. Se omitido, usa `new_l1_cache()`.
+        history_retention : Optional[int]
+            Número máximo de buscas mantidas no histórico de cada usuário. As
+            mais antigas são apagadas após cada gravação. Sem limite se None.
+        client : google.cloud.firestore.Client
+            Cliente de armazenamento. Se omitido, é criado conforme a variável
+            `STORAGE_BACKEND` (ver `app.models.local_firestore.create_client`).
+        """
         self.project_id = project_id
+        self.l1 = l1_cache if l1_cache is not None else new_l1_cache()
+        self.history_retention = history_retention
+
+        self.db = client if client is not None else create_client(project_id)
 
-        self.db = firestore.Client(project=project_id)
+    def _l1_get(self, collection: str, doc_id: str):
+        blob = self.l1.get((collection, doc_id))
+        return pickle.loads(blob) if blob is not None else None
+
+    def _l1_set(self, collection: str, doc_id: str, data: dict):
+        blob = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        self.l1.set((collection, doc_id), blob)
+
+    def _read(self, collection: str, doc_id: str):
+        data = self._l1_get(collection, doc_id)
+        if data is not None:
+            return data
+
+        doc = self.db.collection(collection).document(doc_id).get()
+        if not doc.exists:
+            return None
+        data = doc.to_dict()
+        self._l1_set(collection, doc_id, data)
+        return data
+
+    @staticmethod
+    def doc_id(name: str) -> str:
+        """Converte o nome de uma entidade no ID do documento correspondente."""
+        return name.lower().replace(" ", "_")
+
+    def cache_stats(self) -> dict:
+        """Retorna as métricas do cache L1 (taxa de acerto, bytes residentes)."""
+        return self.l1.stats()
 
     def get(self, collection: str, name: str):
         """Busca um documento pelo nome na coleção especificada."""
-        doc_id = name.lower().replace(" ", "_")
-        doc_ref = self.db.collection(collection).document(doc_id)
-        doc = doc_ref.get()
-        return doc.to_dict() if doc.exists else None
+        return self._read(collection, self.doc_id(name))
 
     def set(self, collection: str, name: str, data: dict):
         """Salva (ou sobrescreve) um documento na coleção."""
-        doc_id = name.lower().replace(" ", "_")
+        doc_id = self.doc_id(name)
         self.db.collection(collection).document(doc_id).set(data)
+        self._l1_set(collection, doc_id, data)
         logging.info(f"🔥 [CACHE SET] '{name}' salvo na coleção '{collection}'.")
 
     def get_document(self, collection: str, doc_id: str):
         """Busca direta por ID do documento."""
-        doc_ref = self.db.collection(collection).document(doc_id)
-        doc = doc_ref.get()
-        return doc.to_dict() if doc.exists else None
+        return self._read(collection, doc_id)
+
+    def get_many(self, refs: list, use_cache: bool = True) -> list:
+        """
+        Busca vários documentos, de uma ou mais coleções, em uma única chamada.
+
+        Parameters
+        ----------
+        refs : list[tuple[str, str]]
+            Pares `(coleção, ID do documento)`.
+        use_cache : bool
+            Se False, ignora o cache L1 (para documentos alterados por outras
+            instâncias, como contadores).
+
+        Returns
+        -------
+        list
+            Os documentos na mesma ordem de `refs` (None para os inexistentes).
+        """
+        if use_cache:
+            results = [self._l1_get(collection, doc_id) for collection, doc_id in refs]
+        else:
+            results = [None] * len(refs)
+        missing = [refs[i] for i, data in enumerate(results) if data is None]
+        if not missing:
+            return results
+
+        doc_refs = [
+            self.db.collection(collection).document(doc_id)
+            for collection, doc_id in dict.fromkeys(missing)
+        ]
+        found = {}
+        for doc in self.db.get_all(doc_refs):
+            if doc.exists:
+                key = (doc.reference.parent.id, doc.id)
+                found[key] = doc.to_dict()
+                if use_cache:
+                    self._l1_set(*key, found[key])
+
+        return [
+            data if data is not None else found.get(ref)
+            for ref, data in zip(refs, results)
+        ]
+
+    def batch(self) -> "FirestoreBatch":
+        """Inicia um lote de escritas, enviado ao Firestore em um único commit."""
+        return FirestoreBatch(self)
+
+    def set_document(self, collection: str, doc_id: str, data: dict):
+        """Salva (ou sobrescreve) um documento pelo ID."""
+        self.db.collection(collection).document(doc_id).set(data)
+        self._l1_set(collection, doc_id, data)
 
     def delete_document(self, collection: str, doc_id: str):
         doc_ref = self.db.collection(collection).document(doc_id)
         doc_ref.delete()
+        self.l1.pop((collection, doc_id))
 
     def get_metadata(self, doc_name: str) -> dict:
         """Busca documentos de configuração na coleção 'metadata'."""
@@ -43,86 +176,346 @@ class FirestoreManager:
             print(f"Erro ao buscar metadados: {e}")
             return {}
 
+    def watch_metadata(self, doc_name: str, callback):
+        """
+        Registra um listener (`on_snapshot`) em um documento da coleção
+        'metadata'. `callback` recebe o conteúdo do documento a cada alteração.
+
+        Returns
+        -------
+        google.cloud.firestore_v1.watch.Watch or None
+            O listener (use `unsubscribe()` para encerrar) ou None se o backend
+            não oferecer listeners.
+        """
+        doc_ref = self.db.collection("metadata").document(doc_name)
+        if not hasattr(doc_ref, "on_snapshot"):
+            return None
+
+        def on_snapshot(snapshots, changes, read_time):
+            for snapshot in snapshots:
+                self.l1.pop(("metadata", doc_name))
+                callback(snapshot.to_dict() if snapshot.exists else {})
+
+        try:
+            return doc_ref.on_snapshot(on_snapshot)
+        except Exception as e:
+            logging.error(f"Erro ao registrar o listener de metadados: {e}")
+            return None
+
+    def merge_metadata(self, doc_name: str, data: dict):
+        """Mescla campos em um documento da coleção 'metadata'."""
+        self.db.collection("metadata").document(doc_name).set(data, merge=True)
+        self.l1.pop(("metadata", doc_name))
+
     def add_to_metadata_list(self, list_name: str, item: str):
         """Adiciona um novo item a uma lista de metadados (ex: known_people)."""
         try:
             doc_ref = self.db.collection("metadata").document("nlp_settings")
             doc_ref.update({list_name: firestore.ArrayUnion([item])})
+            self.l1.pop(("metadata", "nlp_settings"))
         except Exception as e:
             print(f"Erro ao atualizar metadados: {e}")
             return
 
-    def check_and_update_quota(self, identifier: str, limit: int) -> bool:
+    @staticmethod
+    def history_entry(query: str) -> dict:
+        """Monta uma entrada do histórico de buscas."""
+        return {"query": query, "created_at": datetime.now(timezone.utc)}
+
+    @staticmethod
+    def legacy_history_entries(legacy: list) -> list:
         """
-        Verifica se o usuário atingiu a cota.
-        Retorna True se puder prosseguir, False se excedeu.
+        Converte a lista `queries` do formato antigo em entradas da subcoleção.
+
+        O `created_at` vem do `timestamp` (str(datetime.now()), no horário
+        local) de cada entrada, que deixa de ser guardado; sem um `timestamp`
+        válido, a entrada recebe `UNKNOWN_CREATED_AT`.
         """
-        today = date.today().isoformat()
-        doc_ref = self.db.collection("usage_stats").document(identifier)
+        entries = []
+        for entry in legacy or []:
+            if not isinstance(entry, dict):
+                continue
+            entry = dict(entry)
+            try:
+                created_at = datetime.fromisoformat(entry.pop("timestamp"))
+                created_at = created_at.astimezone(timezone.utc)
+            except (KeyError, TypeError, ValueError):
+                created_at = UNKNOWN_CREATED_AT
+            entries.append({**entry, "created_at": created_at})
+        return entries
 
-        doc = doc_ref.get()
-        if not doc.exists:
-            doc_ref.set({"count": 1, "last_reset": today})
-            return True
+    @staticmethod
+    def _timestamp(entry: dict) -> Optional[str]:
+        """Instante da entrada em ISO 8601 (UTC), ou None se for desconhecido."""
+        created_at = entry.get("created_at")
+        if created_at is None or created_at == UNKNOWN_CREATED_AT:
+            return None
+        return created_at.isoformat()
 
-        data = doc.to_dict()
+    def _history_ref(self, identifier: str):
+        return self.db.collection(HISTORY_COLLECTION).document(identifier)
+
+    def _delete_all(self, refs: Iterable) -> int:
+        """Apaga documentos em lotes de até `BATCH_LIMIT` escritas."""
+        deleted = 0
+        batch = self.db.batch()
+        for ref in refs:
+            batch.delete(ref)
+            deleted += 1
+            if deleted % BATCH_LIMIT == 0:
+                batch.commit()
+                batch = self.db.batch()
+        if deleted % BATCH_LIMIT:
+            batch.commit()
+        return deleted
 
-        # Reset diário
-        if data.get("last_reset") != today:
-            doc_ref.set({"count": 1, "last_reset": today})
-            return True
+    def create_or_update_my_search_history(self, identifier: str, query: str):
+        with self.batch() as writes:
+            writes.create_or_update_my_search_history(identifier, query)
+        logging.info(f"🔥 [HISTORY] '{query}' adicionado ao histórico.")
 
-        if data.get("count") >= limit:
-            return False
+    def get_my_search_history(
+        self,
+        identifier: str,
+        limit: Optional[int] = None,
+        before: Optional[datetime] = None,
+        before_id: Optional[str] = None,
+    ):
+        """
+        Busca o histórico de buscas do usuário, da mais recente para a mais antiga.
 
-        # Incrementa o contador atomicamente
-        doc_ref.update({"count": firestore.Increment(1)})
-        return True
+        Parameters
+        ----------
+        identifier : str
+            Identificador do usuário (e-mail).
+        limit : Optional[int]
+            Número máximo de entradas retornadas. Sem limite se None.
+        before : Optional[datetime]
+            Cursor: retorna apenas entradas anteriores a este instante.
+        before_id : Optional[str]
+            ID da última entrada da página anterior, que desempata as entradas
+            com o mesmo `before`.
 
-    def check_quota(self, identifier: str, limit: int) -> bool:
-        today = date.today().isoformat()
-        doc_ref = self.db.collection("usage_stats").document(identifier)
+        Returns
+        -------
+        dict or None
+            `{"queries": [...], "next_before": str | None}`, em que
+            `next_before` é o cursor da próxima página (`created_at` e ID da
+            última entrada, separados por "/"). None se o usuário não tiver
+            histórico.
 
-        doc = doc_ref.get()
-        if not doc.exists:
-            doc_ref.set({"count": 1, "last_reset": today})
-            return True
+        Notes
+        -----
+        Enquanto o usuário não for migrado por `app.tools.history_compaction`,
+        as entradas da lista `queries` do formato antigo vêm depois das da
+        subcoleção, que só passou a ser usada depois delas. Por isso, o
+        documento do usuário só é lido na página em que a subcoleção acaba.
+        """
+        ref = self._history_ref(identifier)
+        query = (
+            ref.collection(HISTORY_ENTRIES)
+            .order_by("created_at", direction=firestore.Query.DESCENDING)
+            .order_by("__name__", direction=firestore.Query.DESCENDING)
+        )
+        if before is not None:
+            cursor = {"created_at": before}
+            if before_id:
+                cursor["__name__"] = before_id
+            query = query.start_after(cursor)
+        if limit is not None:
+            query = query.limit(limit + 1)
+        entries = [(snap.id, snap.to_dict()) for snap in query.stream()]
 
-        data = doc.to_dict()
-        if data.get("last_reset") != today:
-            doc_ref.set({"count": 1, "last_reset": today})
-            return True
+        if limit is None or len(entries) <= limit:
+            doc = ref.get()
+            if not doc.exists and not entries:
+                return None
+            legacy = self.legacy_history_entries(
+                (doc.to_dict() or {}).get("queries") if doc.exists else None
+            )
+            if before is not None:
+                legacy = [entry for entry in legacy if entry["created_at"] < before]
+            legacy.sort(key=lambda entry: entry["created_at"], reverse=True)
+            entries += [(None, entry) for entry in legacy]
+
+        next_before = None
+        if limit is not None and len(entries) > limit:
+            entries = entries[:limit]
+            last_id, last = entries[-1]
+            next_before = last["created_at"].isoformat()
+            if last_id:
+                next_before = f"{next_before}/{last_id}"
+        return {
+            "queries": [
+                {"query": entry.get("query"), "timestamp": self._timestamp(entry)}
+                for _, entry in entries
+            ],
+            "next_before": next_before,
+        }
+
+    def prune_search_history(self, identifier: str, keep: Optional[int] = None) -> int:
+        """
+        Apaga as entradas mais antigas do histórico além de `keep`.
 
-        if data.get("count") >= limit:
-            return False
+        Usa o contador `count` do documento do usuário, de modo que só as
+        entradas excedentes são lidas. Retorna o número de entradas apagadas.
+        """
+        keep = self.history_retention if keep is None else keep
+        if keep is None:
+            return 0
+        ref = self._history_ref(identifier)
+        doc = ref.get()
+        count = (doc.to_dict() or {}).get("count", 0) if doc.exists else 0
+        if count <= keep:
+            return 0
 
-        doc_ref.update({"count": firestore.Increment(1)})
-        return True
+        oldest = (
+            ref.collection(HISTORY_ENTRIES)
+            .order_by("created_at")
+            .select(["__name__"])
+            .limit(count - keep)
+        )
+        deleted = self._delete_all(snap.reference for snap in oldest.stream())
+        if deleted:
+            ref.set({"count": firestore.Increment(-deleted)}, merge=True)
+        return deleted
+
+    def delete_history(self, identifier: str):
+        ref = self._history_ref(identifier)
+        self._delete_all(ref.collection(HISTORY_ENTRIES).list_documents())
+        ref.delete()
+
+
+class FirestoreBatch:
+    def __init__(self, manager: FirestoreManager):
+        """
+        Agrupa as escritas de uma requisição em um único `WriteBatch`.
+
+        As operações espelham as do `FirestoreManager` e só são enviadas em
+        `commit()`. O cache L1 é atualizado depois do commit. Funções
+        registradas com `after_commit` rodam em seguida, para que trabalhos
+        em segundo plano não gravem antes do próprio lote.
+
+        Parameters
+        ----------
+        manager : FirestoreManager
+            Gerenciador cujo cliente e cache L1 serão usados.
+
+        Notes
+        -----
+        O Firestore aceita até `BATCH_LIMIT` escritas por lote; uma requisição
+        da API gera no máximo algumas.
+        """
+        self.manager = manager
+        self._batch = manager.db.batch()
+        self._written = {}
+        self._invalidated = set()
+        self._callbacks = []
+        self._history_users = set()
+        self.size = 0
+
+    def _ref(self, collection: str, doc_id: str):
+        return self.manager.db.collection(collection).document(doc_id)
+
+    def set(self, collection: str, name: str, data: dict):
+        self.set_document(collection, self.manager.doc_id(name), data)
+
+    def set_document(self, collection: str, doc_id: str, data: dict):
+        self._batch.set(self._ref(collection, doc_id), data)
+        self._written[(collection, doc_id)] = data
+        self.size += 1
+
+    def delete_document(self, collection: str, doc_id: str):
+        self._batch.delete(self._ref(collection, doc_id))
+        self._written.pop((collection, doc_id), None)
+        self._invalidated.add((collection, doc_id))
+        self.size += 1
+
+    def merge_metadata(self, doc_name: str, data: dict):
+        self._merge("metadata", doc_name, data)
+
+    def add_to_metadata_list(self, list_name: str, item: str):
+        self.array_union("metadata", "nlp_settings", {list_name: [item]})
 
     def create_or_update_my_search_history(self, identifier: str, query: str):
-        doc_ref = self.db.collection("search_histories").document(identifier)
-        doc_ref.set(
-            {
-                "queries": firestore.ArrayUnion(
-                    [
-                        {
-                            "query": query,
-                            "timestamp": str(
-                                datetime.now()
-                            ),  # firestore.SERVER_TIMESTAMP
-                        }
-                    ]
-                )
-            },
-            merge=True,
+        self.add_history_entries(identifier, [FirestoreManager.history_entry(query)])
+
+    def add_history_entries(self, identifier: str, entries: list):
+        """Grava entradas no histórico do usuário e atualiza o contador."""
+        ref = self.manager._history_ref(identifier)
+        for entry in entries:
+            self._batch.set(ref.collection(HISTORY_ENTRIES).document(), entry)
+        self._batch.set(ref, {"count": firestore.Increment(len(entries))}, merge=True)
+        self.size += len(entries) + 1
+        self._history_users.add(identifier)
+
+    def array_union(self, collection: str, doc_id: str, fields: dict):
+        """
+        Acrescenta itens a campos de lista de um documento (`ArrayUnion`).
+
+        Usa `set(merge=True)` em vez de `update`: um documento ausente não pode
+        fazer o lote inteiro falhar.
+        """
+        self._merge(
+            collection,
+            doc_id,
+            {field: firestore.ArrayUnion(items) for field, items in fields.items()},
+        )
+
+    def increment(self, collection: str, doc_id: str, fields: dict):
+        """Soma valores a campos numéricos de um documento (`Increment`)."""
+        self._merge(
+            collection,
+            doc_id,
+            {field: firestore.Increment(value) for field, value in fields.items()},
         )
-        logging.info(f"🔥 [HISTORY] '{query}' adicionado ao histórico.")
 
-    def get_my_search_history(self, identifier: str):
-        doc_ref = self.db.collection("search_histories").document(identifier)
-        doc = doc_ref.get()
-        return doc.to_dict()
+    def _merge(self, collection: str, doc_id: str, data: dict):
+        self._batch.set(self._ref(collection, doc_id), data, merge=True)
+        self._written.pop((collection, doc_id), None)
+        self._invalidated.add((collection, doc_id))
+        self.size += 1
 
-    def delete_history(self, identifier: str):
-        doc_ref = self.db.collection("search_histories").document(identifier)
-        doc_ref.delete()
+    def after_commit(self, callback: Callable[[], None]):
+        """Registra uma função a ser chamada depois do commit."""
+        self._callbacks.append(callback)
+
+    def commit(self) -> bool:
+        """Envia as escritas pendentes. Retorna False se o commit falhar."""
+        ok = True
+        if self.size:
+            try:
+                self._batch.commit()
+            except Exception as e:
+                logging.error(f"Erro ao gravar o lote de escritas: {e}")
+                ok = False
+            for collection, doc_id in self._invalidated:
+                self.manager.l1.pop((collection, doc_id))
+            for (collection, doc_id), data in self._written.items():
+                if ok:
+                    self.manager._l1_set(collection, doc_id, data)
+                else:
+                    self.manager.l1.pop((collection, doc_id))
+            self._batch = self.manager.db.batch()
+            self._written, self._invalidated = {}, set()
+            self.size = 0
+
+            users, self._history_users = self._history_users, set()
+            if ok and self.manager.history_retention is not None:
+                for identifier in users:
+                    try:
+                        self.manager.prune_search_history(identifier)
+                    except Exception as e:
+                        logging.error(f"Erro ao aplicar a retenção do histórico: {e}")
+
+        callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+        return ok
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
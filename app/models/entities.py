@@ -150,3 +150,14 @@ class PlanetSchema(BaseModel):
     created: str
     edited: str
     url: str
+
+
+# Schema de cada tipo de entidade da SWAPI.
+ENTITY_SCHEMAS = {
+    "people": CharacterSchema,
+    "films": FilmSchema,
+    "planets": PlanetSchema,
+    "starships": StarshipSchema,
+    "vehicles": VehicleSchema,
+    "species": SpeciesSchema,
+}
@@ -0,0 +1,94 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+from app.models.swapi import HYDRATION_CONCURRENCY
+
+
+class HydrationExecutor:
+    def __init__(self, max_workers: int = HYDRATION_CONCURRENCY, window: int = 1024):
+        """
+        Executor de hidratação compartilhado por todas as requisições da instância.
+
+        Define um orçamento global de concorrência contra a SWAPI: não importa
+        quantas requisições estejam hidratando ao mesmo tempo, no máximo
+        `max_workers` buscas ficam em andamento. As tarefas excedentes esperam
+        na fila, e o tempo de espera é medido para dimensionar o pool contra o
+        rate limit da SWAPI.
+
+        Parameters
+        ----------
+        max_workers : int
+            Número máximo de buscas simultâneas.
+        window : int
+            Quantidade de tempos de espera recentes usados nas métricas.
+
+        Attributes
+        ----------
+        submitted : int
+            Número total de tarefas submetidas.
+        completed : int
+            Número total de tarefas concluídas.
+        """
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="hydration"
+        )
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=window)
+        self._queued = 0
+        self._running = 0
+        self.submitted = 0
+        self.completed = 0
+        self.max_wait = 0.0
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Agenda `fn(*args, **kwargs)` no pool compartilhado."""
+        enqueued_at = time.monotonic()
+        with self._lock:
+            self._queued += 1
+            self.submitted += 1
+
+        def run():
+            wait = time.monotonic() - enqueued_at
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._waits.append(wait)
+                self.max_wait = max(self.max_wait, wait)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self.completed += 1
+
+        return self._executor.submit(run)
+
+    def stats(self) -> dict:
+        """Retorna profundidade da fila e tempos de espera (em ms)."""
+        with self._lock:
+            waits = sorted(self._waits)
+            return {
+                "max_workers": self.max_workers,
+                "queue_depth": self._queued,
+                "running": self._running,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "avg_wait_ms": (sum(waits) / len(waits) * 1000) if waits else 0.0,
+                "p95_wait_ms": (
+                    waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000
+                    if waits
+                    else 0.0
+                ),
+                "max_wait_ms": self.max_wait * 1000,
+            }
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+# Executor único do processo, compartilhado por todos os DataService.
+hydration_executor = HydrationExecutor()
@@ -0,0 +1,216 @@
+import heapq
+from bisect import bisect_left
+from collections import Counter
+from difflib import SequenceMatcher, get_close_matches
+
+import numpy as np
+
+
+class FuzzyIndex:
+    def __init__(self, names):
+        """
+        Índice para busca aproximada de nomes, com o mesmo resultado de
+        `difflib.get_close_matches`.
+
+        `get_close_matches` compara a palavra com todos os nomes, descartando
+        cada um pelos limites `real_quick_ratio` (tamanhos) e `quick_ratio`
+        (caracteres em comum) antes de calcular o `ratio`. Aqui, os mesmos
+        limites são aplicados pelo índice, sem percorrer a lista:
+
+        1. os nomes são numerados em ordem de tamanho, e só o intervalo de
+           tamanhos que passa no `real_quick_ratio` é consultado;
+        2. um índice invertido guarda, para cada `(caractere, k)`, os nomes com
+           pelo menos `k` ocorrências do caractere. O número de chaves da
+           palavra em que um nome aparece é exatamente a interseção de
+           caracteres usada pelo `quick_ratio`, e a contagem é feita com um
+           único `Counter` sobre as listas do índice;
+        3. os candidatos que passam nos dois limites são verificados com
+           `SequenceMatcher.ratio`, como no difflib, do maior `quick_ratio`
+           para o menor, até que nenhum restante possa entrar no resultado.
+
+        Parameters
+        ----------
+        names : Iterable[str]
+            Nomes indexados (as chaves, se for um dicionário). Cada nome é
+            indexado uma vez; as repetições só são contadas, para aparecerem
+            no resultado como no difflib.
+
+        Notes
+        -----
+        Para várias palavras de uma vez, `get_close_matches_many` usa uma
+        matriz nomes x caracteres com as contagens de cada nome, e calcula os
+        dois limites de todos os nomes com operações vetorizadas do numpy.
+        """
+        self._repeats = Counter(iter(names))
+        self.names = sorted(self._repeats, key=len)
+        self._lengths = [len(name) for name in self.names]
+        self._starts = {}
+        self._postings = {}
+        for i, name in enumerate(self.names):
+            self._starts.setdefault(len(name), i)
+            for char, n in Counter(name).items():
+                for k in range(1, n + 1):
+                    self._postings.setdefault((char, k), []).append(i)
+        self._matrix = None
+
+    def __len__(self) -> int:
+        return self._repeats.total()
+
+    @staticmethod
+    def _min_common(total: int, cutoff: float) -> int:
+        """Menor interseção `t` com `2.0 * t / total >= cutoff` (como no difflib)."""
+        t = max(0, int(cutoff * total / 2) - 1)
+        while 2.0 * t / total < cutoff:
+            t += 1
+        return t
+
+    def _window(self, size: int, cutoff: float):
+        """
+        Tamanhos que passam no `real_quick_ratio`, com a interseção mínima de
+        cada um, e o intervalo `[first, end)` de nomes com esses tamanhos.
+        """
+        needed = {}
+        for length in self._starts:
+            total = length + size
+            if 2.0 * min(length, size) / total >= cutoff:
+                needed[length] = self._min_common(total, cutoff)
+        if not needed:
+            return needed, 0, 0
+        # Os tamanhos aceitos formam um intervalo, e os nomes estão numerados
+        # em ordem de tamanho.
+        last = max(needed)
+        end = min(
+            (start for length, start in self._starts.items() if length > last),
+            default=len(self.names),
+        )
+        return needed, self._starts[min(needed)], end
+
+    def candidates(self, word: str, cutoff: float) -> list:
+        """Nomes que passam em `real_quick_ratio` e `quick_ratio`."""
+        return [name for _, name in self._scored_candidates(word, cutoff)]
+
+    def _scored_candidates(self, word: str, cutoff: float) -> list:
+        """Candidatos como `(quick_ratio, nome)`."""
+        size = len(word)
+        needed, first, end = self._window(size, cutoff)
+        if not needed:
+            return []
+
+        ids = []
+        for char, n in Counter(word).items():
+            for k in range(1, n + 1):
+                posting = self._postings.get((char, k))
+                if posting:
+                    ids += posting[
+                        bisect_left(posting, first) : bisect_left(posting, end)
+                    ]
+
+        lengths = self._lengths
+        return [
+            (2.0 * common / (lengths[i] + size), self.names[i])
+            for i, common in Counter(ids).items()
+            if common >= needed[lengths[i]]
+        ]
+
+    def _build_matrix(self):
+        alphabet = {}
+        for name in self.names:
+            for char in name:
+                alphabet.setdefault(char, len(alphabet))
+        matrix = np.zeros((len(self.names), len(alphabet)), dtype=np.int32)
+        for i, name in enumerate(self.names):
+            for char, n in Counter(name).items():
+                matrix[i, alphabet[char]] = n
+        self._matrix = (alphabet, matrix, np.array(self._lengths, dtype=np.int64))
+
+    def _vector_candidates(self, word: str, cutoff: float) -> list:
+        """Mesmo resultado de `_scored_candidates`, calculado no numpy."""
+        needed, first, end = self._window(len(word), cutoff)
+        if not needed:
+            return []
+        if self._matrix is None:
+            self._build_matrix()
+        alphabet, matrix, lengths = self._matrix
+
+        counts = Counter(char for char in word if char in alphabet)
+        if not counts:
+            return []
+        columns = [alphabet[char] for char in counts]
+        common = np.minimum(
+            matrix[first:end, columns], np.array(list(counts.values()))
+        ).sum(axis=1)
+        # As mesmas contas em ponto flutuante do difflib (`_calculate_ratio`).
+        totals = lengths[first:end] + len(word)
+        quick = 2.0 * common / totals
+        passed = (quick >= cutoff) & (
+            2.0 * np.minimum(lengths[first:end], len(word)) / totals >= cutoff
+        )
+        return [
+            (float(quick[i]), self.names[first + i]) for i in np.flatnonzero(passed)
+        ]
+
+    def get_close_matches(self, word: str, n: int = 3, cutoff: float = 0.6) -> list:
+        """
+        Equivalente a `difflib.get_close_matches(word, names, n, cutoff)`,
+        inclusive no desempate (maior `ratio`, depois o maior nome).
+        """
+        if not n > 0:
+            raise ValueError("n must be > 0: %r" % (n,))
+        if not 0.0 <= cutoff <= 1.0:
+            raise ValueError("cutoff must be in [0.0, 1.0]: %r" % (cutoff,))
+        if not word or cutoff <= 0.0:
+            # Sem limite útil para o índice: todos os nomes são candidatos.
+            return get_close_matches(word, list(self._repeats.elements()), n, cutoff)
+
+        return self._rank(word, self._scored_candidates(word, cutoff), n, cutoff)
+
+    def _rank(self, word: str, scored: list, n: int, cutoff: float) -> list:
+        """
+        Os `n` maiores `(ratio, nome)` entre os candidatos.
+
+        Os candidatos são verificados em ordem decrescente de `quick_ratio`,
+        que é um limite superior do `ratio`: quando ele fica abaixo do n-ésimo
+        melhor `ratio` já encontrado, nenhum candidato restante entra no
+        resultado.
+        """
+        matcher = SequenceMatcher()
+        matcher.set_seq2(word)
+        best = []
+        for bound, name in sorted(scored, reverse=True):
+            if len(best) >= n and bound < best[0][0]:
+                break
+            matcher.set_seq1(name)
+            ratio = matcher.ratio()
+            if ratio < cutoff:
+                continue
+            for _ in range(self._repeats[name]):
+                if len(best) < n:
+                    heapq.heappush(best, (ratio, name))
+                elif (ratio, name) > best[0]:
+                    heapq.heapreplace(best, (ratio, name))
+        return [name for _, name in sorted(best, reverse=True)]
+
+    def get_close_matches_many(self, words, n: int = 3, cutoff: float = 0.6) -> list:
+        """
+        `get_close_matches` para várias palavras. Palavras repetidas são
+        calculadas uma vez, e o resultado é o mesmo de chamar
+        `get_close_matches` para cada palavra.
+        """
+        words = list(words)
+        if not self.names or not 0.0 < cutoff <= 1.0 or not n > 0:
+            return [self.get_close_matches(word, n, cutoff) for word in words]
+        results = {}
+        for word in words:
+            if word in results:
+                continue
+            if not word:
+                results[word] = self.get_close_matches(word, n, cutoff)
+            else:
+                candidates = self._vector_candidates(word, cutoff)
+                results[word] = self._rank(word, candidates, n, cutoff)
+        return [list(results[word]) for word in words]
+
+    def best_match(self, word: str, cutoff: float = 0.6):
+        """Nome mais parecido com `word` ou None."""
+        matches = self.get_close_matches(word, n=1, cutoff=cutoff)
+        return matches[0] if matches else None
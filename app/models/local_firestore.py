@@ -0,0 +1,553 @@
+import copy
+import os
+import pickle
+import secrets
+import sqlite3
+import string
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Optional
+
+from google.api_core.exceptions import Conflict, NotFound
+from google.cloud import firestore
+from google.cloud.firestore_v1 import transforms
+
+# Backends aceitos em `STORAGE_BACKEND`.
+FIRESTORE_BACKEND = "firestore"
+MEMORY_BACKEND = "memory"
+SQLITE_BACKEND = "sqlite"
+
+DEFAULT_SQLITE_PATH = "local_firestore.sqlite3"
+
+_AUTO_ID_CHARS = string.ascii_letters + string.digits
+
+
+def create_client(project_id: str = None, backend: str = None, sqlite_path: str = None):
+    """
+    Cria o cliente de armazenamento usado pelo `FirestoreManager`.
+
+    O backend é escolhido por `backend` ou pela variável `STORAGE_BACKEND`:
+    `firestore` (padrão, o Firestore de verdade), `memory` (em memória,
+    compartilhado por todo o processo) ou `sqlite` (arquivo local em
+    `sqlite_path` ou `STORAGE_SQLITE_PATH`). Os dois últimos permitem rodar e
+    medir a API inteira sem rede e sem um projeto no GCP.
+    """
+    backend = (backend or os.getenv("STORAGE_BACKEND") or FIRESTORE_BACKEND).lower()
+    if backend == FIRESTORE_BACKEND:
+        return firestore.Client(project=project_id)
+    if backend == MEMORY_BACKEND:
+        return LocalFirestoreClient(MemoryStore.shared(project_id))
+    if backend == SQLITE_BACKEND:
+        path = sqlite_path or os.getenv("STORAGE_SQLITE_PATH") or DEFAULT_SQLITE_PATH
+        return LocalFirestoreClient(SQLiteStore(path))
+    raise ValueError(f"STORAGE_BACKEND desconhecido: '{backend}'.")
+
+
+def _parent_path(path: str) -> str:
+    return path.rsplit("/", 1)[0]
+
+
+def _field(data: dict, field_path: str):
+    value = data
+    for part in field_path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            raise KeyError(field_path)
+        value = value[part]
+    return value
+
+
+def _order_value(path: str, data: dict, field_path: str):
+    # `__name__` ordena pelo ID do documento, como no Firestore.
+    if field_path == "__name__":
+        return path.rsplit("/", 1)[-1]
+    return _field(data, field_path)
+
+
+def _apply_value(current, value):
+    """Aplica um valor (ou transformação do Firestore) sobre o valor atual."""
+    if isinstance(value, transforms.ArrayUnion):
+        result = list(current) if isinstance(current, list) else []
+        result.extend(item for item in value.values if item not in result)
+        return result
+    if isinstance(value, transforms.ArrayRemove):
+        if not isinstance(current, list):
+            return []
+        return [item for item in current if item not in value.values]
+    if isinstance(value, transforms.Increment):
+        if isinstance(current, (int, float)) and not isinstance(current, bool):
+            return current + value.value
+        return value.value
+    if isinstance(value, transforms.Maximum):
+        if isinstance(current, (int, float)) and not isinstance(current, bool):
+            return max(current, value.value)
+        return value.value
+    if isinstance(value, transforms.Minimum):
+        if isinstance(current, (int, float)) and not isinstance(current, bool):
+            return min(current, value.value)
+        return value.value
+    if value is transforms.SERVER_TIMESTAMP:
+        return datetime.now(timezone.utc)
+    if isinstance(value, dict):
+        return _merge_fields({}, value, deep=False)
+    return copy.deepcopy(value)
+
+
+def _merge_fields(target: dict, data: dict, deep: bool) -> dict:
+    """
+    Aplica `data` sobre `target`.
+
+    Com `deep=True` (semântica de `set(merge=True)`), mapas aninhados são
+    mesclados campo a campo em vez de substituídos.
+    """
+    for key, value in data.items():
+        if value is transforms.DELETE_FIELD:
+            target.pop(key, None)
+        elif deep and isinstance(value, dict):
+            current = target.get(key)
+            target[key] = _merge_fields(
+                dict(current) if isinstance(current, dict) else {}, value, deep=True
+            )
+        else:
+            target[key] = _apply_value(target.get(key), value)
+    return target
+
+
+def _update_fields(target: dict, data: dict) -> dict:
+    """Aplica `data` com a semântica de `update`: chaves com `.` são caminhos."""
+    for key, value in data.items():
+        *parents, leaf = key.split(".")
+        node = target
+        for part in parents:
+            child = node.get(part)
+            if not isinstance(child, dict):
+                child = node[part] = {}
+            node = child
+        _merge_fields(node, {leaf: value}, deep=False)
+    return target
+
+
+def apply_write(current: Optional[dict], op: str, path: str, data, merge: bool):
+    """Calcula o novo conteúdo de um documento após uma escrita."""
+    if op == "delete":
+        return None
+    if op == "create" and current is not None:
+        raise Conflict(f"Documento já existe: {path}")
+    if op == "update":
+        if current is None:
+            raise NotFound(f"Documento não encontrado: {path}")
+        return _update_fields(current, data)
+    base = current if merge and current is not None else {}
+    return _merge_fields(base, data, deep=merge)
+
+
+class MemoryStore:
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self):
+        """
+        Armazenamento em memória dos documentos, agrupados por coleção.
+
+        Os documentos ficam serializados, de modo que quem lê nunca recebe
+        uma referência ao dado guardado (como acontece com o Firestore).
+        """
+        self._docs = {}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def shared(cls, name: str = None) -> "MemoryStore":
+        """Retorna o armazenamento compartilhado pelo processo para `name`."""
+        with cls._shared_lock:
+            return cls._shared.setdefault(name, cls())
+
+    def read(self, path: str) -> Optional[dict]:
+        blob = self._docs.get(_parent_path(path), {}).get(path)
+        return pickle.loads(blob) if blob is not None else None
+
+    def children(self, parent: str) -> list:
+        with self._lock:
+            items = sorted(self._docs.get(parent, {}).items())
+        return [(path, pickle.loads(blob)) for path, blob in items]
+
+    def commit(self, ops: list):
+        with self._lock:
+            updates = {}
+            for op, path, data, merge in ops:
+                current = updates[path] if path in updates else self.read(path)
+                updates[path] = apply_write(current, op, path, data, merge)
+            for path, doc in updates.items():
+                siblings = self._docs.setdefault(_parent_path(path), {})
+                if doc is None:
+                    siblings.pop(path, None)
+                else:
+                    siblings[path] = pickle.dumps(doc, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def clear(self):
+        with self._lock:
+            self._docs.clear()
+
+
+class SQLiteStore:
+    def __init__(self, path):
+        """
+        Armazenamento dos documentos em um arquivo SQLite.
+
+        Cada documento é uma linha `(path, parent, data)`, com `data`
+        serializado. As escritas de um lote são aplicadas em uma única
+        transação.
+        """
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            str(self.path), check_same_thread=False, isolation_level=None
+        )
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                "path TEXT PRIMARY KEY, parent TEXT NOT NULL, data BLOB NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS documents_parent ON documents (parent)"
+            )
+
+    def read(self, path: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM documents WHERE path = ?", (path,)
+            ).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def children(self, parent: str) -> list:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, data FROM documents WHERE parent = ? ORDER BY path",
+                (parent,),
+            ).fetchall()
+        return [(path, pickle.loads(blob)) for path, blob in rows]
+
+    def commit(self, ops: list):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                updates = {}
+                for op, path, data, merge in ops:
+                    current = updates[path] if path in updates else self.read(path)
+                    updates[path] = apply_write(current, op, path, data, merge)
+                for path, doc in updates.items():
+                    if doc is None:
+                        self._conn.execute(
+                            "DELETE FROM documents WHERE path = ?", (path,)
+                        )
+                    else:
+                        self._conn.execute(
+                            "INSERT OR REPLACE INTO documents VALUES (?, ?, ?)",
+                            (
+                                path,
+                                _parent_path(path),
+                                pickle.dumps(doc, protocol=pickle.HIGHEST_PROTOCOL),
+                            ),
+                        )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class DocumentSnapshot:
+    def __init__(self, reference: "DocumentReference", data: Optional[dict]):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self) -> Optional[dict]:
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field_path: str):
+        return copy.deepcopy(_field(self._data or {}, field_path))
+
+
+class DocumentReference:
+    def __init__(self, client: "LocalFirestoreClient", path: str):
+        self._client = client
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    @property
+    def parent(self) -> "CollectionReference":
+        return CollectionReference(self._client, _parent_path(self.path))
+
+    def collection(self, name: str) -> "CollectionReference":
+        return CollectionReference(self._client, f"{self.path}/{name}")
+
+    def get(self, field_paths=None, transaction=None) -> DocumentSnapshot:
+        return DocumentSnapshot(self, self._client.store.read(self.path))
+
+    def set(self, document_data: dict, merge: bool = False):
+        self._client.store.commit([("set", self.path, document_data, merge)])
+
+    def create(self, document_data: dict):
+        self._client.store.commit([("create", self.path, document_data, False)])
+
+    def update(self, field_updates: dict):
+        self._client.store.commit([("update", self.path, field_updates, False)])
+
+    def delete(self):
+        self._client.store.commit([("delete", self.path, None, False)])
+
+    def __eq__(self, other):
+        return isinstance(other, DocumentReference) and other.path == self.path
+
+    def __hash__(self):
+        return hash(self.path)
+
+
+_OPERATORS = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "in": lambda a, b: a in b,
+    "not-in": lambda a, b: a not in b,
+    "array_contains": lambda a, b: isinstance(a, list) and b in a,
+    "array_contains_any": lambda a, b: isinstance(a, list) and any(x in a for x in b),
+}
+
+
+class Query:
+    ASCENDING = firestore.Query.ASCENDING
+    DESCENDING = firestore.Query.DESCENDING
+
+    def __init__(self, collection: "CollectionReference", **state):
+        self._collection = collection
+        self._filters = state.get("filters", ())
+        self._orders = state.get("orders", ())
+        self._limit = state.get("limit")
+        self._offset = state.get("offset", 0)
+        self._start = state.get("start")
+        self._projection = state.get("projection")
+
+    def _copy(self, **changes) -> "Query":
+        state = {
+            "filters": self._filters,
+            "orders": self._orders,
+            "limit": self._limit,
+            "offset": self._offset,
+            "start": self._start,
+            "projection": self._projection,
+        }
+        state.update(changes)
+        return Query(self._collection, **state)
+
+    def where(self, field_path=None, op_string=None, value=None, *, filter=None):
+        if filter is not None:
+            field_path, op_string, value = (
+                filter.field_path,
+                filter.op_string,
+                filter.value,
+            )
+        return self._copy(filters=self._filters + ((field_path, op_string, value),))
+
+    def order_by(self, field_path: str, direction: str = ASCENDING) -> "Query":
+        return self._copy(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count: int) -> "Query":
+        return self._copy(limit=count)
+
+    def offset(self, num_to_skip: int) -> "Query":
+        return self._copy(offset=num_to_skip)
+
+    def select(self, field_paths: Iterable[str]) -> "Query":
+        return self._copy(projection=list(field_paths))
+
+    def _cursor(self, document_fields_or_snapshot, inclusive: bool) -> "Query":
+        cursor = document_fields_or_snapshot
+        if isinstance(cursor, DocumentSnapshot):
+            cursor = {**cursor.to_dict(), "__name__": cursor.id}
+        if isinstance(cursor, dict):
+            # Como no Firestore, o cursor pode ter só os primeiros campos da
+            # ordenação.
+            values = tuple(
+                _field(cursor, field) for field, _ in self._orders[: len(cursor)]
+            )
+            values = tuple(
+                value.id if isinstance(value, DocumentReference) else value
+                for value in values
+            )
+        else:
+            values = tuple(cursor)
+        return self._copy(start=(values, inclusive))
+
+    def start_after(self, document_fields_or_snapshot) -> "Query":
+        return self._cursor(document_fields_or_snapshot, inclusive=False)
+
+    def start_at(self, document_fields_or_snapshot) -> "Query":
+        return self._cursor(document_fields_or_snapshot, inclusive=True)
+
+    def _sort_key(self, values: tuple) -> tuple:
+        return tuple(
+            _Reversed(value) if direction == self.DESCENDING else value
+            for value, (_, direction) in zip(values, self._orders)
+        )
+
+    def stream(self, transaction=None):
+        client = self._collection._client
+        rows = []
+        for path, data in client.store.children(self._collection.path):
+            try:
+                if not all(
+                    _OPERATORS[op](_field(data, field), value)
+                    for field, op, value in self._filters
+                ):
+                    continue
+                values = tuple(
+                    _order_value(path, data, field) for field, _ in self._orders
+                )
+            except (KeyError, TypeError):
+                # Como no Firestore, documentos sem o campo ficam de fora.
+                continue
+            rows.append((self._sort_key(values), path, data))
+
+        rows.sort(key=lambda row: (row[0], row[1]))
+        if self._start is not None:
+            start = self._sort_key(self._start[0])
+            inclusive = self._start[1]
+            rows = [
+                row
+                for row in rows
+                if row[0][: len(start)] > start
+                or (inclusive and row[0][: len(start)] == start)
+            ]
+        rows = rows[self._offset :]
+        if self._limit is not None:
+            rows = rows[: self._limit]
+
+        for _, path, data in rows:
+            if self._projection is not None:
+                data = {
+                    key: value for key, value in data.items() if key in self._projection
+                }
+            yield DocumentSnapshot(DocumentReference(client, path), data)
+
+    def get(self, transaction=None) -> list:
+        return list(self.stream())
+
+
+class _Reversed:
+    """Inverte a comparação de um valor, para ordenação decrescente."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __gt__(self, other):
+        return other.value > self.value
+
+    def __eq__(self, other):
+        return other.value == self.value
+
+
+class CollectionReference(Query):
+    def __init__(self, client: "LocalFirestoreClient", path: str):
+        self._client = client
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+        super().__init__(self)
+
+    @property
+    def parent(self) -> Optional[DocumentReference]:
+        if "/" not in self.path:
+            return None
+        return DocumentReference(self._client, _parent_path(self.path))
+
+    def document(self, document_id: str = None) -> DocumentReference:
+        if document_id is None:
+            document_id = "".join(secrets.choice(_AUTO_ID_CHARS) for _ in range(20))
+        return DocumentReference(self._client, f"{self.path}/{document_id}")
+
+    def add(self, document_data: dict, document_id: str = None):
+        ref = self.document(document_id)
+        ref.create(document_data)
+        return None, ref
+
+    def list_documents(self, page_size: int = None) -> list:
+        return [
+            DocumentReference(self._client, path)
+            for path, _ in self._client.store.children(self.path)
+        ]
+
+
+class WriteBatch:
+    def __init__(self, client: "LocalFirestoreClient"):
+        self._client = client
+        self._ops = []
+
+    def set(self, reference: DocumentReference, document_data: dict, merge=False):
+        self._ops.append(("set", reference.path, document_data, merge))
+
+    def create(self, reference: DocumentReference, document_data: dict):
+        self._ops.append(("create", reference.path, document_data, False))
+
+    def update(self, reference: DocumentReference, field_updates: dict):
+        self._ops.append(("update", reference.path, field_updates, False))
+
+    def delete(self, reference: DocumentReference):
+        self._ops.append(("delete", reference.path, None, False))
+
+    def commit(self) -> list:
+        ops, self._ops = self._ops, []
+        self._client.store.commit(ops)
+        return []
+
+    def __len__(self):
+        return len(self._ops)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+
+
+class LocalFirestoreClient:
+    def __init__(self, store=None):
+        """
+        Cliente local com o mesmo subconjunto da API do `firestore.Client`
+        usado pela aplicação: coleções e subcoleções, documentos, lotes,
+        `get_all`, consultas (`where`, `order_by`, `limit`, `start_after`,
+        `select`) e as transformações `ArrayUnion`, `ArrayRemove`,
+        `Increment`, `DELETE_FIELD` e `SERVER_TIMESTAMP`.
+
+        Parameters
+        ----------
+        store : MemoryStore or SQLiteStore
+            Onde os documentos ficam guardados. Se omitido, um `MemoryStore`
+            novo e exclusivo deste cliente.
+        """
+        self.store = store if store is not None else MemoryStore()
+
+    def collection(self, collection_id: str) -> CollectionReference:
+        return CollectionReference(self, collection_id)
+
+    def document(self, document_path: str) -> DocumentReference:
+        return DocumentReference(self, document_path)
+
+    def batch(self) -> WriteBatch:
+        return WriteBatch(self)
+
+    def get_all(self, references: Iterable[DocumentReference], field_paths=None):
+        for reference in references:
+            yield reference.get()
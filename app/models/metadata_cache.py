@@ -0,0 +1,191 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+
+NLP_SETTINGS_DOC = "nlp_settings"
+
+KNOWN_LISTS = (
+    "known_films",
+    "known_people",
+    "known_planets",
+    "known_starships",
+    "known_species",
+    "known_vehicles",
+)
+
+
+class MetadataCache:
+    def __init__(
+        self, db_manager, doc_name: str = NLP_SETTINGS_DOC, poll_interval: float = 60.0
+    ):
+        """
+        Cópia em memória de um documento de metadados, compartilhada pela
+        instância (endpoint `/metadata` e `NLPService`).
+
+        O documento é lido uma única vez. Depois disso, é mantido atualizado
+        de duas formas: nomes aprendidos por esta instância entram na hora
+        (`learn`), e alterações feitas por outras instâncias chegam por um
+        listener do Firestore (`listen`) ou, sem ele, por uma releitura em
+        segundo plano a cada `poll_interval` segundos. `version` só muda
+        quando o conteúdo muda, e quem depende do documento (ex: os índices
+        do NLP) só se reconstrói nesse caso.
+
+        Parameters
+        ----------
+        db_manager : app.models.database.FirestoreManager
+            Gerenciador de banco de dados do Firebase.
+        doc_name : str
+            Documento da coleção `metadata`.
+        poll_interval : float
+            Intervalo, em segundos, entre as releituras do documento.
+
+        Attributes
+        ----------
+        version : int
+            Número da versão atual do documento em memória.
+        etag : str
+            ETag HTTP do conteúdo atual.
+        reloads : int
+            Número de leituras do documento no Firestore.
+        """
+        self.db = db_manager
+        self.doc_name = doc_name
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._config = None
+        self._known = None
+        self._checked_at = 0.0
+        self._refreshing = False
+        self._watch = None
+        self._learned = {}
+        self.version = 0
+        self.etag = None
+        self.reloads = 0
+
+    @staticmethod
+    def _digest(config: dict) -> str:
+        payload = json.dumps(config, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+    def _apply(self, config: dict):
+        """Substitui o conteúdo em memória se ele tiver mudado."""
+        config = self._with_learned(config)
+        etag = f'"{self._digest(config)}"'
+        with self._lock:
+            self._checked_at = time.monotonic()
+            if etag == self.etag:
+                return
+            self._config = config
+            self._known = None
+            self.etag = etag
+            self.version += 1
+
+    def _with_learned(self, config: dict) -> dict:
+        """
+        Mantém os nomes aprendidos localmente que ainda não chegaram ao
+        Firestore (a gravação da lista é feita fora do caminho da resposta).
+        """
+        with self._lock:
+            for list_name, items in list(self._learned.items()):
+                stored = config.get(list_name, [])
+                items -= set(stored)
+                if not items:
+                    del self._learned[list_name]
+                    continue
+                config = {**config, list_name: [*stored, *sorted(items)]}
+        return config
+
+    def _read(self) -> dict:
+        self.reloads += 1
+        return self.db.get_metadata(self.doc_name) or {}
+
+    def get(self) -> dict:
+        """
+        Retorna o documento em memória.
+
+        O dicionário retornado não deve ser alterado; use `learn`.
+        """
+        if self._config is None:
+            self._apply(self._read())
+        elif (
+            self._watch is None
+            and time.monotonic() - self._checked_at > self.poll_interval
+        ):
+            self._refresh_in_background()
+        return self._config
+
+    def snapshot(self) -> tuple:
+        """Retorna `(version, documento)` de forma consistente."""
+        self.get()
+        with self._lock:
+            return self.version, self._config
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def refresh():
+            try:
+                self._apply(self._read())
+            except Exception as e:
+                logging.error(f"Erro ao atualizar os metadados: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def refresh(self):
+        """Relê o documento no Firestore imediatamente."""
+        self._apply(self._read())
+
+    def listen(self) -> bool:
+        """
+        Passa a receber as alterações por um listener do Firestore, em vez de
+        releituras periódicas. Retorna False se o backend não oferecer
+        listeners.
+        """
+        watch = self.db.watch_metadata(
+            self.doc_name, lambda config: self._apply(config or {})
+        )
+        self._watch = watch
+        return watch is not None
+
+    def close(self):
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+
+    def learn(self, list_name: str, item: str):
+        """
+        Acrescenta em memória um nome aprendido por esta instância.
+
+        Se o documento ainda não foi carregado, o nome só é registrado e entra
+        na primeira leitura.
+        """
+        with self._lock:
+            config = self._config
+            if config is not None and item in config.get(list_name, []):
+                return
+            self._learned.setdefault(list_name, set()).add(item)
+        if config is not None:
+            self._apply(config)
+
+    def known_entities(self) -> dict:
+        """Retorna as listas `known_*`, com todas as categorias presentes."""
+        config = self.get()
+        with self._lock:
+            if self._known is None:
+                self._known = {
+                    **{key: [] for key in KNOWN_LISTS},
+                    **{
+                        key: value
+                        for key, value in config.items()
+                        if key.startswith("known_")
+                    },
+                }
+            return self._known
@@ -0,0 +1,140 @@
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Optional
+
+from app.models.snapshot import swapi_url_key
+
+NAME_INDEX_DOC = "url_names"
+
+
+class UrlNameIndex:
+    def __init__(self, db_manager=None, path: Optional[str] = None):
+        """
+        Índice pré-computado URL da SWAPI -> nome de exibição.
+
+        Permite hidratar campos relacionais sem buscar cada entidade completa
+        apenas para ler o seu `name`/`title`. O índice é carregado uma única
+        vez por instância, de um arquivo local (se `path` for informado) ou do
+        documento `metadata/url_names` do Firestore, e aprende novas URLs
+        conforme as buscas ao vivo as descobrem.
+
+        O formato armazenado é `{recurso: {id: nome}}`.
+
+        Parameters
+        ----------
+        db_manager : app.models.database.FirestoreManager
+            Gerenciador de banco de dados do Firebase, usado para carregar e
+            persistir o índice.
+        path : Optional[str]
+            Arquivo JSON local com o índice. Tem prioridade sobre o Firestore.
+
+        Attributes
+        ----------
+        hits : int
+            Número de URLs resolvidas pelo índice.
+        misses : int
+            Número de URLs desconhecidas pelo índice.
+        """
+        self.db = db_manager
+        self.path = path
+        self._names: dict[str, dict[str, str]] = {}
+        self._pending: dict[str, dict[str, str]] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_snapshot(cls, snapshot, db_manager=None) -> "UrlNameIndex":
+        """Monta o índice a partir de um `SWAPISnapshot` completo."""
+        index = cls(db_manager)
+        for records in snapshot.resources.values():
+            for record in records:
+                index._add(
+                    record.get("url", ""), record.get("name") or record.get("title")
+                )
+        index._loaded = True
+        return index
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            try:
+                if self.path:
+                    names = json.loads(Path(self.path).read_text(encoding="utf-8"))
+                elif self.db is not None:
+                    names = self.db.get_metadata(NAME_INDEX_DOC).get("names", {})
+                else:
+                    names = {}
+            except Exception as e:
+                logging.error(f"Erro ao carregar o índice de nomes: {e}")
+                names = {}
+            for resource, ids in names.items():
+                self._names.setdefault(resource, {}).update(ids)
+            self._loaded = True
+
+    def _add(self, url: str, name: Optional[str]) -> bool:
+        key = swapi_url_key(url)
+        if not key or not name:
+            return False
+        resource, entity_id = key
+        names = self._names.setdefault(resource, {})
+        if names.get(entity_id) == name:
+            return False
+        names[entity_id] = name
+        return True
+
+    def get(self, url: str) -> Optional[str]:
+        """Retorna o nome associado à URL ou None se ela for desconhecida."""
+        self._ensure_loaded()
+        key = swapi_url_key(url)
+        name = self._names.get(key[0], {}).get(key[1]) if key else None
+        if name is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return name
+
+    def learn(self, url: str, name: Optional[str]):
+        """Registra uma URL descoberta por uma busca ao vivo."""
+        self._ensure_loaded()
+        with self._lock:
+            if self._add(url, name):
+                resource, entity_id = swapi_url_key(url)
+                self._pending.setdefault(resource, {})[entity_id] = name
+
+    def flush(self, writes=None):
+        """
+        Persiste no Firestore as URLs aprendidas desde o último flush.
+
+        Se `writes` (um `FirestoreBatch`) for informado, a escrita entra no lote.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending or self.db is None:
+            return
+        try:
+            (writes or self.db).merge_metadata(NAME_INDEX_DOC, {"names": pending})
+        except Exception as e:
+            logging.error(f"Erro ao persistir o índice de nomes: {e}")
+
+    def to_dict(self) -> dict:
+        self._ensure_loaded()
+        return {resource: dict(ids) for resource, ids in self._names.items()}
+
+    def save(self, path) -> Path:
+        """Grava o índice em um arquivo JSON local."""
+        path = Path(path)
+        path.write_text(
+            json.dumps(self.to_dict(), ensure_ascii=False, separators=(",", ":")),
+            encoding="utf-8",
+        )
+        return path
+
+    def __len__(self) -> int:
+        return sum(len(ids) for ids in self._names.values())
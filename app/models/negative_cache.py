@@ -0,0 +1,140 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+from app.models.cache import TTLCache
+
+NEGATIVE_CACHE_COLLECTION = "negative_cache"
+
+# Tempo, em segundos, que uma consulta sem documento fica lembrada em memória.
+PRIME_TTL = 5.0
+
+
+class NegativeCache:
+    def __init__(
+        self,
+        db_manager=None,
+        ttl: float = 600.0,
+        max_size: int = 4096,
+        collection: str = NEGATIVE_CACHE_COLLECTION,
+    ):
+        """
+        Cache de buscas sem resultado na SWAPI, por `(entity_type, nome)`.
+
+        Evita que erros de digitação e consultas sem sentido repetidas gerem
+        tráfego para a SWAPI. Possui duas camadas: um `TTLCache` em memória e,
+        se `db_manager` for informado, uma coleção no Firestore compartilhada
+        entre as instâncias. O campo `expires_at` dos documentos pode ser
+        usado em uma política de TTL do Firestore.
+
+        Parameters
+        ----------
+        db_manager : app.models.database.FirestoreManager
+            Gerenciador de banco de dados do Firebase.
+        ttl : float
+            Tempo, em segundos, durante o qual uma busca fica marcada como vazia.
+        max_size : int
+            Número máximo de entradas em memória.
+        collection : str
+            Coleção do Firestore usada pela segunda camada.
+        """
+        self.db = db_manager
+        self.ttl = ttl
+        self.collection = collection
+        self.local = TTLCache(max_size=max_size, ttl=ttl)
+
+    @staticmethod
+    def _key(entity_type: str, name: str) -> str:
+        normalized = "_".join((name or "").lower().split()).replace("/", "_")
+        return f"{entity_type}__{normalized}"
+
+    def ref(self, entity_type: str, name: str) -> tuple:
+        """Retorna o par `(coleção, ID)` do documento da busca no Firestore."""
+        return self.collection, self._key(entity_type, name)
+
+    def cached(self, entity_type: str, name: str):
+        """Retorna o estado da busca na camada em memória (None se desconhecido)."""
+        return self.local.get(self._key(entity_type, name))
+
+    def prime(self, entity_type: str, name: str, doc):
+        """
+        Registra em memória o documento lido antecipadamente do Firestore.
+
+        Usado quando o documento é buscado junto com outros (`get_many`), para
+        que o `is_missing` seguinte não precise consultar o Firestore de novo.
+        Uma busca sem documento fica marcada como não vazia por `PRIME_TTL`
+        segundos apenas.
+        """
+        self._remember(self._key(entity_type, name), doc)
+
+    def _remember(self, key: str, doc) -> bool:
+        remaining = 0.0
+        if doc:
+            remaining = (doc["expires_at"] - datetime.now(timezone.utc)).total_seconds()
+        if remaining <= 0:
+            self.local.set(key, False, ttl=PRIME_TTL)
+            return False
+        self.local.set(key, True, ttl=remaining)
+        return True
+
+    def is_missing(self, entity_type: str, name: str) -> bool:
+        """Retorna True se a busca foi registrada como vazia e ainda não expirou."""
+        key = self._key(entity_type, name)
+        cached = self.local.get(key)
+        if cached is not None:
+            return cached
+        if self.db is None:
+            return False
+
+        try:
+            doc = self.db.get_document(self.collection, key)
+        except Exception as e:
+            logging.error(f"Erro ao consultar o cache negativo: {e}")
+            return False
+        return self._remember(key, doc)
+
+    def record_miss(self, entity_type: str, name: str, writes=None):
+        """
+        Registra que a busca não encontrou resultados na SWAPI.
+
+        Parameters
+        ----------
+        entity_type : str
+            Tipo da entidade buscada.
+        name : str
+            Nome buscado.
+        writes : app.models.database.FirestoreBatch or WriteBehindQueue
+            Onde a escrita no Firestore é agrupada. Se None, ela é feita na
+            hora.
+        """
+        key = self._key(entity_type, name)
+        self.local.set(key, True)
+        if self.db is None:
+            return
+        try:
+            (writes or self.db).set_document(
+                self.collection,
+                key,
+                {
+                    "entity_type": entity_type,
+                    "name": name,
+                    "expires_at": datetime.now(timezone.utc)
+                    + timedelta(seconds=self.ttl),
+                },
+            )
+        except Exception as e:
+            logging.error(f"Erro ao gravar no cache negativo: {e}")
+
+    def invalidate(self, entity_type: str, name: str, writes=None):
+        """
+        Remove a marcação de busca vazia, nas duas camadas.
+
+        `writes` tem o mesmo papel que em `record_miss`.
+        """
+        key = self._key(entity_type, name)
+        self.local.pop(key)
+        if self.db is None:
+            return
+        try:
+            (writes or self.db).delete_document(self.collection, key)
+        except Exception as e:
+            logging.error(f"Erro ao invalidar o cache negativo: {e}")
@@ -0,0 +1,79 @@
+"""
+Dados do NLP distribuídos com o código: listas de stop words (PT/EN, as
+mesmas do corpus `stopwords` do NLTK) e o tokenizador.
+
+Nada aqui acessa a rede. As listas são lidas sob demanda, por `mmap`, na
+primeira vez em que são usadas. O NLTK só é usado como alternativa para um
+idioma sem lista distribuída e, nesse caso, precisa estar instalado.
+"""
+
+import logging
+import mmap
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+
+STOP_WORDS_DIR = Path(__file__).resolve().parent / "stopwords"
+
+NLTK_DATA_PATH = os.path.join("/tmp", "nltk_data")
+
+# Palavras, incluindo as compostas por hífen ou apóstrofo ("r2-d2",
+# "contra-ataca", "don't").
+TOKEN_PATTERN = re.compile(r"\w+(?:[-'’]\w+)*")
+
+
+def word_tokenize(text: str) -> list:
+    """Divide `text` em palavras, descartando a pontuação."""
+    return TOKEN_PATTERN.findall(text)
+
+
+@lru_cache(maxsize=None)
+def stop_words(language: str) -> frozenset:
+    """
+    Stop words de um idioma ("portuguese", "english").
+
+    Parameters
+    ----------
+    language : str
+        Nome do idioma, como no corpus `stopwords` do NLTK.
+
+    Returns
+    -------
+    frozenset
+        Conjunto de stop words. Vazio se o idioma não tiver lista distribuída
+        e o NLTK não estiver disponível.
+    """
+    path = STOP_WORDS_DIR / language
+    try:
+        with (
+            open(path, "rb") as file,
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data,
+        ):
+            return frozenset(data[:].decode("utf-8").split())
+    except (OSError, ValueError):
+        return _nltk_stop_words(language)
+
+
+def _nltk_stop_words(language: str) -> frozenset:
+    """Lista do corpus `stopwords` do NLTK, baixado se necessário."""
+    try:
+        import nltk
+        from nltk.corpus import stopwords
+    except ImportError:
+        logging.warning(f"⚠️ Sem stop words para '{language}': NLTK não instalado.")
+        return frozenset()
+
+    if NLTK_DATA_PATH not in nltk.data.path:
+        nltk.data.path.append(NLTK_DATA_PATH)
+    try:
+        return frozenset(stopwords.words(language))
+    except LookupError:
+        pass
+    try:
+        os.makedirs(NLTK_DATA_PATH, exist_ok=True)
+        nltk.download("stopwords", download_dir=NLTK_DATA_PATH, quiet=True)
+        return frozenset(stopwords.words(language))
+    except Exception as e:
+        logging.warning(f"⚠️ Sem stop words para '{language}': {e}")
+        return frozenset()
@@ -1,13 +1,133 @@
-import os
-from difflib import get_close_matches
+from types import MappingProxyType
 
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
+from app.models.cache import TTLCache
+from app.models.entities import ENTITY_SCHEMAS
+from app.models.fuzzy_index import FuzzyIndex
+from app.models.metadata_cache import MetadataCache
+from app.models.nlp_data import stop_words, word_tokenize
+from app.models.phrase_matcher import PhraseMatcher, normalize, tokenize
+
+# Ordem de prioridade quando um nome aparece em mais de uma lista `known_*`.
+CATEGORY_PRIORITY = ("planets", "starships", "vehicles", "species", "films", "people")
+
+# Ordem dos tipos sondados quando um campo existe em mais de um schema:
+# `people`, o padrão anterior, primeiro.
+PROBE_ORDER = ("people", "films", "planets", "starships", "vehicles", "species")
+
+# Tipos sondados quando nada indica o tipo de um nome desconhecido, se
+# `nlp_settings` não definir `default_probe_types`.
+DEFAULT_PROBE_TYPES = ("people",)
+
+# Um campo presente em mais schemas do que isso (ex: `name`, `films`) não
+# indica o tipo, e os tipos padrão são usados.
+MAX_PROBE_TYPES = 2
+
+# Campo -> tipos cujo schema tem o campo, na ordem de `PROBE_ORDER`.
+FIELD_TYPES = MappingProxyType(
+    {
+        field: tuple(t for t in PROBE_ORDER if field in ENTITY_SCHEMAS[t].model_fields)
+        for schema in ENTITY_SCHEMAS.values()
+        for field in schema.model_fields
+    }
+)
+
+ENTITY_CUTOFF = 0.7
+INTENT_CUTOFF = 0.9
+
+PARSE_CACHE_SIZE = 4096
+PARSE_CACHE_TTL = 24 * 3600
+
+
+class NLPLookup:
+    __slots__ = (
+        "version",
+        "config",
+        "intents",
+        "intent_index",
+        "intent_types",
+        "default_types",
+        "translations",
+        "known_entities",
+        "entity_index",
+        "name_category",
+        "phrases",
+    )
+
+    def __init__(self, config: dict, version=None):
+        """
+        Estruturas de busca do NLP compiladas a partir de uma versão de
+        `nlp_settings`.
+
+        Uma instância não muda depois de criada: o `NLPService` troca a
+        instância inteira quando a configuração muda, de modo que uma chamada
+        a `parse_sentence` sempre usa estruturas da mesma versão.
+
+        Attributes
+        ----------
+        intents : Mapping[str, str]
+            Palavra-chave -> filtro.
+        intent_index : app.models.fuzzy_index.FuzzyIndex
+            Índice de busca aproximada sobre as palavras-chave.
+        intent_types : Mapping[str, str]
+            Filtro -> tipo de entidade (`intent_to_type_map`).
+        default_types : tuple[str, ...]
+            Tipos sondados quando nada indica o tipo de um nome desconhecido
+            (`default_probe_types`, ou `DEFAULT_PROBE_TYPES`).
+        translations : Mapping[str, str]
+            Título em português -> título na SWAPI.
+        known_entities : tuple[str, ...]
+            Nomes conhecidos, usados na correção de digitação.
+        entity_index : app.models.fuzzy_index.FuzzyIndex
+            Índice de busca aproximada sobre `known_entities`.
+        name_category : Mapping[str, str]
+            Nome -> tipo de entidade, respeitando `CATEGORY_PRIORITY`.
+        phrases : app.models.phrase_matcher.PhraseMatcher
+            Palavras-chave das intenções e nomes conhecidos, para a busca de
+            frases de uma ou mais palavras. Uma palavra-chave tem prioridade
+            sobre um nome com os mesmos tokens.
+        """
+        self.version = version
+        self.config = config
+        self.intents = MappingProxyType(dict(config.get("intents", {})))
+        self.intent_index = FuzzyIndex(self.intents)
+        self.intent_types = MappingProxyType(dict(config.get("intent_to_type_map", {})))
+        self.default_types = (
+            tuple(
+                t for t in config.get("default_probe_types", ()) if t in ENTITY_SCHEMAS
+            )
+            or DEFAULT_PROBE_TYPES
+        )
+        self.translations = MappingProxyType(dict(config.get("translations", {})))
+
+        self.known_entities = tuple(
+            config.get("known_films", [])
+            + config.get("known_people", [])
+            + config.get("known_planets", [])
+            + config.get("known_starships", [])
+            + config.get("known_species", [])
+            + list(self.translations)
+        )
+        self.entity_index = FuzzyIndex(self.known_entities)
+
+        name_category = {}
+        for category in CATEGORY_PRIORITY:
+            names = config.get(f"known_{category}", [])
+            if category == "films":
+                names = [*names, *self.translations]
+            for name in names:
+                name_category.setdefault(name, category)
+        self.name_category = MappingProxyType(name_category)
+
+        self.phrases = PhraseMatcher()
+        for name in self.known_entities:
+            self.phrases.add(name, "entity", replace=False)
+        for phrase, intent in self.intents.items():
+            self.phrases.add(phrase, "intent", intent)
+        self.phrases.build()
 
 
 class NLPService:
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, metadata_cache=None, parse_cache=None):
         """
         Inicializa o serviço de NLP.
 
@@ -15,52 +135,42 @@ class NLPService:
         ----------
         db_manager : app.models.database.FirestoreManager
             Gerenciador de banco de dados do Firebase.
+        metadata_cache : app.models.metadata_cache.MetadataCache
+            Cópia em memória de `metadata/nlp_settings`. As estruturas de
+            busca (`NLPLookup`) são recompiladas quando a versão dela muda.
+            Se omitida, uma própria é criada.
+        parse_cache : app.models.cache.TTLCache
+            Cache LRU dos resultados de `parse_sentence`, por consulta
+            normalizada (`query_key`). Se omitido, um de `PARSE_CACHE_SIZE`
+            entradas é criado.
 
         Attributes
         -------
         db : app.models.database.FirestoreManager
             Gerenciador de banco de dados do Firebase.
-        nltk_path : str
-            Caminho para o diretório de dados do NLTK.
-        config : dict
-            Configura es do servi o de NLP.
-        intent_map : dict
-            Mapa de inten es para palavras-chave.
-        movie_translation : dict
-            Mapa de tradu es de filmes.
-        known_entities : list
-            Lista de entidades conhecidas.
-        stop_words : set
-            Conjunto de palavras que devem ser ignoradas pt/br.
+        lookup : NLPLookup
+            Estruturas de busca da versão atual de `nlp_settings`.
+        stop_words : frozenset
+            Conjunto de palavras que devem ser ignoradas pt/br, distribuído em
+            `app.models.nlp_data`.
         ruido_extra : set
             Conjunto de palavras ruidosas extras.
+        ignored_words : frozenset
+            União de `stop_words` e `ruido_extra`.
+        parse_cache : app.models.cache.TTLCache
+            Resultados de `parse_sentence` da versão atual de `nlp_settings`.
         """
         self.db = db_manager
-        self.nltk_path = os.path.join("/tmp", "nltk_data")
-
-        if not os.path.exists(self.nltk_path):
-            os.makedirs(self.nltk_path)
-
-        nltk.data.path.append(self.nltk_path)
-        self._setup_nltk_resources()
-
-        self.config = self.db.get_metadata("nlp_settings") or {}
-
-        self.intent_map = self.config.get("intents", {})
-        self.movie_translation = self.config.get("translations", {})
-
-        self.known_entities = (
-            self.config.get("known_films", [])
-            + self.config.get("known_people", [])
-            + self.config.get("known_planets", [])
-            + self.config.get("known_starships", [])
-            + self.config.get("known_species", [])
-            + list(self.movie_translation.keys())
+        self.metadata = metadata_cache or MetadataCache(self.db)
+        self.parse_cache = (
+            parse_cache
+            if parse_cache is not None
+            else TTLCache(max_size=PARSE_CACHE_SIZE, ttl=PARSE_CACHE_TTL)
         )
+        self.lookup = NLPLookup({})
+        self._current_lookup()
 
-        self.stop_words = set(stopwords.words("portuguese")).union(
-            set(stopwords.words("english"))
-        )
+        self.stop_words = stop_words("portuguese") | stop_words("english")
         self.ruido_extra = {
             "quais",
             "quem",
@@ -75,41 +185,97 @@ class NLPService:
             "do",
             "da",
         }
+        self.ignored_words = frozenset(self.stop_words | self.ruido_extra)
+
+    def _current_lookup(self) -> NLPLookup:
+        """Retorna as estruturas de busca, recompilando-as se `nlp_settings` mudou."""
+        version, config = self.metadata.snapshot()
+        lookup = self.lookup
+        if lookup.version != version:
+            lookup = self.lookup = NLPLookup(config, version)
+            self.parse_cache.clear()
+        return lookup
 
-    def _setup_nltk_resources(self):
+    def parse_cache_stats(self) -> dict:
+        """Retorna as métricas do cache de `parse_sentence` (taxa de acerto etc.)."""
+        return self.parse_cache.stats()
+
+    @staticmethod
+    def query_key(text: str) -> str:
         """
-        Configura os recursos do NLTK.
+        Forma normalizada de uma consulta, usada como chave do cache: tokens
+        sem acentos, sem diferença de caixa, pontuação ou espaços extras.
         """
-        resources = ["punkt", "punkt_tab", "stopwords"]
-        for res in resources:
-            try:
-                nltk.download(res, download_dir=self.nltk_path, quiet=True)
-            except Exception:
-                pass
-
-    def _fuzzy_correction(self, name: str) -> str:
+        return " ".join(token for token, _, _ in tokenize(text))
+
+    @property
+    def config(self) -> dict:
+        return self.lookup.config
+
+    @property
+    def intent_map(self):
+        return self.lookup.intents
+
+    @property
+    def movie_translation(self):
+        return self.lookup.translations
+
+    @property
+    def known_entities(self):
+        return self.lookup.known_entities
+
+    def _fuzzy_correction(self, name: str, lookup: NLPLookup = None) -> str:
         """Correção de erros de digitação."""
-        if not self.known_entities:
+        lookup = lookup or self._current_lookup()
+        if not lookup.known_entities:
             return name
-        matches = get_close_matches(name, self.known_entities, n=1, cutoff=0.7)
-        corrected = matches[0] if matches else name
-        return self.movie_translation.get(corrected, corrected)
+        corrected = lookup.entity_index.best_match(name, cutoff=ENTITY_CUTOFF)
+        corrected = corrected or name
+        return lookup.translations.get(corrected, corrected)
 
-    def _fuzzy_intent(self, word: str) -> str:
+    def _fuzzy_intent(self, word: str, lookup: NLPLookup = None) -> str:
         """Tenta encontrar a intenção correta mesmo com erro de digitação."""
+        lookup = lookup or self._current_lookup()
+        match = lookup.intent_index.best_match(word, cutoff=INTENT_CUTOFF)
+        return lookup.intents[match] if match else None
 
-        intent_keywords = list(self.intent_map.keys())
+    def _infer_type(self, name: str, lookup: NLPLookup):
+        """Tipo da entidade pelo nome; None se o nome não for conhecido."""
+        return lookup.name_category.get(name)
 
-        matches = get_close_matches(word, intent_keywords, n=1, cutoff=0.9)
+    def _infer_types(self, name: str, found_filter, lookup: NLPLookup) -> tuple:
+        """
+        Tipos possíveis da entidade, do mais provável para o menos provável.
 
-        if matches:
-            return self.intent_map[matches[0]]
+        O tipo vem, nesta ordem: do nome, se ele for conhecido; da intenção,
+        por `intent_to_type_map`; dos schemas que têm o campo pedido, se forem
+        no máximo `MAX_PROBE_TYPES`. Sem nenhuma dessas pistas, são usados os
+        tipos padrão (`NLPLookup.default_types`), para que uma consulta
+        qualquer não gere uma busca na SWAPI por tipo.
 
-        return None
+        Returns
+        -------
+        tuple[tuple[str, ...], str]
+            Os tipos, do mais provável para o menos provável, e a origem da
+            inferência: "name", "intent", "schema" ou "default".
+        """
+        category = self._infer_type(name, lookup)
+        if category:
+            return (category,), "name"
+        if found_filter in lookup.intent_types:
+            return (lookup.intent_types[found_filter],), "intent"
+        if 0 < len(FIELD_TYPES.get(found_filter, ())) <= MAX_PROBE_TYPES:
+            return FIELD_TYPES[found_filter], "schema"
+        return lookup.default_types, "default"
 
     def parse_sentence(self, text: str) -> dict:
         """Analisa uma frase e retorna um dicionário com os dados extraidos.
 
+        Os resultados ficam em `parse_cache`, pela consulta normalizada
+        (`query_key`): frases que só diferem em caixa, acentos, pontuação ou
+        espaços compartilham o resultado, inclusive o `raw_name` da primeira
+        delas. Só `original_query` é sempre o da chamada.
+
         Parameters
         ----------
         text : str
@@ -123,50 +289,144 @@ class NLPService:
         if not text:
             return {}
 
-        tokens = word_tokenize(text.lower(), language="portuguese")
-        palavras_limpas = [
-            w
-            for w in tokens
-            if (w.isalnum() or "-" in w)
-            and w not in self.stop_words
-            and w not in self.ruido_extra
+        lookup = self._current_lookup()
+        # A versão faz parte da chave: um resultado calculado com a versão
+        # anterior nunca é servido, mesmo se gravado depois da troca.
+        key = (lookup.version, self.query_key(text))
+        result = self.parse_cache.get(key)
+        if result is None:
+            result = self._parse(text, lookup)
+            self.parse_cache.set(key, result)
+        return {**result, "original_query": text}
+
+    def parse_many(self, texts) -> list:
+        """Analisa várias frases de uma vez, com o mesmo resultado de `parse_sentence`.
+
+        Frases com a mesma consulta normalizada são analisadas uma vez, e os
+        nomes que precisam de correção de digitação são corrigidos juntos
+        (`FuzzyIndex.get_close_matches_many`), cada nome distinto uma vez.
+        Os resultados entram em `parse_cache`, como em `parse_sentence`.
+
+        Parameters
+        ----------
+        texts : Iterable[str]
+            Frases a serem analisadas.
+
+        Returns
+        -------
+        list[dict]
+            Um dicionário por frase, na mesma ordem.
+        """
+        texts = list(texts)
+        lookup = self._current_lookup()
+        results = {}
+        pending = {}
+        for text in texts:
+            if not text:
+                continue
+            key = (lookup.version, self.query_key(text))
+            if key in results or key in pending:
+                continue
+            cached = self.parse_cache.get(key)
+            if cached is not None:
+                results[key] = cached
+            else:
+                pending[key] = self._extract(text, lookup)
+
+        corrections = self._fuzzy_correction_many(
+            {raw_name for raw_name, _, name in pending.values() if name is None},
+            lookup,
+        )
+        for key, (raw_name, found_filter, name) in pending.items():
+            if name is None:
+                name = corrections[raw_name]
+            results[key] = self._result(raw_name, found_filter, name, lookup)
+            self.parse_cache.set(key, results[key])
+
+        return [
+            (
+                {
+                    **results[(lookup.version, self.query_key(text))],
+                    "original_query": text,
+                }
+                if text
+                else {}
+            )
+            for text in texts
         ]
 
-        found_filter = None
-        palavra_intencao_original = None
-
-        for palavra in palavras_limpas:
-            if palavra in self.intent_map:
-                found_filter = self.intent_map[palavra]
-                palavra_intencao_original = palavra
-                break
-
-            intent_fuzzy = self._fuzzy_intent(palavra)
-            if intent_fuzzy:
-                found_filter = intent_fuzzy
-                palavra_intencao_original = palavra
-                break
-
-        nome_tokens = [w for w in palavras_limpas if w != palavra_intencao_original]
-        raw_name = " ".join(nome_tokens).title()
-        corrected_name = self._fuzzy_correction(raw_name)
-
-        category_map = {
-            "planets": set(self.config.get("known_planets", [])),
-            "starships": set(self.config.get("known_starships", [])),
-            "vehicles": set(self.config.get("known_vehicles", [])),
-            "species": set(self.config.get("known_species", [])),
-            "films": set(self.config.get("known_films", [])).union(
-                set(self.movie_translation.keys())
-            ),
-            "people": set(self.config.get("known_people", [])),
+    def _fuzzy_correction_many(self, names, lookup: NLPLookup) -> dict:
+        """`_fuzzy_correction` para vários nomes: nome -> nome corrigido."""
+        names = list(names)
+        if not lookup.known_entities:
+            return {name: name for name in names}
+        matches = lookup.entity_index.get_close_matches_many(
+            names, n=1, cutoff=ENTITY_CUTOFF
+        )
+        corrected = {
+            name: found[0] if found else name for name, found in zip(names, matches)
+        }
+        return {
+            name: lookup.translations.get(value, value)
+            for name, value in corrected.items()
+        }
+
+    def _parse(self, text: str, lookup: NLPLookup) -> dict:
+        """Extrai nome, filtro e tipo de `text` (sem cache)."""
+        raw_name, found_filter, name = self._extract(text, lookup)
+        if name is None:
+            name = self._fuzzy_correction(raw_name, lookup)
+        return self._result(raw_name, found_filter, name, lookup)
+
+    def _extract(self, text: str, lookup: NLPLookup) -> tuple:
+        """
+        Nome digitado, filtro e, se o nome foi reconhecido sem correção de
+        digitação, o nome canônico (senão None).
+        """
+        tokens = word_tokenize(text.lower())
+        palavras_limpas = [w for w in tokens if w not in self.ignored_words]
+
+        # Intenções e nomes conhecidos, inclusive os de várias palavras
+        # ("birth year", "A New Hope"), em uma única passada pelo texto.
+        phrases = lookup.phrases.find(text)
+        intent = next((m for m in phrases if m.kind == "intent"), None)
+        entity = max((m for m in phrases if m.kind == "entity"), key=len, default=None)
+
+        found_filter = intent.value if intent else None
+        matched_words = {
+            token
+            for match in (intent, entity)
+            if match is not None
+            for token, _, _ in tokenize(match.text)
         }
 
-        inferred_type = "people"
-        for category, entities in category_map.items():
-            if corrected_name in entities:
-                inferred_type = category
-                break
+        if found_filter is None:
+            for palavra in palavras_limpas:
+                if normalize(palavra) in matched_words:
+                    continue
+                intent_fuzzy = self._fuzzy_intent(palavra, lookup)
+                if intent_fuzzy:
+                    found_filter = intent_fuzzy
+                    matched_words.add(normalize(palavra))
+                    break
+
+        if entity is not None:
+            raw_name = entity.text.lower().title()
+            return (
+                raw_name,
+                found_filter,
+                lookup.translations.get(entity.value, entity.value),
+            )
+        nome_tokens = [w for w in palavras_limpas if normalize(w) not in matched_words]
+        return " ".join(nome_tokens).title(), found_filter, None
+
+    def _result(
+        self, raw_name: str, found_filter, corrected_name: str, lookup: NLPLookup
+    ) -> dict:
+        candidate_types, type_source = self._infer_types(
+            corrected_name, found_filter, lookup
+        )
+        inferred_type = candidate_types[0]
 
         if inferred_type == "films" and found_filter == "films":
             found_filter = None
@@ -176,5 +436,6 @@ class NLPService:
             "raw_name": raw_name,
             "filter": found_filter,
             "type": inferred_type,
-            "original_query": text,
+            "candidate_types": candidate_types,
+            "type_source": type_source,
         }
@@ -0,0 +1,148 @@
+import unicodedata
+from collections import deque
+
+from app.models.nlp_data import TOKEN_PATTERN
+
+
+def normalize(token: str) -> str:
+    """Forma usada na comparação: sem acentos e sem diferença de caixa."""
+    decomposed = unicodedata.normalize("NFKD", token.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text: str) -> list:
+    """Tokens de `text` como `(normalizado, início, fim)`."""
+    return [
+        (normalize(match.group()), match.start(), match.end())
+        for match in TOKEN_PATTERN.finditer(text)
+    ]
+
+
+class PhraseMatch:
+    __slots__ = ("start", "end", "kind", "value", "text")
+
+    def __init__(self, start: int, end: int, kind: str, value, text: str):
+        self.start = start
+        self.end = end
+        self.kind = kind
+        self.value = value
+        self.text = text
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def __repr__(self) -> str:
+        return f"PhraseMatch({self.kind!r}, {self.value!r}, {self.text!r})"
+
+
+class PhraseMatcher:
+    def __init__(self):
+        """
+        Busca de frases (sequências de tokens) em um texto com um autômato de
+        Aho-Corasick sobre tokens.
+
+        As frases são cadastradas com `add` e o autômato é montado em `build`.
+        Depois disso, `find` percorre o texto uma única vez, em tempo linear
+        no número de tokens (mais o número de ocorrências), e devolve as
+        ocorrências mais à esquerda e mais longas, sem sobreposição. A
+        comparação ignora acentos e caixa (`normalize`).
+        """
+        self._goto = [{}]
+        self._payload = [None]
+        self._fail = [0]
+        self._outputs = [()]
+        self._built = False
+        self.size = 0
+
+    def add(self, phrase: str, kind: str, value=None, replace: bool = True):
+        """
+        Cadastra uma frase.
+
+        Parameters
+        ----------
+        phrase : str
+            Frase procurada.
+        kind : str
+            Tipo da frase (ex: "intent", "entity").
+        value : Any
+            Valor devolvido na ocorrência. Padrão: a própria frase.
+        replace : bool
+            Se False, uma frase já cadastrada (com os mesmos tokens
+            normalizados) é mantida.
+        """
+        tokens = [token for token, _, _ in tokenize(phrase)]
+        if not tokens:
+            return
+        state = 0
+        for token in tokens:
+            following = self._goto[state].get(token)
+            if following is None:
+                following = len(self._goto)
+                self._goto[state][token] = following
+                self._goto.append({})
+                self._payload.append(None)
+            state = following
+        if self._payload[state] is None:
+            self.size += 1
+        elif not replace:
+            return
+        self._payload[state] = (len(tokens), kind, phrase if value is None else value)
+        self._built = False
+
+    def build(self) -> "PhraseMatcher":
+        """Calcula os links de falha e as saídas de cada estado."""
+        count = len(self._goto)
+        self._fail = [0] * count
+        self._outputs = [()] * count
+        queue = deque()
+        for state in self._goto[0].values():
+            self._outputs[state] = self._own(state)
+            queue.append(state)
+        while queue:
+            state = queue.popleft()
+            for token, following in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(token, 0)
+                self._fail[following] = target if target != following else 0
+                self._outputs[following] = (
+                    self._own(following) + self._outputs[self._fail[following]]
+                )
+                queue.append(following)
+        self._built = True
+        return self
+
+    def _own(self, state: int) -> tuple:
+        payload = self._payload[state]
+        return (payload,) if payload is not None else ()
+
+    def find(self, text: str) -> list:
+        """
+        Ocorrências das frases em `text`, mais à esquerda e mais longas
+        primeiro, sem sobreposição, na ordem do texto.
+        """
+        if not self._built:
+            self.build()
+        tokens = tokenize(text)
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+
+        found = []
+        state = 0
+        for end, (token, _, _) in enumerate(tokens, start=1):
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            for length, kind, value in outputs[state]:
+                found.append((end - length, end, kind, value))
+
+        found.sort(key=lambda match: (match[0], match[0] - match[1]))
+        matches = []
+        position = 0
+        for start, end, kind, value in found:
+            if start < position:
+                continue
+            span = text[tokens[start][1] : tokens[end - 1][2]]
+            matches.append(PhraseMatch(start, end, kind, value, span))
+            position = end
+        return matches
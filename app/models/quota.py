@@ -0,0 +1,318 @@
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Tuple
+
+from app.models.database import BATCH_LIMIT
+
+QUOTA_COLLECTION = "usage_shards"
+
+# Limite de documentos por `get_all` usado na sincronização.
+SYNC_READ_CHUNK = 300
+
+# Fração do limite a partir da qual o total de um identificador é relido em
+# toda sincronização, mesmo sem uso local desde a anterior.
+NEAR_LIMIT_RATIO = 0.8
+
+
+class _Usage:
+    __slots__ = (
+        "day",
+        "base",
+        "pending",
+        "in_flight",
+        "tokens",
+        "updated",
+        "limit",
+        "touched",
+    )
+
+    def __init__(self, day: str, tokens: float, limit: int):
+        self.day = day
+        self.base = 0
+        self.pending = 0
+        self.in_flight = 0
+        self.tokens = tokens
+        self.updated = time.monotonic()
+        self.limit = limit
+        # Se houve requisições (liberadas ou não) desde a última sincronização.
+        self.touched = True
+
+    @property
+    def used(self) -> int:
+        return self.base + self.pending + self.in_flight
+
+
+class QuotaManager:
+    def __init__(
+        self,
+        db_manager,
+        daily_limit: int = 1000,
+        anonymous_daily_limit: int = 200,
+        burst: int = 20,
+        refill_per_second: float = 1.0,
+        sync_interval: float = 10.0,
+        shards: int = 8,
+        max_identifiers: int = 100_000,
+    ):
+        """
+        Controle de cota de requisições sem acesso ao Firestore por requisição.
+
+        Cada identificador (e-mail ou IP) tem, em memória, um contador diário
+        e um token bucket para rajadas. A decisão de liberar ou negar é local.
+        A cada `sync_interval` segundos, os incrementos acumulados são
+        enviados ao Firestore em um único lote, distribuídos entre `shards`
+        documentos por identificador para evitar disputa de escrita, e os
+        totais de todas as instâncias são lidos de volta em uma chamada.
+
+        Só são relidos os totais dos identificadores usados nesta instância
+        desde a sincronização anterior (ou com incrementos ainda por enviar) e
+        dos que já passaram de `NEAR_LIMIT_RATIO` do limite. Os demais mantêm
+        o último total lido até voltarem a ser usados aqui, e são relidos na
+        sincronização seguinte: o uso das outras instâncias continua
+        aparecendo com, no máximo, um intervalo de atraso.
+
+        Entre duas sincronizações, uma instância não vê o uso das demais: um
+        identificador pode passar do limite em, no máximo, o que as outras
+        instâncias liberaram nesse intervalo.
+
+        Parameters
+        ----------
+        db_manager : app.models.database.FirestoreManager
+            Gerenciador de banco de dados do Firebase.
+        daily_limit : int
+            Requisições por dia para usuários autenticados.
+        anonymous_daily_limit : int
+            Requisições por dia para chamadas anônimas (por IP).
+        burst : int
+            Tamanho do token bucket (requisições seguidas permitidas).
+        refill_per_second : float
+            Tokens devolvidos ao bucket por segundo.
+        sync_interval : float
+            Intervalo, em segundos, entre as sincronizações com o Firestore.
+        shards : int
+            Número de documentos contadores por identificador e dia.
+        max_identifiers : int
+            Número máximo de identificadores mantidos em memória.
+
+        Attributes
+        ----------
+        allowed : int
+            Número de requisições liberadas.
+        rejected : int
+            Número de requisições negadas.
+        syncs : int
+            Número de sincronizações concluídas.
+        """
+        self.db = db_manager
+        self.daily_limit = daily_limit
+        self.anonymous_daily_limit = anonymous_daily_limit
+        self.burst = burst
+        self.refill_per_second = refill_per_second
+        self.sync_interval = sync_interval
+        self.shards = shards
+        self.max_identifiers = max_identifiers
+        self._usage: "OrderedDict[str, _Usage]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.allowed = 0
+        self.rejected = 0
+        self.syncs = 0
+
+    @staticmethod
+    def _today() -> str:
+        return date.today().isoformat()
+
+    @staticmethod
+    def _seconds_until_tomorrow() -> int:
+        now = datetime.now()
+        tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        return max(1, int((tomorrow - now).total_seconds()))
+
+    def _shard_id(self, identifier: str, day: str, shard: int) -> str:
+        return f"{day}__{identifier.replace('/', '_')}__{shard}"
+
+    def _refill(self, usage: _Usage, now: float):
+        elapsed = now - usage.updated
+        usage.tokens = min(self.burst, usage.tokens + elapsed * self.refill_per_second)
+        usage.updated = now
+
+    def check(self, identifier: str, anonymous: bool = False) -> Tuple[bool, int]:
+        """
+        Registra uma requisição e indica se ela está dentro da cota.
+
+        Parameters
+        ----------
+        identifier : str
+            E-mail do usuário ou `anon:<IP>`. Se vazio, é contado como
+            "unknown".
+        anonymous : bool
+            Se True, aplica `anonymous_daily_limit`.
+
+        Returns
+        -------
+        tuple[bool, int]
+            Se a requisição foi liberada e, se não, em quantos segundos tentar
+            de novo.
+        """
+        # Um identificador ausente não pode quebrar a sincronização: todas as
+        # chamadas sem identificador dividem a mesma cota.
+        identifier = str(identifier) if identifier else "unknown"
+        limit = self.anonymous_daily_limit if anonymous else self.daily_limit
+        today = self._today()
+        now = time.monotonic()
+        with self._lock:
+            usage = self._usage.get(identifier)
+            if usage is None or usage.day != today:
+                usage = self._usage[identifier] = _Usage(today, self.burst, limit)
+                self._evict()
+            self._usage.move_to_end(identifier)
+            usage.limit = limit
+            usage.touched = True
+            self._refill(usage, now)
+
+            if usage.used >= limit:
+                self.rejected += 1
+                return False, self._seconds_until_tomorrow()
+            if usage.tokens < 1:
+                self.rejected += 1
+                wait = (1 - usage.tokens) / self.refill_per_second
+                return False, max(1, int(wait + 0.999))
+
+            usage.tokens -= 1
+            usage.pending += 1
+            self.allowed += 1
+
+        self._ensure_started()
+        return True, 0
+
+    def _evict(self):
+        while len(self._usage) > self.max_identifiers:
+            self._usage.popitem(last=False)
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is not None:
+                    return
+                self._thread = threading.Thread(
+                    target=self._run, name="quota-sync", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.sync_interval):
+            try:
+                self.sync()
+            except Exception as e:
+                logging.error(f"Erro ao sincronizar as cotas: {e}")
+
+    def sync(self):
+        """Envia os incrementos pendentes e atualiza os totais globais."""
+        with self._sync_lock:
+            today = self._today()
+            with self._lock:
+                for identifier in [
+                    key for key, usage in self._usage.items() if usage.day != today
+                ]:
+                    del self._usage[identifier]
+                flushed = []
+                active = []
+                for identifier, usage in self._usage.items():
+                    if (
+                        usage.touched
+                        or usage.pending
+                        or usage.used >= usage.limit * NEAR_LIMIT_RATIO
+                    ):
+                        active.append((identifier, usage))
+                        usage.touched = False
+                    if usage.pending:
+                        flushed.append((identifier, usage, usage.pending))
+                        usage.in_flight += usage.pending
+                        usage.pending = 0
+
+            ok = True
+            for start in range(0, len(flushed), BATCH_LIMIT):
+                chunk = flushed[start : start + BATCH_LIMIT]
+                try:
+                    writes = self.db.batch()
+                    for identifier, usage, count in chunk:
+                        shard = random.randrange(self.shards)
+                        writes.increment(
+                            QUOTA_COLLECTION,
+                            self._shard_id(identifier, usage.day, shard),
+                            {"count": count},
+                        )
+                    committed = writes.commit()
+                except Exception as e:
+                    logging.error(f"Erro ao enviar os incrementos de cota: {e}")
+                    committed = False
+                # Em caso de falha, os incrementos voltam para `pending`.
+                ok = ok and committed
+                with self._lock:
+                    for _, usage, count in chunk:
+                        usage.in_flight -= count
+                        if not committed:
+                            usage.pending += count
+            if not ok:
+                self._retouch(active)
+                return
+
+            try:
+                totals = self._read_totals(active)
+            except Exception as e:
+                logging.error(f"Erro ao sincronizar as cotas: {e}")
+                self._retouch(active)
+                return
+            with self._lock:
+                for (identifier, usage), total in zip(active, totals):
+                    # O total já inclui os incrementos desta instância enviados
+                    # acima; o que chegou depois continua em `pending`.
+                    usage.base = total
+            self.syncs += 1
+
+    def _retouch(self, active: list):
+        # Sem os totais lidos, os mesmos identificadores entram na próxima
+        # sincronização.
+        with self._lock:
+            for _, usage in active:
+                usage.touched = True
+
+    def _read_totals(self, active: list) -> list:
+        refs = [
+            (QUOTA_COLLECTION, self._shard_id(identifier, usage.day, shard))
+            for identifier, usage in active
+            for shard in range(self.shards)
+        ]
+        counts = []
+        for start in range(0, len(refs), SYNC_READ_CHUNK):
+            docs = self.db.get_many(
+                refs[start : start + SYNC_READ_CHUNK], use_cache=False
+            )
+            counts.extend((doc or {}).get("count", 0) for doc in docs)
+        return [
+            sum(counts[i * self.shards : (i + 1) * self.shards])
+            for i in range(len(active))
+        ]
+
+    def close(self):
+        """Interrompe a sincronização periódica e envia os incrementos pendentes."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.sync_interval)
+        self.sync()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "identifiers": len(self._usage),
+                "pending": sum(usage.pending for usage in self._usage.values()),
+                "allowed": self.allowed,
+                "rejected": self.rejected,
+                "syncs": self.syncs,
+            }
@@ -0,0 +1,82 @@
+import threading
+from typing import Any, Callable, Hashable
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        """
+        Coalescência de chamadas concorrentes idênticas ("single-flight").
+
+        Enquanto uma chamada para uma chave está em andamento, as demais
+        chamadas com a mesma chave aguardam o seu término e recebem o mesmo
+        resultado (ou a mesma exceção), em vez de repetir o trabalho.
+
+        Attributes
+        ----------
+        executed : int
+            Número de chamadas efetivamente executadas.
+        shared : int
+            Número de chamadas atendidas pelo resultado de outra em andamento.
+        """
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Executa `fn(*args, **kwargs)` uma única vez por chave em andamento.
+
+        Parameters
+        ----------
+        key : Hashable
+            Chave que identifica chamadas equivalentes.
+        fn : Callable
+            Função a ser executada pela primeira chamada.
+
+        Returns
+        -------
+        Any
+            O resultado de `fn`, compartilhado entre todas as chamadas concorrentes.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.shared += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self) -> int:
+        """Número de chaves com chamadas em andamento."""
+        with self._lock:
+            return len(self._calls)
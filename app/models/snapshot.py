@@ -0,0 +1,124 @@
+import json
+import logging
+from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+SWAPI_RESOURCES = ("people", "planets", "films", "species", "vehicles", "starships")
+
+
+def swapi_url_key(url: str) -> Optional[tuple]:
+    """Converte uma URL da SWAPI (de qualquer host) em `(recurso, id)`."""
+    parts = [p for p in urlparse(url).path.split("/") if p]
+    if "api" in parts:
+        parts = parts[parts.index("api") + 1 :]
+    if len(parts) == 2 and parts[1].isdigit():
+        return parts[0], parts[1]
+    return None
+
+
+class SWAPISnapshot:
+    def __init__(self, resources: dict, created_at: Optional[str] = None):
+        """
+        Cópia local e completa do catálogo da SWAPI.
+
+        Parameters
+        ----------
+        resources : dict
+            Mapa `recurso -> lista de registros`, exatamente como retornados
+            pela SWAPI.
+        created_at : Optional[str]
+            Data de geração do snapshot, em formato ISO.
+
+        Attributes
+        ----------
+        by_url : dict
+            Índice `(recurso, id) -> registro`.
+        by_name : dict
+            Índice `recurso -> {nome em minúsculas -> registro}`.
+        """
+        self.resources = resources
+        self.created_at = created_at
+        self.by_url = {}
+        self.by_name = {}
+
+        for resource, records in resources.items():
+            names = self.by_name.setdefault(resource, {})
+            for record in records:
+                key = swapi_url_key(record.get("url", ""))
+                if key:
+                    self.by_url[key] = record
+                name = record.get("name") or record.get("title")
+                if name:
+                    names.setdefault(name.lower(), record)
+
+    def get(self, url: str) -> Optional[dict]:
+        """Retorna o registro correspondente a uma URL de entidade."""
+        key = swapi_url_key(url)
+        return self.by_url.get(key) if key else None
+
+    def search(self, resource: str, term: str) -> list:
+        """
+        Reproduz o `?search=` da SWAPI: busca parcial, sem diferenciar
+        maiúsculas, pelo nome (ou título) do registro.
+
+        Uma correspondência exata tem prioridade e é resolvida pelo índice de
+        nomes, sem percorrer o recurso.
+        """
+        term = (term or "").strip().lower()
+        exact = self.by_name.get(resource, {}).get(term)
+        if exact is not None:
+            return [exact]
+        return [
+            r
+            for r in self.resources.get(resource, [])
+            if term in (r.get("name") or r.get("title") or "").lower()
+        ]
+
+    def resolve(self, url: str) -> Optional[dict]:
+        """
+        Responde a uma URL da SWAPI com o mesmo formato da API real.
+
+        URLs de entidade retornam o registro; URLs de listagem com `?search=`
+        retornam `{"count": ..., "results": [...]}`.
+        """
+        record = self.get(url)
+        if record is not None:
+            return record
+
+        parsed = urlparse(url)
+        parts = [p for p in parsed.path.split("/") if p]
+        resource = parts[-1] if parts else None
+        if resource not in self.resources:
+            return None
+
+        term = parse_qs(parsed.query).get("search", [""])[0]
+        results = self.search(resource, term)
+        return {
+            "count": len(results),
+            "next": None,
+            "previous": None,
+            "results": results,
+        }
+
+    def to_dict(self) -> dict:
+        return {"created_at": self.created_at, "resources": self.resources}
+
+    def save(self, path) -> Path:
+        """Grava o snapshot em JSON compacto."""
+        path = Path(path)
+        path.write_text(
+            json.dumps(self.to_dict(), ensure_ascii=False, separators=(",", ":")),
+            encoding="utf-8",
+        )
+        return path
+
+    @classmethod
+    def load(cls, path) -> "SWAPISnapshot":
+        """Carrega um snapshot gravado por `save`."""
+        raw = json.loads(Path(path).read_text(encoding="utf-8"))
+        snapshot = cls(raw["resources"], raw.get("created_at"))
+        logging.info(
+            f"📦 [SNAPSHOT] {len(snapshot.by_url)} entidades carregadas de '{path}'."
+        )
+        return snapshot
@@ -0,0 +1,66 @@
+import json
+import logging
+import threading
+from typing import Callable, Dict
+
+
+class StatsReporter:
+    def __init__(self, sources: Dict[str, Callable[[], dict]], interval: float = 300.0):
+        """
+        Registra periodicamente no log as métricas dos componentes em memória.
+
+        Executor de hidratação, fila write-behind, cota e resolução de tipos
+        mantêm contadores apenas no processo; este relatório os leva para os
+        logs da instância (uma linha JSON por intervalo), onde podem ser
+        filtrados e transformados em métricas.
+
+        Parameters
+        ----------
+        sources : Dict[str, Callable[[], dict]]
+            Nome -> função sem argumentos que retorna as métricas (ex:
+            `write_behind.stats`).
+        interval : float
+            Intervalo, em segundos, entre os relatórios.
+        """
+        self.sources = sources
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def snapshot(self) -> dict:
+        """Retorna as métricas de todas as fontes; uma fonte com erro não impede as demais."""
+        result = {}
+        for name, source in self.sources.items():
+            try:
+                result[name] = source()
+            except Exception as e:
+                result[name] = {"error": str(e)}
+        return result
+
+    def report(self):
+        """Registra as métricas atuais no log."""
+        logging.info(
+            f"📊 [STATS] {json.dumps(self.snapshot(), sort_keys=True, default=str)}"
+        )
+
+    def start(self):
+        """Inicia o relatório periódico em um thread de segundo plano."""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="stats-reporter", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.report()
+            except Exception as e:
+                logging.error(f"Erro ao registrar as métricas: {e}")
+
+    def close(self):
+        """Interrompe o relatório periódico e registra as métricas finais."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.interval)
+        self.report()
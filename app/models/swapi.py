@@ -1,9 +1,16 @@
+import asyncio
 import logging
+import threading
 from types import SimpleNamespace
 from typing import Optional
 
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+from app.models.cache import TTLCache
+from app.models.circuit_breaker import CircuitBreaker
 from app.models.entities import (
     CharacterSchema,
     FilmSchema,
@@ -12,19 +19,152 @@ from app.models.entities import (
     StarshipSchema,
     VehicleSchema,
 )
+from app.models.singleflight import SingleFlight
+from app.models.snapshot import SWAPISnapshot
+
+# Número de hidratações simultâneas feitas pelo DataService. O pool de conexões
+# do cliente é dimensionado com o mesmo valor para que nenhuma thread fique
+# esperando por uma conexão livre.
+HYDRATION_CONCURRENCY = 10
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Cache URL -> entidade compartilhado por todos os clientes do processo. Os
+# mesmos filmes e planetas aparecem em quase todas as entidades, então uma
+# instância "quente" reaproveita o que já foi resolvido em requisições anteriores.
+entity_url_cache = TTLCache(max_size=2048, ttl=24 * 3600)
+
+FETCH_METHODS = {
+    "people": "get_person",
+    "planets": "get_planet",
+    "films": "get_movie",
+    "species": "get_species",
+    "vehicles": "get_vehicle",
+    "starships": "get_starship",
+}
 
 
 class SWAPIClient:
-    def __init__(self):
+    def __init__(
+        self,
+        base_url: str = "https://swapi.dev/api",
+        pool_size: int = HYDRATION_CONCURRENCY,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        timeout: float = 10.0,
+        url_cache: Optional[TTLCache] = None,
+        snapshot: Optional[SWAPISnapshot] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ):
         """
         Inicializa o cliente da API do SWAPI.
 
+        O cliente mantém uma única `requests.Session` durante toda a vida da
+        instância, reaproveitando as conexões TCP/TLS (keep-alive) entre as
+        buscas e as hidratações.
+
+        Parameters
+        ----------
+        base_url : str
+            URL base da API do SWAPI.
+        pool_size : int
+            Número máximo de conexões abertas por host.
+        max_retries : int
+            Número de novas tentativas para respostas 429/5xx. Erros de conexão
+            e de leitura não são repetidos: cada um conta como uma falha no
+            disjuntor.
+        backoff_factor : float
+            Fator de espera exponencial entre as tentativas, em segundos.
+        timeout : float
+            Tempo máximo de espera por requisição, em segundos.
+        url_cache : Optional[TTLCache]
+            Cache usado por `get_entity_by_url`. Por padrão, o cache
+            compartilhado do processo (`entity_url_cache`).
+        snapshot : Optional[SWAPISnapshot]
+            Se informado, o cliente opera em modo offline: buscas e hidratações
+            são respondidas pelo snapshot local, sem nenhum acesso à rede.
+        circuit_breaker : Optional[CircuitBreaker]
+            Disjuntor que faz as chamadas falharem imediatamente quando a SWAPI
+            está fora do ar. Por padrão, um `CircuitBreaker` com os valores
+            padrão.
+
         Attributes
         ----------
         base_url : str
             URL base da API do SWAPI.
+        timeout : float
+            Tempo máximo de espera por requisição, em segundos.
+        session : requests.Session
+            Sessão HTTP compartilhada com pool de conexões.
+        url_cache : TTLCache
+            Cache URL -> entidade.
+        url_flight : SingleFlight
+            Coalescência de buscas concorrentes pela mesma URL.
+        breaker : CircuitBreaker
+            Disjuntor das chamadas à SWAPI.
+        """
+        self.base_url = base_url
+        self.timeout = timeout
+        self.url_cache = entity_url_cache if url_cache is None else url_cache
+        self.url_flight = SingleFlight()
+        self.snapshot = snapshot
+        self._state = threading.local()
+        self.breaker = circuit_breaker or CircuitBreaker()
+        self.session = self._build_session(pool_size, max_retries, backoff_factor)
+
+    @staticmethod
+    def _build_session(
+        pool_size: int, max_retries: int, backoff_factor: float
+    ) -> requests.Session:
         """
-        self.base_url = "https://swapi.dev/api"
+        Cria a sessão HTTP com pool de conexões e política de retry.
+
+        Parameters
+        ----------
+        pool_size : int
+            Número máximo de conexões abertas por host. Com `pool_block=True`
+            as threads excedentes aguardam uma conexão livre em vez de abrir
+            conexões extras.
+        max_retries : int
+            Número de novas tentativas para respostas 429/5xx.
+        backoff_factor : float
+            Fator de espera exponencial entre as tentativas.
+
+        Returns
+        -------
+        requests.Session
+            Sessão configurada.
+
+        Notes
+        -----
+        Erros de conexão e timeouts de leitura não são repetidos pela sessão:
+        com a SWAPI fora do ar, cada tentativa escondida custaria até
+        `timeout` segundos e o backoff antes de o disjuntor registrar uma
+        única falha.
+        """
+        retry = Retry(
+            total=max_retries,
+            connect=0,
+            read=0,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset(["GET"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_maxsize=pool_size,
+            pool_block=True,
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def close(self):
+        """Fecha as conexões abertas pela sessão."""
+        self.session.close()
 
     def _get_request(self, url: str) -> Optional[dict]:
         """
@@ -40,14 +180,45 @@ class SWAPIClient:
         Optional[dict]
             O resultado da requisição em formato JSON ou None se a requisição falhar.
         """
+        if self.snapshot is not None:
+            return self.snapshot.resolve(url)
+
+        if not self.breaker.allow():
+            logging.warning(f"⚡ [CIRCUIT] SWAPI indisponível, ignorando {url}")
+            self._state.failed = True
+            return None
+
+        # O resultado é registrado no `finally`, para que qualquer exceção
+        # libere a chamada de teste do circuito meio-aberto.
+        failed = True
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+            failed = response.status_code in RETRY_STATUS_CODES
+        except requests.RequestException as e:
+            logging.error(f"Erro ao buscar URL {url}: {e}")
+            self._state.failed = True
+            return None
+        finally:
+            if failed:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+
         try:
-            response = requests.get(url, timeout=10.0)
             response.raise_for_status()
             return response.json()
-        except requests.RequestException as e:
+        except (requests.RequestException, ValueError) as e:
             logging.error(f"Erro ao buscar URL {url}: {e}")
+            self._state.failed = True
             return None
 
+    def last_request_failed(self) -> bool:
+        """
+        Indica se a última busca feita pela thread atual falhou por erro de rede
+        ou da SWAPI, e não por ausência de resultados.
+        """
+        return getattr(self._state, "failed", False)
+
     def get_person(self, name: str) -> Optional[CharacterSchema]:
         data = self._get_request(f"{self.base_url}/people/?search={name}")
         return (
@@ -112,15 +283,8 @@ class SWAPIClient:
         Optional[dict]
             O resultado da busca em formato JSON ou None se a busca falhar.
         """
-        method_map = {
-            "people": "get_person",
-            "planets": "get_planet",
-            "films": "get_movie",
-            "species": "get_species",
-            "vehicles": "get_vehicle",
-            "starships": "get_starship",
-        }
-        method_name = method_map.get(entity_type)
+        self._state.failed = False
+        method_name = FETCH_METHODS.get(entity_type)
         if not method_name:
             logging.error(f"Invalid entity_type: {entity_type}")
             return None
@@ -137,6 +301,243 @@ class SWAPIClient:
     def get_entity_by_url(self, url: str):
         """
         Busca qualquer entidade diretamente pela URL fornecida pela SWAPI.
+
+        O resultado é guardado no `url_cache`; falhas não são cacheadas.
+        Buscas concorrentes pela mesma URL aguardam uma única requisição.
         """
+        cached = self.url_cache.get(url)
+        if cached is not None:
+            return cached
+        return self.url_flight.do(url, self._fetch_entity, url)
+
+    def _fetch_entity(self, url: str):
         data = self._get_request(url)
-        return SimpleNamespace(**data) if data else None
+        entity = SimpleNamespace(**data) if data else None
+        if entity is not None:
+            self.url_cache.set(url, entity)
+        return entity
+
+
+class AsyncSWAPIClient:
+    def __init__(
+        self,
+        base_url: str = "https://swapi.dev/api",
+        pool_size: int = HYDRATION_CONCURRENCY,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        timeout: float = 10.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        url_cache: Optional[TTLCache] = None,
+        snapshot: Optional[SWAPISnapshot] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ):
+        """
+        Inicializa o cliente assíncrono da API do SWAPI.
+
+        Espelha a interface do `SWAPIClient`, mas todos os métodos de busca são
+        corrotinas. O `httpx.AsyncClient` é criado sob demanda, dentro do event
+        loop que fizer a primeira requisição.
+
+        Parameters
+        ----------
+        base_url : str
+            URL base da API do SWAPI.
+        pool_size : int
+            Número máximo de conexões simultâneas.
+        max_retries : int
+            Número de novas tentativas para respostas 429/5xx e falhas de conexão.
+        backoff_factor : float
+            Fator de espera exponencial entre as tentativas, em segundos.
+        timeout : float
+            Tempo máximo de espera por requisição, em segundos.
+        transport : Optional[httpx.AsyncBaseTransport]
+            Transporte HTTP alternativo (ex: `httpx.MockTransport` nos testes).
+        url_cache : Optional[TTLCache]
+            Cache usado por `get_entity_by_url`. Por padrão, o mesmo cache
+            compartilhado pelo `SWAPIClient`.
+        snapshot : Optional[SWAPISnapshot]
+            Se informado, as requisições são respondidas pelo snapshot local.
+        circuit_breaker : Optional[CircuitBreaker]
+            Disjuntor das chamadas à SWAPI. Passe o `breaker` do `SWAPIClient`
+            para que os dois clientes vejam as mesmas falhas; se omitido, um
+            próprio é criado.
+        """
+        self.base_url = base_url
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        self.transport = transport
+        self.url_cache = entity_url_cache if url_cache is None else url_cache
+        self.snapshot = snapshot
+        self.breaker = circuit_breaker or CircuitBreaker()
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size,
+                ),
+                transport=self.transport,
+            )
+        return self._client
+
+    async def aclose(self):
+        """Fecha as conexões abertas pelo cliente."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def _get_request(self, url: str) -> Optional[dict]:
+        """
+        Faz uma requisição GET assíncrona e retorna o resultado em formato JSON.
+
+        Respostas 429/5xx e erros de conexão são repetidos até `max_retries`
+        vezes, com espera exponencial entre as tentativas. Com o circuito
+        aberto, a requisição não é feita; se as tentativas se esgotarem, a
+        falha conta para o disjuntor.
+
+        Parameters
+        ----------
+        url : str
+            A URL a ser buscada.
+
+        Returns
+        -------
+        Optional[dict]
+            O resultado da requisição em formato JSON ou None se a requisição falhar.
+        """
+        if self.snapshot is not None:
+            return self.snapshot.resolve(url)
+
+        if not self.breaker.allow():
+            logging.warning(f"⚡ [CIRCUIT] SWAPI indisponível, ignorando {url}")
+            return None
+
+        failed = True
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    response = await self.client.get(url)
+                except httpx.TransportError as e:
+                    if attempt < self.max_retries:
+                        await asyncio.sleep(self.backoff_factor * (2**attempt))
+                        continue
+                    logging.error(f"Erro ao buscar URL {url}: {e}")
+                    return None
+                if response.status_code in RETRY_STATUS_CODES:
+                    if attempt < self.max_retries:
+                        await asyncio.sleep(self.backoff_factor * (2**attempt))
+                        continue
+                else:
+                    failed = False
+                try:
+                    response.raise_for_status()
+                    return response.json()
+                except (httpx.HTTPError, ValueError) as e:
+                    logging.error(f"Erro ao buscar URL {url}: {e}")
+                    return None
+            return None
+        finally:
+            if failed:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+
+    async def get_person(self, name: str) -> Optional[CharacterSchema]:
+        data = await self._get_request(f"{self.base_url}/people/?search={name}")
+        return (
+            CharacterSchema(**data["results"][0])
+            if data and data.get("count", 0) > 0
+            else None
+        )
+
+    async def get_movie(self, title: str) -> Optional[FilmSchema]:
+        data = await self._get_request(f"{self.base_url}/films/?search={title}")
+        return (
+            FilmSchema(**data["results"][0])
+            if data and data.get("count", 0) > 0
+            else None
+        )
+
+    async def get_starship(self, name: str) -> Optional[StarshipSchema]:
+        data = await self._get_request(f"{self.base_url}/starships/?search={name}")
+        return (
+            StarshipSchema(**data["results"][0])
+            if data and data.get("count", 0) > 0
+            else None
+        )
+
+    async def get_planet(self, name: str) -> Optional[PlanetSchema]:
+        data = await self._get_request(f"{self.base_url}/planets/?search={name}")
+        return (
+            PlanetSchema(**data["results"][0])
+            if data and data.get("count", 0) > 0
+            else None
+        )
+
+    async def get_vehicle(self, name: str) -> Optional[VehicleSchema]:
+        data = await self._get_request(f"{self.base_url}/vehicles/?search={name}")
+        return (
+            VehicleSchema(**data["results"][0])
+            if data and data.get("count", 0) > 0
+            else None
+        )
+
+    async def get_species(self, name: str) -> Optional[SpeciesSchema]:
+        data = await self._get_request(f"{self.base_url}/species/?search={name}")
+        return (
+            SpeciesSchema(**data["results"][0])
+            if data and data.get("count", 0) > 0
+            else None
+        )
+
+    async def fetch_hydrated(self, name: str, entity_type: str):
+        """
+        Busca uma entidade na API do SWAPI com base em nome e tipo.
+
+        Parameters
+        ----------
+        name : str
+            Nome da entidade a ser buscada.
+        entity_type : str
+            Tipo da entidade a ser buscada.
+
+        Returns
+        -------
+        Optional[BaseModel]
+            A entidade encontrada ou None se a busca falhar.
+        """
+        method_name = FETCH_METHODS.get(entity_type)
+        if not method_name:
+            logging.error(f"Invalid entity_type: {entity_type}")
+            return None
+
+        param_name = "title" if entity_type == "films" else "name"
+        return await getattr(self, method_name)(**{param_name: name})
+
+    async def get_entity_by_url(self, url: str):
+        """
+        Busca qualquer entidade diretamente pela URL fornecida pela SWAPI.
+
+        O resultado é guardado no `url_cache`; falhas não são cacheadas.
+        """
+        cached = self.url_cache.get(url)
+        if cached is not None:
+            return cached
+
+        data = await self._get_request(url)
+        entity = SimpleNamespace(**data) if data else None
+        if entity is not None:
+            self.url_cache.set(url, entity)
+        return entity
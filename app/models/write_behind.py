@@ -0,0 +1,326 @@
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+
+from app.models.database import BATCH_LIMIT, HISTORY_COLLECTION, FirestoreManager
+
+# Campo interno com a última escrita de documento inteiro pendente para uma
+# chave: os dados de `set_document` ou None para `delete_document`.
+_DOCUMENT = "__document__"
+
+
+class WriteBehindQueue:
+    def __init__(
+        self,
+        db_manager,
+        flush_size: int = 100,
+        flush_interval: float = 2.0,
+        max_pending: int = 5000,
+        window: int = 256,
+    ):
+        """
+        Fila de escritas adiadas (write-behind) para o Firestore.
+
+        Recebe escritas que o usuário não precisa ver antes da resposta
+        (histórico de buscas, listas `known_*` e cache negativo) e as envia em
+        segundo plano. Os itens são agrupados por documento (as buscas de um
+        mesmo usuário viram um único incremento do contador do histórico; de
+        várias escritas de um documento inteiro, só a última é enviada) e
+        enviados em lotes quando a fila atinge `flush_size` itens ou quando o item mais
+        antigo espera `flush_interval` segundos.
+
+        A fila é limitada a `max_pending` itens: com o Firestore lento ou fora
+        do ar, os itens excedentes são descartados e contados em `dropped`, em
+        vez de acumular memória ou bloquear as requisições. Lotes que falham
+        voltam para a fila e são tentados de novo no ciclo seguinte.
+
+        Parameters
+        ----------
+        db_manager : app.models.database.FirestoreManager
+            Gerenciador de banco de dados do Firebase.
+        flush_size : int
+            Número de itens pendentes que dispara um envio imediato.
+        flush_interval : float
+            Tempo máximo, em segundos, que um item espera na fila.
+        max_pending : int
+            Número máximo de itens pendentes.
+        window : int
+            Quantidade de envios recentes usados nas métricas de latência.
+
+        Attributes
+        ----------
+        dropped : int
+            Número de itens descartados com a fila cheia.
+        flushes : int
+            Número de lotes enviados com sucesso.
+        failed_flushes : int
+            Número de lotes que falharam.
+        """
+        self.db = db_manager
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: "OrderedDict[tuple, dict]" = OrderedDict()
+        self._depth = 0
+        self._oldest = None
+        self._cond = threading.Condition()
+        self._thread = None
+        self._closed = False
+        self._latencies = deque(maxlen=window)
+        self.dropped = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.max_flush_latency = 0.0
+
+    @property
+    def depth(self) -> int:
+        """Número de itens aguardando envio."""
+        return self._depth
+
+    def add_to_metadata_list(self, list_name: str, item: str):
+        """Adiciona um item a uma lista de metadados (ex: known_people)."""
+        self.array_union("metadata", "nlp_settings", {list_name: [item]})
+
+    def create_or_update_my_search_history(self, identifier: str, query: str):
+        """Adiciona uma busca ao histórico do usuário."""
+        self.array_union(
+            HISTORY_COLLECTION,
+            identifier,
+            {"queries": [FirestoreManager.history_entry(query)]},
+        )
+
+    def set_document(self, collection: str, doc_id: str, data: dict) -> bool:
+        """Enfileira a gravação (ou sobrescrita) de um documento inteiro."""
+        return self._submit((collection, doc_id), {_DOCUMENT: [data]})
+
+    def delete_document(self, collection: str, doc_id: str) -> bool:
+        """Enfileira a remoção de um documento."""
+        return self._submit((collection, doc_id), {_DOCUMENT: [None]})
+
+    def array_union(self, collection: str, doc_id: str, fields: dict) -> bool:
+        """
+        Enfileira itens a serem acrescentados a campos de lista de um documento.
+
+        Returns
+        -------
+        bool
+            False se os itens foram descartados por falta de espaço.
+        """
+        return self._submit((collection, doc_id), fields)
+
+    def _submit(self, key: tuple, fields: dict) -> bool:
+        with self._cond:
+            if self._closed:
+                closed = True
+            else:
+                closed = False
+                pending = self._pending.get(key, {})
+                count = sum(
+                    int(_DOCUMENT not in pending) if field == _DOCUMENT else len(items)
+                    for field, items in fields.items()
+                )
+                if self._depth + count > self.max_pending:
+                    self.dropped += count
+                    logging.warning(
+                        f"✍️ [WRITE-BEHIND] Fila cheia, {count} item(ns) descartado(s)."
+                    )
+                    return False
+                was_empty = self._oldest is None
+                self._enqueue(key, fields)
+                self._ensure_started()
+                # Acorda o envio para contar o prazo do primeiro item ou
+                # enviar a fila cheia.
+                if was_empty or self._depth >= self.flush_size:
+                    self._cond.notify()
+        if closed:
+            # Depois do encerramento, a escrita é feita na hora.
+            self._write({key: fields})
+        return True
+
+    def _enqueue(self, key: tuple, fields: dict, front: bool = False):
+        pending = self._pending.setdefault(key, {})
+        for field, items in fields.items():
+            current = pending.get(field, [])
+            if field == _DOCUMENT:
+                # Uma escrita que volta para a fila não substitui uma mais nova.
+                pending[field] = current if front and current else list(items)[-1:]
+                self._depth += len(pending[field]) - len(current)
+                continue
+            pending[field] = list(items) + current if front else current + list(items)
+            self._depth += len(items)
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+
+    def _ensure_started(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="write-behind", daemon=True
+            )
+            self._thread.start()
+
+    def _due(self) -> bool:
+        if self._depth >= self.flush_size:
+            return True
+        return (
+            self._oldest is not None
+            and time.monotonic() - self._oldest >= self.flush_interval
+        )
+
+    def _take(self) -> "OrderedDict[tuple, dict]":
+        pending, self._pending = self._pending, OrderedDict()
+        self._depth = 0
+        self._oldest = None
+        return pending
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed and not self._due():
+                    timeout = None
+                    if self._oldest is not None:
+                        timeout = max(
+                            0.0, self._oldest + self.flush_interval - time.monotonic()
+                        )
+                    self._cond.wait(timeout)
+                closing = self._closed
+                pending = self._take()
+
+            failed = self._write(pending) if pending else {}
+
+            with self._cond:
+                if closing:
+                    self.dropped += _count(failed)
+                    if not self._pending:
+                        return
+                    continue
+                if failed:
+                    for key, fields in reversed(failed.items()):
+                        self._enqueue(key, fields, front=True)
+                    self._trim()
+                    # Espera um ciclo antes de tentar de novo.
+                    self._cond.wait(self.flush_interval)
+
+    def _trim(self):
+        while self._depth > self.max_pending and self._pending:
+            _, fields = self._pending.popitem(last=True)
+            count = sum(len(items) for items in fields.values())
+            self._depth -= count
+            self.dropped += count
+
+    @staticmethod
+    def _units(pending: dict):
+        """
+        Divide os documentos pendentes em `(chave, campos, escritas)`.
+
+        Cada entrada do histórico é um documento próprio (mais o contador do
+        usuário); as demais chaves viram uma única escrita `ArrayUnion`.
+        """
+        for key, fields in pending.items():
+            if key[0] != HISTORY_COLLECTION:
+                yield key, fields, 1
+                continue
+            entries = fields["queries"]
+            for start in range(0, len(entries), BATCH_LIMIT - 1):
+                part = entries[start : start + BATCH_LIMIT - 1]
+                yield key, {"queries": part}, len(part) + 1
+
+    def _chunks(self, pending: dict):
+        chunk, cost = [], 0
+        for key, fields, writes in self._units(pending):
+            if chunk and cost + writes > BATCH_LIMIT:
+                yield chunk
+                chunk, cost = [], 0
+            chunk.append((key, fields))
+            cost += writes
+        if chunk:
+            yield chunk
+
+    def _write(self, pending: dict) -> dict:
+        """Envia os documentos pendentes. Retorna os que falharam."""
+        failed = {}
+        for chunk in self._chunks(pending):
+            started = time.monotonic()
+            writes = self.db.batch()
+            for (collection, doc_id), fields in chunk:
+                if collection == HISTORY_COLLECTION:
+                    writes.add_history_entries(doc_id, fields["queries"])
+                elif _DOCUMENT in fields:
+                    data = fields[_DOCUMENT][-1]
+                    if data is None:
+                        writes.delete_document(collection, doc_id)
+                    else:
+                        writes.set_document(collection, doc_id, data)
+                else:
+                    writes.array_union(collection, doc_id, fields)
+            ok = writes.commit()
+            latency = time.monotonic() - started
+
+            with self._cond:
+                self._latencies.append(latency)
+                self.max_flush_latency = max(self.max_flush_latency, latency)
+                if ok:
+                    self.flushes += 1
+                else:
+                    self.failed_flushes += 1
+            if not ok:
+                for key, fields in chunk:
+                    merged = failed.setdefault(key, {})
+                    for field, items in fields.items():
+                        merged[field] = merged.get(field, []) + items
+        return failed
+
+    def flush(self):
+        """Envia imediatamente os itens pendentes, no thread de quem chama."""
+        with self._cond:
+            pending = self._take()
+        failed = self._write(pending) if pending else {}
+        with self._cond:
+            for key, fields in reversed(failed.items()):
+                self._enqueue(key, fields, front=True)
+            self._trim()
+
+    def close(self, timeout: float = 10.0):
+        """
+        Envia os itens pendentes e encerra a fila.
+
+        Deve ser chamado no desligamento da instância, ao receber SIGTERM
+        (veja `app.utils.shutdown.on_shutdown`): o `atexit` sozinho não roda
+        quando o processo é encerrado pelo sinal. Escritas recebidas depois
+        disso são feitas de forma síncrona, e uma nova chamada envia o que
+        tiver sobrado.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        if thread is None or not thread.is_alive():
+            with self._cond:
+                pending = self._take()
+            if pending:
+                self.dropped += _count(self._write(pending))
+
+    def stats(self) -> dict:
+        """Retorna a profundidade da fila e as métricas de envio."""
+        with self._cond:
+            latencies = sorted(self._latencies)
+            return {
+                "depth": self._depth,
+                "documents": len(self._pending),
+                "dropped": self.dropped,
+                "flushes": self.flushes,
+                "failed_flushes": self.failed_flushes,
+                "avg_flush_latency": (
+                    sum(latencies) / len(latencies) if latencies else 0.0
+                ),
+                "p95_flush_latency": (
+                    latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0
+                ),
+                "max_flush_latency": self.max_flush_latency,
+            }
+
+
+def _count(pending: dict) -> int:
+    return sum(len(items) for fields in pending.values() for items in fields.values())
@@ -0,0 +1,226 @@
+"""Dublês e dados compartilhados pelos testes unitários."""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.controllers import insight_controller
+from app.models.entities import CharacterSchema
+
+leia = {
+    "name": "Leia Organa",
+    "birth_year": "19BBY",
+    "eye_color": "brown",
+    "gender": "female",
+    "hair_color": "brown",
+    "skin_color": "light",
+    "height": "150",
+    "mass": "49",
+    "homeworld": "https://swapi.dev/api/planets/2/",
+    "films": ["https://swapi.dev/api/films/1/", "https://swapi.dev/api/films/2/"],
+    "species": [],
+    "starships": [],
+    "vehicles": ["https://swapi.dev/api/vehicles/30/"],
+    "url": "https://swapi.dev/api/people/5/",
+    "created": "2014-12-10T15:20:09.791000Z",
+    "edited": "2014-12-20T21:17:50.315000Z",
+}
+
+luke = {
+    "name": "Luke Skywalker",
+    "birth_year": "19BBY",
+    "eye_color": "blue",
+    "gender": "male",
+    "hair_color": "blond",
+    "skin_color": "fair",
+    "height": "172",
+    "mass": "77",
+    "homeworld": "Tatooine",
+    "films": [],
+    "species": [],
+    "starships": [],
+    "vehicles": [],
+    "url": "https://swapi.dev/api/people/1/",
+    "created": "2014-12-09T13:50:51.644000Z",
+    "edited": "2014-12-20T21:17:56.891000Z",
+}
+
+kamino = {
+    "name": "Kamino",
+    "rotation_period": "27",
+    "orbital_period": "463",
+    "diameter": "19720",
+    "climate": "temperate",
+    "gravity": "1 standard",
+    "terrain": "ocean",
+    "surface_water": "100",
+    "population": "1000000000",
+    "residents": [],
+    "films": [],
+    "created": "2014-12-10T12:45:06.577000Z",
+    "edited": "2014-12-20T20:58:18.434000Z",
+    "url": "https://swapi.dev/api/planets/10/",
+}
+
+
+class StubBatch:
+    """Lote que aplica as escritas no banco de teste apenas em `commit()`."""
+
+    def __init__(self, db):
+        self.db = db
+        self.ops = []
+        self.callbacks = []
+
+    def set(self, collection, name, data):
+        self.ops.append(("set", (collection, name, dict(data))))
+
+    def set_document(self, collection, doc_id, data):
+        self.ops.append(("set_document", (collection, doc_id, data)))
+
+    def delete_document(self, collection, doc_id):
+        self.ops.append(("delete_document", (collection, doc_id)))
+
+    def add_to_metadata_list(self, list_name, item):
+        self.ops.append(("add_to_metadata_list", (list_name, item)))
+
+    def merge_metadata(self, doc_name, data):
+        self.ops.append(("merge_metadata", (doc_name, data)))
+
+    def create_or_update_my_search_history(self, identifier, query):
+        self.ops.append(("create_or_update_my_search_history", (identifier, query)))
+
+    def after_commit(self, callback):
+        self.callbacks.append(callback)
+
+    def commit(self):
+        ops, self.ops = self.ops, []
+        for name, args in ops:
+            getattr(self.db, name)(*args)
+        callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            callback()
+        return True
+
+
+class StubDB:
+    """
+    Banco em memória com a interface do `FirestoreManager` usada pelos serviços.
+
+    Os documentos ficam em `docs`, por `(coleção, ID)`; como no
+    `FirestoreManager`, cada leitura recebe uma cópia própria.
+    """
+
+    def __init__(self, docs=None):
+        self.docs = {} if docs is None else docs
+        self.metadata = {}
+        self.merged = []
+        self.reads = 0
+        self.writes = 0
+        self.deletes = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def doc_id(name):
+        return name.lower()
+
+    def get(self, collection, name):
+        doc = self.docs.get((collection, self.doc_id(name)))
+        return dict(doc) if doc else None
+
+    def get_many(self, refs):
+        self.reads += 1
+        return [dict(self.docs[ref]) if ref in self.docs else None for ref in refs]
+
+    def get_document(self, collection, doc_id):
+        return self.docs.get((collection, doc_id))
+
+    def get_metadata(self, doc_name):
+        return self.metadata.get(doc_name, {})
+
+    def batch(self):
+        return StubBatch(self)
+
+    def set(self, collection, name, data):
+        with self.lock:
+            self.writes += 1
+            self.docs[(collection, self.doc_id(name))] = dict(data)
+
+    def set_document(self, collection, doc_id, data):
+        self.docs[(collection, doc_id)] = data
+
+    def delete_document(self, collection, doc_id):
+        self.deletes += 1
+        self.docs.pop((collection, doc_id), None)
+
+    def merge_metadata(self, doc_name, data):
+        self.merged.append((doc_name, data))
+
+    def add_to_metadata_list(self, list_name, item):
+        pass
+
+
+class StubSWAPI:
+    """
+    SWAPI sem rede.
+
+    `fetch_hydrated` retorna `results[entity_type]` (None para os tipos
+    ausentes), depois de esperar `delays[entity_type]` segundos. Com
+    `entities=False`, `get_entity_by_url` não encontra nada.
+    """
+
+    def __init__(self, results=None, delays=None, failed=False, entities=True):
+        self.results = (
+            {"people": CharacterSchema(**leia)} if results is None else results
+        )
+        self.delays = delays or {}
+        self.failed = failed
+        self.entities = entities
+        self.searches = []
+        self.url_calls = []
+        self.lock = threading.Lock()
+
+    @property
+    def calls(self):
+        return len(self.searches)
+
+    def fetch_hydrated(self, name, entity_type):
+        with self.lock:
+            self.searches.append(entity_type)
+        time.sleep(self.delays.get(entity_type, 0))
+        return self.results.get(entity_type)
+
+    def last_request_failed(self):
+        return self.failed
+
+    def get_entity_by_url(self, url):
+        with self.lock:
+            self.url_calls.append(url)
+        if not self.entities:
+            return None
+        return SimpleNamespace(name=f"name of {url}", title=f"title of {url}")
+
+
+class StubNLP:
+    def __init__(self, db, **kwargs):
+        pass
+
+    def _fuzzy_correction(self, name):
+        return name
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def stub_nlp(monkeypatch):
+    """Substitui o `NLPService` do controlador por um que não corrige nomes."""
+    monkeypatch.setattr(insight_controller, "NLPService", StubNLP)
+    return StubNLP
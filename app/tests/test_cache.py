@@ -0,0 +1,46 @@
+import time
+
+from app.models.cache import TTLCache
+from app.models.data_service import DataService
+from app.tools.swapi_stub import StubSWAPIClient, SWAPIStubServer
+
+
+def test_lru_eviction():
+    """Testa se a entrada menos usada é descartada ao atingir o limite."""
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.evictions == 1
+
+
+def test_ttl_expiration():
+    """Testa se entradas vencidas deixam de ser retornadas."""
+    cache = TTLCache(max_size=10, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_hydration_reuses_cached_urls():
+    """Testa se a hidratação de um segundo personagem reaproveita os filmes já resolvidos."""
+    with SWAPIStubServer() as stub:
+        client = StubSWAPIClient(stub, url_cache=TTLCache())
+        service = DataService(db_manager=None, swapi_client=client)
+        first = {"films": stub.httpd.catalog["people"][0]["films"]}
+        second = {"films": list(reversed(first["films"]))}
+
+        service.hydrate_all_parallel(first)
+        requests_after_first = stub.request_count
+        hits_after_first = client.url_cache.hits
+        service.hydrate_all_parallel(second)
+
+    assert second["films"] == list(reversed(first["films"]))
+    assert stub.request_count == requests_after_first
+    assert client.url_cache.hits - hits_after_first == len(set(second["films"]))
@@ -0,0 +1,173 @@
+import json
+import socket
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.controllers import insight_controller
+from app.models.cache import TTLCache
+from app.models.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from app.models.data_service import CACHED_AT_FIELD, DataService
+from app.models.entities import CharacterSchema
+from app.models.swapi import AsyncSWAPIClient, SWAPIClient
+from app.tests.conftest import StubDB, StubSWAPI, leia, wait_until
+
+
+def test_breaker_opens_and_recovers():
+    """Testa a transição fechado -> aberto -> meio-aberto -> fechado."""
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_client_fails_fast_when_swapi_is_down():
+    """Testa se o cliente deixa de chamar a rede com o circuito aberto."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    client = SWAPIClient(
+        base_url=f"http://127.0.0.1:{port}/api",
+        max_retries=0,
+        url_cache=TTLCache(),
+        circuit_breaker=CircuitBreaker(failure_threshold=3, reset_timeout=60),
+    )
+
+    for i in range(10):
+        assert client.get_entity_by_url(f"{client.base_url}/people/{i}/") is None
+
+    assert client.breaker.state == OPEN
+    assert client.breaker.rejected == 7
+    assert client.last_request_failed()
+
+
+def test_default_client_does_not_retry_network_errors():
+    """Testa se, com os valores padrão, cada falha de rede é uma única tentativa."""
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen()
+    attempts = []
+
+    def accept_and_drop():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            attempts.append(conn)
+            conn.close()
+
+    threading.Thread(target=accept_and_drop, daemon=True).start()
+    client = SWAPIClient(
+        base_url=f"http://127.0.0.1:{server.getsockname()[1]}/api",
+        url_cache=TTLCache(),
+        circuit_breaker=CircuitBreaker(failure_threshold=3, reset_timeout=60),
+    )
+
+    start = time.monotonic()
+    for i in range(10):
+        assert client.get_entity_by_url(f"{client.base_url}/people/{i}/") is None
+    server.close()
+
+    assert time.monotonic() - start < 2
+    assert len(attempts) == 3
+    assert client.breaker.state == OPEN
+
+
+def test_unexpected_error_releases_half_open_trial(monkeypatch):
+    """Testa se uma exceção qualquer na chamada de teste não trava o circuito."""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    client = SWAPIClient(url_cache=TTLCache(), circuit_breaker=breaker)
+    breaker.record_failure()
+    time.sleep(0.06)
+
+    def broken_get(url, timeout=None):
+        raise RuntimeError("falha inesperada")
+
+    monkeypatch.setattr(client.session, "get", broken_get)
+    with pytest.raises(RuntimeError):
+        client._get_request(f"{client.base_url}/people/1/")
+
+    assert breaker.state == OPEN
+    time.sleep(0.06)
+    assert breaker.allow()
+
+
+async def test_async_client_shares_the_breaker():
+    """Testa se o cliente assíncrono conta e respeita as falhas do disjuntor."""
+    calls = []
+
+    def unavailable(request):
+        calls.append(request.url)
+        return httpx.Response(503)
+
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    sync_client = SWAPIClient(
+        max_retries=0, url_cache=TTLCache(), circuit_breaker=breaker
+    )
+    async with AsyncSWAPIClient(
+        max_retries=0,
+        transport=httpx.MockTransport(unavailable),
+        url_cache=TTLCache(),
+        circuit_breaker=sync_client.breaker,
+    ) as client:
+        for i in range(4):
+            assert (
+                await client.get_entity_by_url(f"{client.base_url}/people/{i}/") is None
+            )
+
+    assert len(calls) == 2
+    assert breaker.state == OPEN
+    assert breaker.rejected == 2
+    assert sync_client.get_entity_by_url(f"{sync_client.base_url}/people/1/") is None
+    assert breaker.rejected == 3
+
+
+def test_document_without_cached_at_is_fresh():
+    """Testa se documentos gravados antes do `_cached_at` não são revalidados."""
+    service = DataService(StubDB(), StubSWAPI())
+
+    assert not service.is_stale(CharacterSchema(**leia).model_dump())
+    assert service.is_stale({CACHED_AT_FIELD: "2020-01-01T00:00:00+00:00"})
+
+
+def test_stale_document_is_served_and_revalidated(stub_nlp):
+    """Testa se um documento vencido é servido na hora e atualizado em segundo plano."""
+    db = StubDB()
+    stale = {
+        **CharacterSchema(**leia).model_dump(),
+        "homeworld": "Alderaan",
+        "type": "people",
+        CACHED_AT_FIELD: "2020-01-01T00:00:00+00:00",
+    }
+    db.set("people", "Leia Organa", stale)
+    edited = {**leia, "edited": "2015-01-01T00:00:00.000000Z", "homeworld": "Alderaan"}
+    swapi = StubSWAPI(results={"people": CharacterSchema(**edited)}, entities=False)
+    controller = insight_controller.InsightController(db, swapi)
+    request = SimpleNamespace(
+        args={"name": "Leia Organa", "type": "people", "filter": "height"}
+    )
+
+    body, status, _ = controller.handle_insight(request)
+
+    assert status == 200
+    assert json.loads(body)["source"] == "firestore-stale"
+    assert wait_until(
+        lambda: db.docs[("people", "leia organa")].get("edited")
+        == "2015-01-01T00:00:00.000000Z"
+    )
+
+    body, _, _ = controller.handle_insight(request)
+    assert json.loads(body)["source"] == "firestore"
@@ -0,0 +1,157 @@
+from types import SimpleNamespace
+
+from app.models.cache import TTLCache
+from app.models.database import FirestoreManager, new_l1_cache
+
+
+class FakeDocRef:
+    def __init__(self, client, key):
+        self.client = client
+        self.key = key
+
+    def snapshot(self):
+        data = self.client.docs.get(self.key)
+        return SimpleNamespace(
+            exists=data is not None,
+            id=self.key[1],
+            reference=SimpleNamespace(parent=SimpleNamespace(id=self.key[0])),
+            to_dict=lambda: dict(data) if data else None,
+        )
+
+    def get(self):
+        self.client.reads += 1
+        return self.snapshot()
+
+    def set(self, data, merge=False):
+        current = self.client.docs.get(self.key, {}) if merge else {}
+        self.client.docs[self.key] = {**current, **data}
+
+    def delete(self):
+        self.client.docs.pop(self.key, None)
+
+
+class FakeBatch:
+    def __init__(self, client):
+        self.client = client
+        self.ops = []
+
+    def set(self, ref, data, merge=False):
+        self.ops.append((ref, data, merge))
+
+    def commit(self):
+        self.client.commits += 1
+        for ref, data, merge in self.ops:
+            ref.set(data, merge=merge)
+
+
+class FakeClient:
+    def __init__(self, project=None):
+        self.docs = {}
+        self.reads = 0
+        self.commits = 0
+
+    def collection(self, name):
+        return SimpleNamespace(document=lambda doc_id: FakeDocRef(self, (name, doc_id)))
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def get_all(self, refs):
+        self.reads += 1
+        return [ref.snapshot() for ref in refs]
+
+
+def make_manager(l1_cache=None):
+    return FirestoreManager("test", l1_cache=l1_cache, client=FakeClient())
+
+
+def test_get_is_read_through_and_set_is_write_through():
+    """Testa se leituras repetidas não voltam ao Firestore."""
+    manager = make_manager()
+    manager.db.docs[("people", "luke_skywalker")] = {"name": "Luke Skywalker"}
+
+    for _ in range(5):
+        assert manager.get("people", "Luke Skywalker") == {"name": "Luke Skywalker"}
+    assert manager.db.reads == 1
+
+    manager.set("people", "Luke Skywalker", {"name": "Luke", "height": "172"})
+    assert manager.get_document("people", "luke_skywalker")["height"] == "172"
+    assert manager.db.reads == 1
+
+    manager.delete_document("people", "luke_skywalker")
+    assert manager.get("people", "Luke Skywalker") is None
+    assert manager.db.reads == 2
+    assert manager.cache_stats()["hit_ratio"] == 5 / 7
+
+
+def test_cached_documents_are_copies():
+    """Testa se alterar o documento retornado não altera o cache."""
+    manager = make_manager()
+    manager.set_document("planets", "tatooine", {"name": "Tatooine"})
+
+    manager.get_document("planets", "tatooine")["name"] = "Alterado"
+
+    assert manager.get_document("planets", "tatooine") == {"name": "Tatooine"}
+
+
+def test_l1_cache_is_bounded_by_bytes():
+    """Testa se o cache descarta documentos ao ultrapassar o limite de bytes."""
+    manager = make_manager(l1_cache=new_l1_cache(max_bytes=1000))
+    for i in range(20):
+        manager.set_document("people", str(i), {"bio": "x" * 200})
+
+    stats = manager.cache_stats()
+    assert stats["resident_bytes"] <= 1000
+    assert stats["evictions"] > 0
+    assert manager.get_document("people", "19") == {"bio": "x" * 200}
+
+
+def test_ttl_cache_skips_values_larger_than_the_budget():
+    """Testa se um valor maior que o limite não esvazia o cache."""
+    cache = TTLCache(max_bytes=10, sizeof=len)
+    cache.set("a", b"12345")
+    cache.set("b", b"x" * 50)
+
+    assert cache.get("a") == b"12345"
+    assert "b" not in cache
+
+
+def test_get_many_reads_missing_documents_in_one_call():
+    """Testa se `get_many` busca em uma chamada apenas o que não está no L1."""
+    manager = make_manager()
+    manager.set_document("people", "leia_organa", {"name": "Leia Organa"})
+    manager.db.docs[("planets", "alderaan")] = {"name": "Alderaan"}
+
+    docs = manager.get_many(
+        [
+            ("people", "leia_organa"),
+            ("planets", "alderaan"),
+            ("negative_cache", "people__leia"),
+        ]
+    )
+
+    assert docs == [{"name": "Leia Organa"}, {"name": "Alderaan"}, None]
+    assert manager.db.reads == 1
+    assert manager.get_document("planets", "alderaan") == {"name": "Alderaan"}
+    assert manager.db.reads == 1
+
+
+def test_batch_commits_all_writes_at_once():
+    """Testa se as escritas do lote são enviadas em um único commit."""
+    manager = make_manager()
+    manager.get_document("metadata", "url_names")
+    calls = []
+
+    with manager.batch() as writes:
+        writes.set("people", "Leia Organa", {"name": "Leia Organa"})
+        writes.merge_metadata("url_names", {"names": {"people": {"5": "Leia"}}})
+        writes.after_commit(lambda: calls.append(manager.db.commits))
+        assert manager.db.docs == {}
+
+    assert manager.db.commits == 1
+    assert calls == [1]
+    assert manager.db.docs[("people", "leia_organa")] == {"name": "Leia Organa"}
+    assert manager.get("people", "Leia Organa") == {"name": "Leia Organa"}
+    assert manager.get_document("metadata", "url_names") == {
+        "names": {"people": {"5": "Leia"}}
+    }
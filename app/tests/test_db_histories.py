@@ -1,4 +1,5 @@
 import os
+from datetime import datetime
 
 import dotenv
 
@@ -33,3 +34,38 @@ def test_delete_history():
     db_manager.delete_history(user)
     history = db_manager.get_my_search_history(user)
     assert history is None
+
+
+def test_legacy_entries_are_merged_until_compaction():
+    legacy_user = "legacy@test.com"
+    db_manager.delete_history(legacy_user)
+    db_manager._history_ref(legacy_user).set(
+        {
+            "queries": [
+                {"query": "Altura do Luke", "timestamp": "2020-01-01 10:00:00"},
+                {"query": "Peso do Chewbacca", "timestamp": "2020-01-02 10:00:00"},
+            ]
+        }
+    )
+    db_manager.create_or_update_my_search_history(legacy_user, "Altura do Yoda")
+
+    history = db_manager.get_my_search_history(legacy_user)
+    assert [q["query"] for q in history["queries"]] == [
+        "Altura do Yoda",
+        "Peso do Chewbacca",
+        "Altura do Luke",
+    ]
+
+    first = db_manager.get_my_search_history(legacy_user, limit=2)
+    assert [q["query"] for q in first["queries"]] == [
+        "Altura do Yoda",
+        "Peso do Chewbacca",
+    ]
+    second = db_manager.get_my_search_history(
+        legacy_user,
+        limit=2,
+        before=datetime.fromisoformat(first["next_before"]),
+    )
+    assert [q["query"] for q in second["queries"]] == ["Altura do Luke"]
+    assert second["next_before"] is None
+    db_manager.delete_history(legacy_user)
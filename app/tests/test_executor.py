@@ -0,0 +1,53 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from app.models.data_service import DataService
+from app.models.executor import HydrationExecutor
+
+
+class SlowSWAPI:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def get_entity_by_url(self, url):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.02)
+        with self.lock:
+            self.in_flight -= 1
+        return SimpleNamespace(name=url.rsplit("/", 2)[-2])
+
+
+def film(offset):
+    return {
+        "characters": [
+            f"https://swapi.dev/api/people/{offset + i}/" for i in range(1, 11)
+        ]
+    }
+
+
+def test_requests_share_global_concurrency_budget():
+    """Testa se várias hidratações simultâneas respeitam o limite do executor."""
+    executor = HydrationExecutor(max_workers=3)
+    swapi = SlowSWAPI()
+    service = DataService(db_manager=None, swapi_client=swapi, executor=executor)
+
+    with ThreadPoolExecutor(max_workers=4) as requests:
+        films = list(
+            requests.map(
+                lambda i: service.hydrate_all_parallel(film(i * 100)), range(4)
+            )
+        )
+
+    stats = executor.stats()
+    assert swapi.max_in_flight == 3
+    assert stats["submitted"] == stats["completed"] == 40
+    assert stats["queue_depth"] == 0
+    assert stats["max_wait_ms"] > 0
+    assert films[1]["characters"][0] == "101"
+    executor.shutdown()
@@ -0,0 +1,80 @@
+import random
+from difflib import get_close_matches
+
+from app.models.fuzzy_index import FuzzyIndex
+
+SYLLABLES = [
+    "an", "ak", "ar", "bo", "da", "dar", "ek", "en", "fa", "ga", "ho", "ja",
+    "ka", "ki", "lu", "ma", "na", "ne", "ob", "or", "pa", "qui", "ra", "sa",
+    "sky", "ta", "th", "to", "va", "wa", "wo", "yo", "za",
+]  # fmt: skip
+
+
+def make_names(size: int, rng: random.Random) -> list[str]:
+    names = set()
+    while len(names) < size:
+        words = [
+            "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4)))
+            for _ in range(rng.randint(1, 3))
+        ]
+        names.add(" ".join(words).title())
+    return sorted(names)
+
+
+def make_typo(name: str, rng: random.Random) -> str:
+    chars = list(name)
+    for _ in range(rng.randint(0, 2)):
+        position = rng.randrange(len(chars))
+        operation = rng.choice(("delete", "insert", "replace"))
+        if operation == "delete" and len(chars) > 1:
+            chars.pop(position)
+        elif operation == "insert":
+            chars.insert(position, rng.choice("aeiourst"))
+        else:
+            chars[position] = rng.choice("aeiourst")
+    return "".join(chars)
+
+
+def test_matches_difflib_on_random_catalog():
+    """Testa se o índice retorna exatamente o mesmo que o difflib."""
+    rng = random.Random(3)
+    names = make_names(200, rng) + ["Yoda", "Yoda", "Darth Vader", "A New Hope"]
+    index = FuzzyIndex(names)
+    words = [make_typo(rng.choice(names), rng) for _ in range(40)]
+    words += ["yoda", "Vader", "New Hope", "x", "Ç"]
+
+    for word in words:
+        for cutoff in (0.0, 0.6, 0.7, 0.9, 1.0):
+            for n in (1, 3):
+                assert index.get_close_matches(word, n, cutoff) == (
+                    get_close_matches(word, names, n, cutoff)
+                ), (word, n, cutoff)
+
+
+def test_ties_and_repeated_names_follow_difflib():
+    """Testa o desempate pelo maior nome e a repetição de nomes."""
+    names = ["Luke", "Duke", "Luke"]
+    index = FuzzyIndex(names)
+
+    assert index.best_match("Xuke", cutoff=0.7) == "Luke"
+    assert index.get_close_matches("Xuke", n=3, cutoff=0.7) == [
+        "Luke",
+        "Luke",
+        "Duke",
+    ]
+    assert index.best_match("Obi-Wan", cutoff=0.7) is None
+    assert len(index) == 3
+
+
+def test_batch_matches_single_queries():
+    """Testa se a busca em lote dá o mesmo resultado da busca por palavra."""
+    rng = random.Random(5)
+    names = make_names(300, rng) + ["Yoda", "Yoda"]
+    index = FuzzyIndex(names)
+    words = [make_typo(rng.choice(names), rng) for _ in range(30)]
+    words += ["yoda", "yoda", "", "Ç"]
+
+    for cutoff in (0.0, 0.7):
+        assert index.get_close_matches_many(words, n=2, cutoff=cutoff) == [
+            get_close_matches(word, names, 2, cutoff) for word in words
+        ]
@@ -0,0 +1,65 @@
+from datetime import datetime, timezone
+
+from app.controllers import insight_controller
+from app.tests.conftest import StubDB
+
+user = {"email": "test@test.com"}
+
+
+class HistoryDB(StubDB):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def get_my_search_history(
+        self, identifier, limit=None, before=None, before_id=None
+    ):
+        self.calls.append((identifier, limit, before, before_id))
+        return {"queries": [], "next_before": None}
+
+
+def make_controller():
+    db = HistoryDB()
+    return insight_controller.InsightController(db, None), db
+
+
+def test_history_pagination_params(stub_nlp):
+    """Testa se `limit` e `before` são repassados ao banco."""
+    controller, db = make_controller()
+
+    _, status = controller.get_my_history(user)
+    assert status == 200
+    assert db.calls[-1] == (
+        user["email"],
+        insight_controller.HISTORY_PAGE_SIZE,
+        None,
+        None,
+    )
+
+    cursor = "2026-02-03T14:30:05.123000+00:00/abc123"
+    _, status = controller.get_my_history(user, {"limit": "5", "before": cursor})
+    assert status == 200
+    assert db.calls[-1] == (
+        user["email"],
+        5,
+        datetime(2026, 2, 3, 14, 30, 5, 123000, tzinfo=timezone.utc),
+        "abc123",
+    )
+
+
+def test_invalid_history_pagination_is_rejected(stub_nlp):
+    """Testa se parâmetros de paginação inválidos retornam 400."""
+    controller, db = make_controller()
+
+    for params in (
+        {"limit": "0"},
+        {"limit": "abc"},
+        {"limit": "1000"},
+        {"before": "x"},
+    ):
+        body, status = controller.get_my_history(user, params)
+        assert status == 400
+        assert body["error"] == "Invalid pagination"
+    assert db.calls == []
+
+    assert controller.get_my_history(None)[1] == 401
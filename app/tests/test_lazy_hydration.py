@@ -0,0 +1,143 @@
+import json
+import threading
+from types import SimpleNamespace
+
+from app.controllers import insight_controller
+from app.models.data_service import PENDING_HYDRATION_FIELD
+from app.models.entities import CharacterSchema
+from app.tests.conftest import StubDB, StubNLP, StubSWAPI, leia, wait_until
+
+
+def make_controller(monkeypatch):
+    monkeypatch.setattr(insight_controller, "NLPService", StubNLP)
+    db, swapi = StubDB(), StubSWAPI()
+    return insight_controller.InsightController(db, swapi), db, swapi
+
+
+def test_filter_skips_unrequested_hydration(monkeypatch):
+    """Testa se um filtro sem campos relacionais responde sem hidratar nada."""
+    controller, db, swapi = make_controller(monkeypatch)
+    request = SimpleNamespace(
+        args={"name": "Leia Organa", "type": "people", "filter": "height"}
+    )
+
+    body, status, _ = controller.handle_insight(request)
+
+    assert status == 200
+    assert json.loads(body)["insight_value"] == {"height": 150}
+    assert wait_until(
+        lambda: PENDING_HYDRATION_FIELD
+        not in db.docs.get(("people", "leia organa"), {PENDING_HYDRATION_FIELD: 1})
+    )
+    assert db.docs[("people", "leia organa")]["homeworld"].startswith("name of")
+
+
+def test_filter_hydrates_only_requested_field(monkeypatch):
+    """Testa se apenas o campo relacional pedido é hidratado antes da resposta."""
+    controller, db, swapi = make_controller(monkeypatch)
+    # Documento salvo por uma busca anterior, ainda com campos pendentes.
+    controller.data_service.cache_new_data(
+        "people",
+        "Leia Organa",
+        controller.data_service.mark_pending_hydration(
+            {**CharacterSchema(**leia).model_dump(), "type": "people"}
+        ),
+    )
+    request = SimpleNamespace(
+        args={"name": "Leia Organa", "type": "people", "filter": "homeworld"}
+    )
+
+    body, status, _ = controller.handle_insight(request)
+
+    assert status == 200
+    assert json.loads(body)["insight_value"] == {
+        "homeworld": "name of https://swapi.dev/api/planets/2/"
+    }
+    assert swapi.url_calls[0] == "https://swapi.dev/api/planets/2/"
+    assert wait_until(lambda: len(swapi.url_calls) == 4)
+
+
+def test_unfiltered_request_returns_fully_hydrated(monkeypatch):
+    """Testa se, sem filtro, a resposta vem totalmente hidratada e sem marcação."""
+    controller, db, swapi = make_controller(monkeypatch)
+    request = SimpleNamespace(args={"name": "Leia Organa", "type": "people"})
+
+    body, status, _ = controller.handle_insight(request)
+    insight = json.loads(body)["insight_value"]
+
+    assert status == 200
+    assert PENDING_HYDRATION_FIELD not in insight
+    assert insight["films"][0] == "title of https://swapi.dev/api/films/1/"
+    assert PENDING_HYDRATION_FIELD not in db.docs[("people", "leia organa")]
+
+
+def test_hydrated_firestore_hit_is_persisted(monkeypatch):
+    """Testa se um documento pendente, hidratado por inteiro em um acesso, é salvo."""
+    controller, db, swapi = make_controller(monkeypatch)
+    controller.data_service.cache_new_data(
+        "people",
+        "Leia Organa",
+        controller.data_service.mark_pending_hydration(
+            {**CharacterSchema(**leia).model_dump(), "type": "people"}
+        ),
+    )
+    request = SimpleNamespace(args={"name": "Leia Organa", "type": "people"})
+
+    bodies = [controller.handle_insight(request)[0] for _ in range(3)]
+
+    assert len(swapi.url_calls) == 4
+    assert bodies[0] == bodies[1] == bodies[2]
+    stored = db.docs[("people", "leia organa")]
+    assert PENDING_HYDRATION_FIELD not in stored
+    assert stored["homeworld"] == "name of https://swapi.dev/api/planets/2/"
+
+
+def test_pending_firestore_hit_is_completed_in_background(monkeypatch):
+    """Testa se um acesso que não hidrata nada ainda completa o documento salvo."""
+    controller, db, swapi = make_controller(monkeypatch)
+    controller.data_service.cache_new_data(
+        "people",
+        "Leia Organa",
+        controller.data_service.mark_pending_hydration(
+            {**CharacterSchema(**leia).model_dump(), "type": "people"}
+        ),
+    )
+    request = SimpleNamespace(
+        args={"name": "Leia Organa", "type": "people", "filter": "height"}
+    )
+
+    body, status, _ = controller.handle_insight(request)
+
+    assert status == 200
+    assert json.loads(body)["insight_value"] == {"height": 150}
+    assert wait_until(
+        lambda: PENDING_HYDRATION_FIELD not in db.docs[("people", "leia organa")]
+    )
+    assert len(swapi.url_calls) == 4
+
+
+def test_background_completion_runs_once_per_document(monkeypatch):
+    """Testa se acessos seguidos não repetem a hidratação em segundo plano."""
+    controller, db, swapi = make_controller(monkeypatch)
+    release = threading.Event()
+    get_entity_by_url = swapi.get_entity_by_url
+
+    def slow_get_entity_by_url(url):
+        release.wait(2)
+        return get_entity_by_url(url)
+
+    swapi.get_entity_by_url = slow_get_entity_by_url
+    data = controller.data_service.mark_pending_hydration(
+        {**CharacterSchema(**leia).model_dump(), "type": "people"}
+    )
+
+    first = controller.data_service.complete_hydration_in_background("people", data)
+    second = controller.data_service.complete_hydration_in_background("people", data)
+    release.set()
+    first.join(2)
+
+    assert second is None
+    assert len(swapi.url_calls) == 4
+    third = controller.data_service.complete_hydration_in_background("people", data)
+    assert third is not None
+    third.join(2)
@@ -0,0 +1,121 @@
+from datetime import datetime, timezone
+
+import pytest
+from google.api_core.exceptions import NotFound
+from google.cloud import firestore
+
+from app.models.database import FirestoreManager
+from app.models.local_firestore import LocalFirestoreClient, SQLiteStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def client(request, tmp_path):
+    if request.param == "memory":
+        return LocalFirestoreClient()
+    return LocalFirestoreClient(SQLiteStore(tmp_path / "firestore.sqlite3"))
+
+
+def test_transforms(client):
+    """Testa ArrayUnion, Increment, DELETE_FIELD e o merge de mapas aninhados."""
+    ref = client.collection("metadata").document("nlp_settings")
+    ref.set({"known_people": ["Yoda"], "names": {"people": {"1": "Luke"}}})
+
+    ref.set(
+        {
+            "known_people": firestore.ArrayUnion(["Yoda", "Leia Organa"]),
+            "names": {"planets": {"1": "Tatooine"}},
+            "count": firestore.Increment(2),
+        },
+        merge=True,
+    )
+    ref.update(
+        {"count": firestore.Increment(3), "names.people": firestore.DELETE_FIELD}
+    )
+
+    assert ref.get().to_dict() == {
+        "known_people": ["Yoda", "Leia Organa"],
+        "names": {"planets": {"1": "Tatooine"}},
+        "count": 5,
+    }
+    with pytest.raises(NotFound):
+        client.collection("metadata").document("missing").update({"a": 1})
+
+
+def test_batch_is_atomic(client):
+    """Testa se um lote com uma escrita inválida não aplica nenhuma escrita."""
+    batch = client.batch()
+    batch.set(client.collection("people").document("luke"), {"name": "Luke"})
+    batch.update(client.collection("people").document("missing"), {"a": 1})
+
+    with pytest.raises(NotFound):
+        batch.commit()
+    assert not client.collection("people").document("luke").get().exists
+
+
+def test_query_order_and_cursor(client):
+    """Testa order_by, limit e start_after em uma subcoleção."""
+    entries = client.collection("search_histories").document("u").collection("q")
+    for i in range(5):
+        entries.document().set({"n": i})
+
+    query = entries.order_by("n", direction=firestore.Query.DESCENDING).limit(2)
+    first = [snap.to_dict()["n"] for snap in query.stream()]
+    second = [snap.to_dict()["n"] for snap in query.start_after({"n": 3}).stream()]
+
+    assert first == [4, 3]
+    assert second == [2, 1]
+    assert len(entries.list_documents()) == 5
+
+
+def test_sqlite_persists_between_clients(tmp_path):
+    """Testa se os dados do backend SQLite sobrevivem a um novo cliente."""
+    path = tmp_path / "firestore.sqlite3"
+    FirestoreManager("test", client=LocalFirestoreClient(SQLiteStore(path))).set(
+        "people", "Luke Skywalker", {"name": "Luke Skywalker"}
+    )
+
+    other = FirestoreManager("test", client=LocalFirestoreClient(SQLiteStore(path)))
+    assert other.get("people", "Luke Skywalker") == {"name": "Luke Skywalker"}
+
+
+def test_history_pagination_and_retention(client):
+    """Testa a paginação do histórico e o limite de retenção."""
+    manager = FirestoreManager("test", client=client, history_retention=4)
+    for i in range(6):
+        manager.create_or_update_my_search_history("a@b.com", f"busca {i}")
+
+    page = manager.get_my_search_history("a@b.com", limit=3)
+    assert [q["query"] for q in page["queries"]] == ["busca 5", "busca 4", "busca 3"]
+
+    before, _, before_id = page["next_before"].partition("/")
+    page = manager.get_my_search_history(
+        "a@b.com",
+        limit=3,
+        before=datetime.fromisoformat(before),
+        before_id=before_id,
+    )
+    assert [q["query"] for q in page["queries"]] == ["busca 2"]
+    assert page["next_before"] is None
+
+
+def test_history_pages_do_not_skip_entries_with_the_same_instant(client):
+    """Testa se o ID desempata o cursor de entradas com o mesmo `created_at`."""
+    manager = FirestoreManager("test", client=client)
+    created_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    with manager.batch() as writes:
+        writes.add_history_entries(
+            "a@b.com",
+            [{"query": f"busca {i}", "created_at": created_at} for i in range(5)],
+        )
+
+    seen, cursor = [], {}
+    while True:
+        page = manager.get_my_search_history("a@b.com", limit=2, **cursor)
+        seen += [q["query"] for q in page["queries"]]
+        if not page["next_before"]:
+            break
+        before, _, before_id = page["next_before"].partition("/")
+        cursor = {"before": datetime.fromisoformat(before), "before_id": before_id}
+
+    assert sorted(seen) == [f"busca {i}" for i in range(5)]
+    assert page["queries"][-1]["timestamp"] == "2026-01-01T00:00:00+00:00"
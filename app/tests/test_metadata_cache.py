@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+
+from app.controllers import insight_controller
+from app.models.database import FirestoreManager
+from app.models.local_firestore import LocalFirestoreClient
+from app.models.metadata_cache import MetadataCache
+
+
+def make_cache(**kwargs):
+    manager = FirestoreManager("test", client=LocalFirestoreClient())
+    manager.merge_metadata("nlp_settings", {"known_people": ["Yoda"]})
+    return manager, MetadataCache(manager, **kwargs)
+
+
+def test_loads_once_and_bumps_version_only_on_change():
+    """Testa se o documento é lido uma vez e a versão só muda com o conteúdo."""
+    manager, cache = make_cache()
+
+    for _ in range(3):
+        assert cache.get()["known_people"] == ["Yoda"]
+    assert cache.reloads == 1
+    version, etag = cache.version, cache.etag
+
+    cache.refresh()
+    assert (cache.version, cache.etag) == (version, etag)
+
+    manager.add_to_metadata_list("known_people", "Leia Organa")
+    cache.refresh()
+    assert cache.version == version + 1
+    assert cache.etag != etag
+    assert cache.get()["known_people"] == ["Yoda", "Leia Organa"]
+
+
+def test_learned_names_survive_refresh_until_persisted():
+    """Testa se um nome aprendido não some em uma releitura antes de ser gravado."""
+    manager, cache = make_cache()
+
+    cache.learn("known_planets", "Tatooine")
+    cache.refresh()
+    assert cache.known_entities()["known_planets"] == ["Tatooine"]
+    assert cache.known_entities()["known_vehicles"] == []
+
+    version = cache.version
+    manager.add_to_metadata_list("known_planets", "Tatooine")
+    cache.refresh()
+    assert cache.version == version
+    assert cache._learned == {}
+
+
+def test_known_entities_answers_304_with_matching_etag(stub_nlp):
+    """Testa se `/metadata` é servido da memória com ETag e 304."""
+    manager, cache = make_cache()
+    controller = insight_controller.InsightController(
+        manager, None, metadata_cache=cache
+    )
+
+    body, status, headers = controller.get_known_entities()
+    assert status == 200
+    assert body["known_people"] == ["Yoda"]
+
+    request = SimpleNamespace(headers={"If-None-Match": headers["ETag"]})
+    assert controller.get_known_entities(request)[:2] == ("", 304)
+    assert cache.reloads == 1
+
+    cache.learn("known_people", "Leia Organa")
+    assert controller.get_known_entities(request)[1] == 200
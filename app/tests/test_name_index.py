@@ -0,0 +1,45 @@
+from app.models.data_service import DataService
+from app.models.name_index import UrlNameIndex
+from app.models.snapshot import SWAPISnapshot
+from app.tests.conftest import StubDB, StubSWAPI
+from app.tools.swapi_stub import build_catalog
+
+catalog = build_catalog()
+
+
+def test_hydration_from_index_needs_no_network():
+    """Testa se a hidratação é resolvida inteiramente pelo índice."""
+    index = UrlNameIndex.from_snapshot(SWAPISnapshot(catalog))
+    swapi = StubSWAPI()
+    service = DataService(db_manager=None, swapi_client=swapi, name_index=index)
+
+    film = service.hydrate_all_parallel(dict(catalog["films"][0]))
+
+    assert swapi.url_calls == []
+    assert film["characters"][0].startswith("Person ")
+
+
+def test_unknown_urls_fall_back_and_are_learned():
+    """Testa se URLs desconhecidas são buscadas uma vez e persistidas no flush."""
+    db = StubDB()
+    db.metadata["url_names"] = {"names": {"planets": {"1": "Tatooine"}}}
+    index = UrlNameIndex(db)
+    swapi = StubSWAPI()
+    service = DataService(db_manager=db, swapi_client=swapi, name_index=index)
+
+    first = service.hydrate_all_parallel(
+        {"homeworld": "https://swapi.dev/api/planets/1/"}
+    )
+    second = service.hydrate_all_parallel(
+        {"homeworld": "https://swapi.dev/api/planets/99/"}
+    )
+    third = service.hydrate_all_parallel(
+        {"homeworld": "https://swapi.dev/api/planets/99/"}
+    )
+    index.flush()
+
+    assert first["homeworld"] == "Tatooine"
+    planet = "name of https://swapi.dev/api/planets/99/"
+    assert second["homeworld"] == third["homeworld"] == planet
+    assert swapi.url_calls == ["https://swapi.dev/api/planets/99/"]
+    assert db.merged == [("url_names", {"names": {"planets": {"99": planet}}})]
@@ -0,0 +1,81 @@
+from app.models.data_service import DataService
+from app.models.entities import PlanetSchema
+from app.models.negative_cache import NegativeCache
+from app.tests.conftest import StubBatch, StubDB, StubSWAPI, kamino
+
+
+def test_repeated_unknown_name_skips_swapi():
+    """Testa se uma busca vazia repetida não volta a consultar a SWAPI."""
+    db, swapi = StubDB(), StubSWAPI(results={})
+    service = DataService(db, swapi, negative_cache=NegativeCache(db))
+
+    assert service.fetch_and_learn("Qulquer Coisa", "people") is None
+    assert service.fetch_and_learn("qulquer  coisa", "people") is None
+    assert swapi.calls == 1
+
+    # Uma nova instância (sem a camada em memória) usa a camada do Firestore.
+    other = DataService(db, swapi, negative_cache=NegativeCache(db))
+    assert other.fetch_and_learn("Qulquer Coisa", "people") is None
+    assert swapi.calls == 1
+
+
+def test_swapi_failures_are_not_cached():
+    """Testa se falhas de rede não são registradas como buscas vazias."""
+    db, swapi = StubDB(), StubSWAPI(results={}, failed=True)
+    service = DataService(db, swapi, negative_cache=NegativeCache(db))
+
+    service.fetch_and_learn("Kamino", "planets")
+    service.fetch_and_learn("Kamino", "planets")
+
+    assert swapi.calls == 2
+    assert db.docs == {}
+
+
+def test_learning_a_name_invalidates_the_miss():
+    """Testa se aprender um nome remove a marcação de busca vazia."""
+    db = StubDB()
+    negative_cache = NegativeCache(db)
+    negative_cache.record_miss("planets", "Kamino")
+    service = DataService(
+        db,
+        StubSWAPI(results={"planets": PlanetSchema(**kamino)}),
+        negative_cache=negative_cache,
+    )
+
+    data = service.fetch_and_learn("kamin", "planets")
+
+    assert data["name"] == "Kamino"
+    assert not negative_cache.is_missing("planets", "Kamino")
+    assert db.docs == {}
+
+
+def test_miss_is_written_with_the_request_batch():
+    """Testa se a busca vazia é gravada no lote da requisição, e não na hora."""
+    db = StubDB()
+    service = DataService(db, StubSWAPI(results={}), negative_cache=NegativeCache(db))
+    writes = StubBatch(db)
+
+    assert service.fetch_and_learn("Qulquer Coisa", "people", writes) is None
+    assert db.docs == {}
+
+    writes.commit()
+    assert NegativeCache(db).is_missing("people", "qulquer coisa")
+
+
+def test_miss_recorded_by_another_instance_is_invalidated():
+    """Testa se a marcação gravada por outra instância é apagada no lote."""
+    db = StubDB()
+    NegativeCache(db).record_miss("planets", "Kamino")
+    service = DataService(
+        db,
+        StubSWAPI(results={"planets": PlanetSchema(**kamino)}),
+        negative_cache=NegativeCache(db),
+    )
+    writes = StubBatch(db)
+
+    assert service.fetch_and_learn("kamin", "planets", writes)["name"] == "Kamino"
+    assert db.deletes == 0
+
+    writes.commit()
+    assert db.deletes == 1
+    assert not NegativeCache(db).is_missing("planets", "Kamino")
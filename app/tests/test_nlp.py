@@ -4,7 +4,7 @@ import sys
 import dotenv
 
 from app.models.database import FirestoreManager
-from app.models.nlp_service import NLPService
+from app.models.nlp_service import NLPLookup, NLPService
 
 dotenv.load_dotenv()
 project_id = os.getenv("GCP_PROJECT_ID")
@@ -20,3 +20,83 @@ def test_parse_sentence():
     assert q["name"] == "A New Hope"
     assert q["type"] == "films"
     assert q["filter"] == "director"
+
+
+def test_parse_cache_normalizes_queries_and_tracks_version():
+    """Testa o cache de parse_sentence: chave normalizada e troca de versão."""
+    db = FirestoreManager(project_id)
+    nlp = NLPService(db)
+
+    first = nlp.parse_sentence("Qual a altura do Yoda?")
+    second = nlp.parse_sentence("  qual a ALTURA do yoda ")
+
+    assert second["original_query"] == "  qual a ALTURA do yoda "
+    assert {**second, "original_query": None} == {**first, "original_query": None}
+    assert nlp.parse_cache_stats()["hits"] == 1
+
+    nlp.metadata.learn("known_planets", "Yoda")
+    assert nlp.parse_sentence("qual a altura do yoda")["type"] == "planets"
+    assert nlp.parse_cache_stats()["misses"] == 2
+
+
+def test_parse_many_matches_parse_sentence():
+    """Testa se parse_many devolve o mesmo que parse_sentence, na ordem."""
+    queries = [
+        "Qual a altura do Yoda?",
+        "qual a ALTURA do yoda",
+        "Quem dirijiu a Nwe Hope?",
+        "What is the climate of Endor?",
+        "Qual o diametro de Alderan?",
+        "",
+        "Qual a altura do Yoda?",
+    ]
+    expected = [
+        NLPService(FirestoreManager(project_id)).parse_sentence(q) if q else {}
+        for q in queries
+    ]
+
+    nlp = NLPService(FirestoreManager(project_id))
+    assert nlp.parse_many(queries) == expected
+    assert nlp.parse_cache_stats()["size"] == 4
+    assert nlp.parse_many(queries[:2]) == expected[:2]
+
+
+def test_intent_hints_the_type_of_unknown_names():
+    """Testa se a intenção e os schemas indicam o tipo de um nome desconhecido."""
+    nlp = NLPService(FirestoreManager(project_id))
+
+    def resolution(query):
+        result = nlp.parse_sentence(query)
+        return result["type"], result["candidate_types"], result["type_source"]
+
+    assert resolution("Qual a população de Kamino?") == (
+        "planets",
+        ("planets",),
+        "intent",
+    )
+    assert resolution("Qual a tripulação da Slave 2?") == (
+        "starships",
+        ("starships", "vehicles"),
+        "schema",
+    )
+    assert resolution("Qual a população do Yoda?") == ("people", ("people",), "name")
+    assert resolution("Kamino")[1:] == (("people",), "default")
+
+
+def test_default_probe_types_come_from_nlp_settings():
+    """Testa os tipos padrão configurados e um campo comum a vários schemas."""
+    nlp = NLPService(FirestoreManager(project_id))
+    lookup = NLPLookup({"default_probe_types": ["planets", "people", "droids"]})
+
+    assert nlp._infer_types("Kamino", None, lookup) == (
+        ("planets", "people"),
+        "default",
+    )
+    assert nlp._infer_types("Kamino", "url", lookup) == (
+        ("planets", "people"),
+        "default",
+    )
+    assert nlp._infer_types("Kamino", "crew", lookup) == (
+        ("starships", "vehicles"),
+        "schema",
+    )
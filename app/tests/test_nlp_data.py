@@ -0,0 +1,29 @@
+from app.models import nlp_data
+
+
+def test_bundled_stop_words_are_loaded_without_nltk(monkeypatch):
+    """Testa se as listas PT/EN vêm dos arquivos distribuídos."""
+    monkeypatch.setattr(
+        nlp_data, "_nltk_stop_words", lambda language: frozenset({"nltk"})
+    )
+    nlp_data.stop_words.cache_clear()
+
+    portuguese = nlp_data.stop_words("portuguese")
+    english = nlp_data.stop_words("english")
+
+    assert len(portuguese) == 207 and {"qual", "você", "não"} <= portuguese
+    assert len(english) == 179 and {"the", "don't", "of"} <= english
+    assert nlp_data.stop_words("klingon") == frozenset({"nltk"})
+    nlp_data.stop_words.cache_clear()
+
+
+def test_word_tokenize_keeps_compound_words():
+    """Testa se hífens e apóstrofos ficam dentro da palavra."""
+    assert nlp_data.word_tokenize("Quem pilotou a X-wing? R2-D2, don't!") == [
+        "Quem",
+        "pilotou",
+        "a",
+        "X-wing",
+        "R2-D2",
+        "don't",
+    ]
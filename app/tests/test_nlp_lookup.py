@@ -0,0 +1,44 @@
+import pytest
+
+from app.models.nlp_service import NLPLookup
+
+
+def test_lookup_compiles_categories_and_intents():
+    """Testa a prioridade das categorias e o índice de intenções."""
+    lookup = NLPLookup(
+        {
+            "intents": {"altura": "height", "diretor": "director"},
+            "translations": {"Uma Nova Esperança": "A New Hope"},
+            "known_films": ["A New Hope"],
+            "known_people": ["Yoda", "Endor"],
+            "known_planets": ["Endor"],
+        },
+        version=3,
+    )
+
+    assert lookup.name_category["Endor"] == "planets"
+    assert lookup.name_category["Uma Nova Esperança"] == "films"
+    assert "Yoda" in lookup.known_entities
+    assert lookup.intent_index.best_match("altra", cutoff=0.8) == "altura"
+    assert lookup.entity_index.best_match("Yodda", cutoff=0.7) == "Yoda"
+    with pytest.raises(TypeError):
+        lookup.intents["peso"] = "mass"
+
+
+def test_lookup_phrases_prefer_intents_over_names():
+    """Testa se uma palavra-chave tem prioridade sobre um nome igual."""
+    lookup = NLPLookup(
+        {
+            "intents": {"birth year": "birth_year", "class": "starship_class"},
+            "known_people": ["Luke Skywalker"],
+            "known_species": ["Class"],
+        }
+    )
+
+    matches = lookup.phrases.find("birth year e class de luke skywalker")
+
+    assert [(m.kind, m.value) for m in matches] == [
+        ("intent", "birth_year"),
+        ("intent", "starship_class"),
+        ("entity", "Luke Skywalker"),
+    ]
@@ -0,0 +1,49 @@
+from app.models.phrase_matcher import PhraseMatcher
+
+
+def build(*phrases):
+    matcher = PhraseMatcher()
+    for phrase, kind in phrases:
+        matcher.add(phrase, kind)
+    return matcher.build()
+
+
+def spans(matcher, text):
+    return [(m.kind, m.value, m.text) for m in matcher.find(text)]
+
+
+def test_longest_leftmost_without_overlap():
+    """Testa a escolha da ocorrência mais à esquerda e mais longa."""
+    matcher = build(
+        ("birth", "intent"),
+        ("birth year", "intent"),
+        ("year of luke", "entity"),
+        ("Luke Skywalker", "entity"),
+        ("Luke", "entity"),
+    )
+
+    assert spans(matcher, "the birth year of Luke Skywalker?") == [
+        ("intent", "birth year", "birth year"),
+        ("entity", "Luke Skywalker", "Luke Skywalker"),
+    ]
+
+
+def test_failure_links_recover_shorter_phrases():
+    """Testa se uma frase é encontrada depois de um prefixo que não fechou."""
+    matcher = build(("a b c", "entity"), ("b", "intent"), ("b c d", "entity"))
+
+    assert spans(matcher, "a b x") == [("intent", "b", "b")]
+    assert spans(matcher, "a b c d") == [("entity", "a b c", "a b c")]
+    assert spans(matcher, "x b c d") == [("entity", "b c d", "b c d")]
+
+
+def test_accent_and_case_insensitive():
+    """Testa a normalização de acentos e caixa, mantendo o texto original."""
+    matcher = PhraseMatcher()
+    matcher.add("populacao", "intent", "population")
+    matcher.add("O Império Contra-Ataca", "entity")
+
+    assert spans(matcher, "POPULAÇÃO em o imperio contra-ataca") == [
+        ("intent", "population", "POPULAÇÃO"),
+        ("entity", "O Império Contra-Ataca", "o imperio contra-ataca"),
+    ]
@@ -0,0 +1,172 @@
+import time
+from types import SimpleNamespace
+
+from app.controllers import insight_controller
+from app.models.database import FirestoreManager
+from app.models.local_firestore import LocalFirestoreClient, MemoryStore
+from app.models.quota import QuotaManager
+from app.tests.conftest import StubDB, StubSWAPI
+
+
+class CountingClient(LocalFirestoreClient):
+    def __init__(self, store):
+        super().__init__(store)
+        self.calls = 0
+
+    def batch(self):
+        self.calls += 1
+        return super().batch()
+
+    def get_all(self, references, field_paths=None):
+        self.calls += 1
+        return super().get_all(references, field_paths)
+
+
+def make_quota(store, **kwargs):
+    client = CountingClient(store)
+    manager = FirestoreManager("test", client=client)
+    options = {"burst": 100, "sync_interval": 3600, **kwargs}
+    return QuotaManager(manager, **options), client
+
+
+def test_daily_limit_is_enforced_locally():
+    """Testa se a cota é aplicada sem nenhuma chamada ao Firestore."""
+    quota, client = make_quota(MemoryStore(), daily_limit=3)
+
+    results = [quota.check("a@b.com")[0] for _ in range(5)]
+
+    assert results == [True, True, True, False, False]
+    assert quota.check("c@d.com")[0]
+    assert client.calls == 0
+
+
+def test_instances_reconcile_through_shared_counters():
+    """Testa se o uso de uma instância passa a contar nas outras após o sync."""
+    store = MemoryStore()
+    first, _ = make_quota(store, daily_limit=5)
+    second, _ = make_quota(store, daily_limit=5)
+
+    for _ in range(3):
+        assert first.check("a@b.com")[0]
+    assert second.check("a@b.com")[0]
+    first.sync()
+    second.sync()
+
+    assert second.check("a@b.com")[0]
+    allowed, retry_after = second.check("a@b.com")
+    assert not allowed
+    assert retry_after > 0
+    assert second.stats()["pending"] == 1
+
+
+def test_sync_reads_only_recently_used_or_near_limit_identifiers(monkeypatch):
+    """Testa se o sync relê só os identificadores usados ou perto do limite."""
+    quota, _ = make_quota(MemoryStore(), daily_limit=5)
+    for identifier in ["a@b.com", "c@d.com"]:
+        assert quota.check(identifier)[0]
+    for _ in range(4):
+        assert quota.check("e@f.com")[0]
+    quota.sync()
+
+    read = []
+    get_many = quota.db.get_many
+
+    def recording_get_many(refs, use_cache=True):
+        read.extend(doc_id.split("__")[1] for _, doc_id in refs)
+        return get_many(refs, use_cache)
+
+    monkeypatch.setattr(quota.db, "get_many", recording_get_many)
+    assert quota.check("a@b.com")[0]
+    quota.sync()
+
+    assert set(read) == {"a@b.com", "e@f.com"}
+    assert quota._usage["a@b.com"].base == 2
+    assert quota._usage["c@d.com"].base == 1
+
+
+def test_token_bucket_limits_bursts():
+    """Testa se rajadas acima do bucket são negadas com Retry-After."""
+    quota, _ = make_quota(MemoryStore(), burst=2, refill_per_second=0.5)
+
+    assert quota.check("anon:1.2.3.4", anonymous=True)[0]
+    assert quota.check("anon:1.2.3.4", anonymous=True)[0]
+    allowed, retry_after = quota.check("anon:1.2.3.4", anonymous=True)
+
+    assert not allowed
+    assert retry_after == 2
+
+
+def test_handle_insight_returns_429(stub_nlp):
+    """Testa se o controlador responde 429 para chamadas acima da cota."""
+    quota, _ = make_quota(MemoryStore(), anonymous_daily_limit=0)
+    controller = insight_controller.InsightController(StubDB(), None, quota=quota)
+    request = SimpleNamespace(
+        args={"name": "Yoda", "type": "people"},
+        headers={"X-Forwarded-For": "1.2.3.4, 10.0.0.1"},
+    )
+
+    body, status, headers = controller.handle_insight(request)
+
+    assert status == 429
+    assert body["error"] == "Too Many Requests"
+    assert int(headers["Retry-After"]) > 0
+    assert "anon:10.0.0.1" in quota._usage
+
+
+def test_spoofed_forwarded_for_does_not_bypass_quota(stub_nlp):
+    """Testa se variar as entradas do cliente em X-Forwarded-For não burla a cota."""
+    quota, _ = make_quota(MemoryStore(), anonymous_daily_limit=2)
+    controller = insight_controller.InsightController(
+        StubDB(), StubSWAPI(results={}), quota=quota
+    )
+
+    statuses = [
+        controller.handle_insight(
+            SimpleNamespace(
+                args={"name": "Yoda", "type": "people"},
+                headers={"X-Forwarded-For": f"10.0.0.{n}, 1.2.3.4"},
+            )
+        )[1]
+        for n in range(5)
+    ]
+
+    assert statuses[2:] == [429, 429, 429]
+    assert list(quota._usage) == ["anon:1.2.3.4"]
+
+    direct = insight_controller.InsightController(
+        StubDB(), None, quota=quota, trusted_proxy_hops=0
+    )
+    request = SimpleNamespace(
+        args={}, headers={"X-Forwarded-For": "9.9.9.9"}, remote_addr="5.6.7.8"
+    )
+    assert direct._client_ip(request) == "5.6.7.8"
+
+
+def test_missing_identifier_does_not_break_sync():
+    """Testa se um identificador vazio é normalizado e o sync segue funcionando."""
+    quota, _ = make_quota(MemoryStore())
+
+    assert quota.check(None)[0]
+    quota.sync()
+
+    assert quota.stats()["syncs"] == 1
+    assert "unknown" in quota._usage
+
+
+def test_failed_sync_releases_increments_and_keeps_thread_alive(monkeypatch):
+    """Testa se uma falha no sync devolve os incrementos e não derruba a thread."""
+    quota, client = make_quota(MemoryStore(), sync_interval=0.01)
+
+    def broken_batch():
+        raise RuntimeError("Firestore fora do ar")
+
+    monkeypatch.setattr(client, "batch", broken_batch)
+    assert quota.check("a@b.com")[0]
+    quota.sync()
+    usage = quota._usage["a@b.com"]
+    assert (usage.pending, usage.in_flight) == (1, 0)
+
+    monkeypatch.setattr(quota, "sync", lambda: 1 / 0)
+    time.sleep(0.05)
+    assert quota._thread.is_alive()
+    quota._stop.set()
@@ -0,0 +1,189 @@
+"""
+Golden files das respostas JSON: o corpo de cada caso em `CASES` precisa ser
+byte a byte igual ao arquivo em `golden/responses/`, gravado a partir do
+`model_dump_json` do pydantic e do `json.dumps` das respostas de erro.
+
+Para gravar um caso novo:
+    python -m app.tests.test_responses
+"""
+
+from datetime import date, datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from app.controllers import insight_controller
+from app.tests.conftest import StubDB, StubSWAPI
+from app.views import json_writer, responses
+from app.views.responses import format_insight_response, new_body_cache
+
+GOLDEN_DIR = Path(__file__).resolve().parent / "golden" / "responses"
+
+needs_orjson = pytest.mark.skipif(
+    json_writer.orjson is None, reason="orjson incompatível com o pydantic"
+)
+
+A_NEW_HOPE = {
+    "title": "A New Hope",
+    "episode_id": 4,
+    "opening_crawl": (
+        "It is a period of civil war.\r\nRebel spaceships, striking\r\nfrom a "
+        "hidden base, have won\r\ntheir first victory against\r\nthe evil "
+        "Galactic Empire.\r\n\r\nDuring the battle, Rebel\r\nspies managed to "
+        "steal secret\r\nplans to the Empire's\r\nultimate weapon, the DEATH\r\n"
+        "STAR, an armored space\r\nstation with enough power\r\nto destroy an "
+        "entire planet.\r\n\r\nPursued by the Empire's\r\nsinister agents, "
+        "Princess\r\nLeia races home aboard her\r\nstarship, custodian of the\r\n"
+        "stolen plans that can save her\r\npeople and restore\r\nfreedom to the "
+        "galaxy...."
+    ),
+    "director": "George Lucas",
+    "producer": "Gary Kurtz, Rick McCallum",
+    "release_date": "1977-05-25",
+    "characters": [
+        "Luke Skywalker", "C-3PO", "R2-D2", "Darth Vader", "Leia Organa",
+        "Owen Lars", "Beru Whitesun lars", "R5-D4", "Biggs Darklighter",
+        "Obi-Wan Kenobi", "Wilhuff Tarkin", "Chewbacca", "Han Solo", "Greedo",
+        "Jabba Desilijic Tiure", "Wedge Antilles", "Jek Tono Porkins", "Raymus Antilles",
+    ],
+    "planets": ["Tatooine", "Alderaan", "Yavin IV"],
+    "starships": [
+        "CR90 corvette", "Star Destroyer", "Sentinel-class landing craft",
+        "Death Star", "Millennium Falcon", "Y-wing", "X-wing", "TIE Advanced x1",
+    ],
+    "vehicles": ["Sand Crawler", "T-16 skyhopper", "X-34 landspeeder", "TIE/LN starfighter"],
+    "species": ["Human", "Droid", "Wookie", "Rodian", "Hutt"],
+    "created": "2014-12-10T14:23:31.880000Z",
+    "edited": "2014-12-20T19:49:45.256000Z",
+    "url": "https://swapi.dev/api/films/1/",
+    "type": "films",
+}  # fmt: skip
+
+LUKE = {
+    "name": "Luke Skywalker",
+    "height": 172,
+    "mass": 77.0,
+    "homeworld": "Tatooine",
+    "type": "people",
+}
+
+KAMINO = {
+    "name": "Kamino",
+    "climate": 'temperate — "chuvoso" \\ úmido',
+    "terrain": "oceano 🌊\x00\x1f\x7f",
+    "population": 1e9,
+    "diameter": 19720,
+    "surface_water": float("nan"),
+    "gravity": None,
+    "residents": ["Boba Fett", "Lama Su", "Taun We"],
+    "nested": {"flags": [True, False], "ratio": 1e22, "small": 1.5e-07},
+    "type": "planets",
+}
+
+CASES = {
+    "film_full": lambda: format_insight_response(dict(A_NEW_HOPE), None, "firestore"),
+    "film_filtered": lambda: format_insight_response(
+        dict(A_NEW_HOPE), ["director", "release_date"], "live"
+    ),
+    "person_suggestion": lambda: format_insight_response(
+        dict(LUKE), ["height", "mass", "eye_color"], suggestion="Luke Skywalker"
+    ),
+    "planet_unicode": lambda: format_insight_response(
+        dict(KAMINO), None, "firestore-stale", suggestion="Kamino ✨"
+    ),
+    "film_date_object": lambda: format_insight_response(
+        {**A_NEW_HOPE, "release_date": date(1977, 5, 25)}, ["release_date"], "live"
+    ),
+    "error_not_found": lambda: format_insight_response(
+        {"error": "Not found"}, None, "error"
+    ),
+    "error_missing_fields": lambda: format_insight_response(
+        dict(LUKE), ["altura", "peso"]
+    ),
+    "error_details": lambda: format_insight_response(
+        {"error": 'Falha na SWAPI: "timeout"', "details": "linha 1\nlinha\t2 ✗"},
+        None,
+        "error",
+    ),
+}
+
+
+def _golden(case: str) -> str:
+    return (GOLDEN_DIR / f"{case}.json").read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize("case", sorted(CASES))
+def test_body_matches_golden_file(case):
+    """Testa se o corpo da resposta é byte a byte igual ao golden file."""
+    body, status, headers = CASES[case]()
+
+    assert body.encode("utf-8") == _golden(case).encode("utf-8")
+    assert status == (404 if case.startswith("error") else 200)
+    assert headers["Content-Type"] == "application/json; charset=utf-8"
+
+
+@pytest.mark.parametrize("case", sorted(CASES))
+def test_fallback_without_orjson_matches_golden_file(case, monkeypatch):
+    """Testa se o caminho sem o orjson produz o mesmo corpo."""
+    monkeypatch.setattr(json_writer, "orjson", None)
+
+    assert CASES[case]()[0] == _golden(case)
+
+
+def test_incompatible_orjson_is_detected():
+    """Testa a verificação da escrita de números do orjson instalado."""
+    newer = SimpleNamespace(dumps=lambda value: b"[1e+22,1.5e-7]")
+
+    assert not json_writer.compatible(newer)
+    if json_writer.orjson is not None:
+        assert json_writer.compatible(json_writer.orjson)
+
+
+@needs_orjson
+def test_cached_entity_body_is_reused(monkeypatch):
+    """Testa o cache de corpos serializados: reuso pela chave e fidelidade."""
+    # O caminho rápido não cria o modelo do pydantic.
+    monkeypatch.setattr(responses, "InsightResponse", None)
+    cache = new_body_cache()
+    key = ("films", "a_new_hope", "2026-01-01T00:00:00+00:00")
+
+    first = format_insight_response(
+        dict(A_NEW_HOPE), None, "firestore", body_cache=cache, body_key=key
+    )[0]
+    changed = {**A_NEW_HOPE, "director": "outro"}
+    second = format_insight_response(
+        changed, None, "firestore-stale", body_cache=cache, body_key=key
+    )[0]
+
+    assert first == _golden("film_full")
+    assert second == first.replace('"source":"firestore"', '"source":"firestore-stale"')
+    assert cache.stats()["hits"] == 1
+
+
+@needs_orjson
+def test_controller_reuses_body_of_unchanged_document(stub_nlp):
+    """Testa se o controlador usa o corpo em cache enquanto o documento não muda."""
+    cached_at = datetime.now(timezone.utc).isoformat()
+    document = {**A_NEW_HOPE, "_cached_at": cached_at}
+    db = StubDB({("films", "a new hope"): document})
+    cache = new_body_cache()
+    controller = insight_controller.InsightController(db, StubSWAPI(), body_cache=cache)
+    request = SimpleNamespace(args={"name": "A New Hope", "type": "films"})
+
+    first, second = (controller.handle_insight(request)[0] for _ in range(2))
+
+    assert first == second == _golden("film_full")
+    assert cache.stats()["hits"] == 1
+    document["_cached_at"] = "2000-01-01T00:00:00+00:00"
+    assert controller.handle_insight(request)[0].replace("-stale", "") == first
+    assert cache.stats()["size"] == 2
+
+
+if __name__ == "__main__":
+    GOLDEN_DIR.mkdir(parents=True, exist_ok=True)
+    for name, case in CASES.items():
+        path = GOLDEN_DIR / f"{name}.json"
+        if not path.exists():
+            path.write_text(case()[0], encoding="utf-8")
+            print(f"✅ {path}")
@@ -0,0 +1,35 @@
+import os
+import signal
+
+from app.tests.conftest import wait_until
+from app.utils import shutdown
+
+
+def test_sigterm_runs_closers_and_chains_previous_handler(monkeypatch):
+    """Testa se o SIGTERM envia as filas e chama o tratador anterior."""
+    registered = []
+    monkeypatch.setattr(
+        shutdown.atexit, "register", lambda *args: registered.append(args)
+    )
+    calls = []
+
+    def broken():
+        calls.append("broken")
+        raise RuntimeError("Firestore fora do ar")
+
+    original = signal.signal(signal.SIGTERM, lambda signum, frame: calls.append(signum))
+    try:
+        shutdown.on_shutdown(
+            [
+                lambda: calls.append("write_behind"),
+                broken,
+                lambda: calls.append("quota"),
+            ]
+        )
+        os.kill(os.getpid(), signal.SIGTERM)
+        assert wait_until(lambda: signal.SIGTERM in calls)
+    finally:
+        signal.signal(signal.SIGTERM, original)
+
+    assert calls == ["write_behind", "broken", "quota", signal.SIGTERM]
+    assert len(registered) == 1
@@ -0,0 +1,59 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from app.controllers import insight_controller
+from app.models.cache import TTLCache
+from app.models.entities import CharacterSchema
+from app.tests.conftest import StubDB, StubSWAPI, luke
+from app.tools.swapi_stub import StubSWAPIClient, SWAPIStubServer
+
+N_REQUESTS = 16
+
+
+class EmptyDB(StubDB):
+    """Banco que nunca encontra o documento: toda requisição vai à SWAPI."""
+
+    def get(self, collection, name):
+        return None
+
+    def get_many(self, refs):
+        return [None for _ in refs]
+
+
+def test_concurrent_live_requests_are_coalesced(stub_nlp):
+    """Testa se N requisições idênticas simultâneas fazem uma única busca ao vivo."""
+    db = EmptyDB()
+    swapi = StubSWAPI(
+        results={"people": CharacterSchema(**luke)}, delays={"people": 0.1}
+    )
+    controller = insight_controller.InsightController(db, swapi)
+    request = SimpleNamespace(args={"name": "Luke Skywalker", "type": "people"})
+
+    with ThreadPoolExecutor(max_workers=N_REQUESTS) as executor:
+        responses = list(
+            executor.map(
+                lambda _: controller.handle_insight(request), range(N_REQUESTS)
+            )
+        )
+
+    assert swapi.calls == 1
+    assert db.writes == 1
+    assert controller.live_flight.shared == N_REQUESTS - 1
+    for body, status, _ in responses:
+        assert status == 200
+        assert json.loads(body)["entity"] == "Luke Skywalker"
+
+
+def test_concurrent_url_lookups_are_coalesced():
+    """Testa se buscas simultâneas pela mesma URL fazem uma única requisição."""
+    url = "https://swapi.dev/api/films/1/"
+    with SWAPIStubServer(response_delay=0.1) as stub:
+        client = StubSWAPIClient(stub, url_cache=TTLCache())
+        with ThreadPoolExecutor(max_workers=N_REQUESTS) as executor:
+            results = list(
+                executor.map(lambda _: client.get_entity_by_url(url), range(N_REQUESTS))
+            )
+
+    assert stub.request_count == 1
+    assert {r.title for r in results} == {"Film 1"}
@@ -0,0 +1,39 @@
+import asyncio
+
+from app.models.cache import TTLCache
+from app.models.data_service import DataService
+from app.models.snapshot import SWAPISnapshot
+from app.models.swapi import SWAPIClient
+from app.tools.swapi_snapshot import build_snapshot
+from app.tools.swapi_stub import RESOURCE_COUNTS, SWAPIStubServer
+
+
+def test_build_snapshot_pages_all_resources(tmp_path):
+    """Testa se o loader percorre todas as páginas dos seis recursos."""
+    with SWAPIStubServer() as stub:
+        snapshot = asyncio.run(build_snapshot(stub.base_url))
+
+    for resource, count in RESOURCE_COUNTS.items():
+        assert len(snapshot.resources[resource]) == count
+
+    loaded = SWAPISnapshot.load(snapshot.save(tmp_path / "snapshot.json"))
+    assert len(loaded.by_url) == sum(RESOURCE_COUNTS.values())
+
+
+def test_offline_mode_serves_search_and_hydration():
+    """Testa se o cliente em modo snapshot responde sem acessar a rede."""
+    with SWAPIStubServer() as stub:
+        snapshot = asyncio.run(build_snapshot(stub.base_url))
+
+    client = SWAPIClient(
+        base_url="http://offline.invalid/api", url_cache=TTLCache(), snapshot=snapshot
+    )
+    service = DataService(db_manager=None, swapi_client=client)
+
+    person = client.fetch_hydrated("person 3", "people").model_dump()
+    hydrated = service.hydrate_all_parallel(person)
+
+    assert hydrated["name"] == "Person 3"
+    assert hydrated["homeworld"] == "Planet 4"
+    assert all(title.startswith("Film ") for title in hydrated["films"])
+    assert client.fetch_hydrated("Nobody", "people") is None
@@ -0,0 +1,38 @@
+import json
+import logging
+
+from app.models.stats_reporter import StatsReporter
+from app.tests.conftest import wait_until
+
+
+def broken():
+    raise RuntimeError("indisponível")
+
+
+def test_snapshot_isolates_failing_sources():
+    """Testa se uma fonte com erro não impede o relatório das demais."""
+    reporter = StatsReporter({"quota": lambda: {"allowed": 3}, "broken": broken})
+
+    assert reporter.snapshot() == {
+        "quota": {"allowed": 3},
+        "broken": {"error": "indisponível"},
+    }
+
+
+def test_metrics_are_logged_periodically_and_on_close(caplog):
+    """Testa se as métricas vão para o log a cada intervalo e no encerramento."""
+    calls = []
+    reporter = StatsReporter(
+        {"write_behind": lambda: calls.append(1) or {"depth": len(calls)}},
+        interval=0.01,
+    )
+
+    with caplog.at_level(logging.INFO):
+        reporter.start()
+        assert wait_until(lambda: len(calls) >= 2)
+        reporter.close()
+
+    lines = [r.getMessage() for r in caplog.records if "[STATS]" in r.getMessage()]
+    assert len(lines) >= 3
+    last = json.loads(lines[-1].split("[STATS] ", 1)[1])
+    assert last == {"write_behind": {"depth": len(calls)}}
@@ -0,0 +1,92 @@
+import asyncio
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+
+from app.models.cache import TTLCache
+from app.models.data_service import DataService
+from app.models.name_index import UrlNameIndex
+from app.models.swapi import AsyncSWAPIClient
+from app.tools.swapi_stub import build_catalog
+
+catalog = build_catalog()
+
+
+def make_transport(state):
+    """Transporte que responde como a SWAPI e mede a concorrência máxima."""
+
+    async def handler(request: httpx.Request):
+        state["in_flight"] += 1
+        state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        state["calls"] += 1
+        await asyncio.sleep(0.01)
+        state["in_flight"] -= 1
+
+        parsed = urlparse(str(request.url))
+        parts = [p for p in parsed.path.split("/") if p]
+        records = catalog[parts[1]]
+        if len(parts) == 3:
+            return httpx.Response(200, json=records[int(parts[2]) - 1])
+
+        search = parse_qs(parsed.query).get("search", [""])[0].lower()
+        results = [
+            r for r in records if (r.get("name") or r.get("title")).lower() == search
+        ]
+        return httpx.Response(200, json={"count": len(results), "results": results})
+
+    return httpx.MockTransport(handler)
+
+
+async def test_fetch_hydrated():
+    """Testa se o cliente assíncrono retorna o schema correto."""
+    state = {"in_flight": 0, "max_in_flight": 0, "calls": 0}
+    async with AsyncSWAPIClient(transport=make_transport(state)) as client:
+        film = await client.fetch_hydrated("Film 1", "films")
+        missing = await client.fetch_hydrated("Nobody", "people")
+
+    assert film.title == "Film 1"
+    assert missing is None
+
+
+async def test_hydrate_all_async_fans_out():
+    """Testa se todas as URLs são resolvidas em paralelo, limitadas pelo semáforo."""
+    state = {"in_flight": 0, "max_in_flight": 0, "calls": 0}
+    service = DataService(db_manager=None, swapi_client=None)
+    data = dict(catalog["films"][0])
+    expected_urls = {
+        url
+        for field in ("characters", "planets", "starships", "vehicles", "species")
+        for url in data[field]
+    }
+
+    async with AsyncSWAPIClient(
+        transport=make_transport(state), url_cache=TTLCache()
+    ) as client:
+        hydrated = await service.hydrate_all_async(data, client, max_concurrency=8)
+
+    assert state["calls"] == len(expected_urls)
+    assert state["max_in_flight"] == 8
+    assert all(not c.startswith("https://") for c in hydrated["characters"])
+    assert hydrated["characters"][0].startswith("Person ")
+
+
+async def test_hydrate_all_async_uses_the_name_index():
+    """Testa se URLs conhecidas pelo índice não vão à rede e as novas são aprendidas."""
+    state = {"in_flight": 0, "max_in_flight": 0, "calls": 0}
+    index = UrlNameIndex()
+    known = catalog["films"][0]["characters"]
+    for url in known:
+        index.learn(url, "Indexado")
+    service = DataService(db_manager=None, swapi_client=None, name_index=index)
+    data = dict(catalog["films"][0])
+
+    async with AsyncSWAPIClient(
+        transport=make_transport(state), url_cache=TTLCache()
+    ) as client:
+        hydrated = await service.hydrate_all_async(data, client)
+
+    assert hydrated["characters"] == ["Indexado"] * len(known)
+    assert state["calls"] == len(data["planets"]) + len(data["starships"]) + len(
+        data["vehicles"]
+    ) + len(data["species"])
+    assert index.get(catalog["films"][0]["planets"][0]) == hydrated["planets"][0]
@@ -0,0 +1,83 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from app.controllers import insight_controller
+from app.models.data_service import DataService
+from app.models.entities import PlanetSchema
+from app.models.negative_cache import NegativeCache
+from app.tests.conftest import StubDB, StubSWAPI, kamino
+
+
+def planets_only_swapi():
+    """SWAPI que encontra apenas planetas; as buscas em `people` demoram."""
+    return StubSWAPI(
+        results={"planets": PlanetSchema(**kamino)}, delays={"people": 0.2}
+    )
+
+
+def test_cached_candidates_are_read_in_one_call():
+    """Testa se todos os tipos possíveis são lidos em uma única chamada."""
+    db = StubDB({("planets", "kamino"): {"name": "Kamino"}})
+    service = DataService(db, planets_only_swapi(), negative_cache=NegativeCache(db))
+
+    found = service.get_cached_any(("people", "films", "planets"), "Kamino")
+
+    assert found == ("planets", {"name": "Kamino"})
+    assert db.reads == 1
+    assert service.negative_cache.cached("people", "Kamino") is False
+
+
+def test_ambiguous_types_are_probed_concurrently():
+    """Testa se o primeiro tipo encontrado vence e as faltas ficam registradas."""
+    db, swapi = StubDB(), planets_only_swapi()
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        service = DataService(
+            db, swapi, executor=executor, negative_cache=NegativeCache(db)
+        )
+        start = time.perf_counter()
+        entity_type, data = service.fetch_and_learn_any(
+            "Kamino", ("people", "films", "planets")
+        )
+        elapsed = time.perf_counter() - start
+
+    assert (entity_type, data["name"]) == ("planets", "Kamino")
+    assert elapsed < 0.2
+    assert sorted(swapi.searches) == ["films", "people", "planets"]
+    assert service.negative_cache.is_missing("people", "Kamino")
+    assert service.fetch_and_learn_any("Kamino", ("people", "films")) == (None, None)
+    assert len(swapi.searches) == 3
+    assert service.resolution.stats()["probes"] == 1
+
+
+def test_intent_hint_counts_avoided_lookups(monkeypatch):
+    """Testa as métricas de leituras e buscas evitadas pela pista da intenção."""
+
+    class StubNLP:
+        def __init__(self, db, **kwargs):
+            pass
+
+        def parse_sentence(self, text):
+            return {
+                "name": "Kamino",
+                "raw_name": "Kamino",
+                "filter": "population",
+                "type": "planets",
+                "candidate_types": ("planets",),
+                "type_source": "intent",
+            }
+
+    monkeypatch.setattr(insight_controller, "NLPService", StubNLP)
+    db, swapi = StubDB(), planets_only_swapi()
+    controller = insight_controller.InsightController(db, swapi)
+
+    body, status, _ = controller.handle_insight(
+        SimpleNamespace(args={"q": "Qual a população de Kamino?"})
+    )
+
+    assert status == 200 and '"category":"planets"' in body
+    assert swapi.searches == ["planets"]
+    stats = controller.data_service.resolution.stats()
+    assert stats["requests"] == 1
+    assert (stats["firestore_reads"], stats["swapi_searches"]) == (1, 1)
+    assert stats["firestore_reads_avoided"] == stats["swapi_searches_avoided"] == 1
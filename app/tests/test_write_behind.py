@@ -0,0 +1,130 @@
+import threading
+import time
+
+from app.models.write_behind import WriteBehindQueue
+from app.tests.conftest import wait_until
+
+
+class StubBatch:
+    def __init__(self, db):
+        self.db = db
+        self.docs = {}
+
+    def array_union(self, collection, doc_id, fields):
+        self.docs[(collection, doc_id)] = fields
+
+    def set_document(self, collection, doc_id, data):
+        self.docs[(collection, doc_id)] = data
+
+    def delete_document(self, collection, doc_id):
+        self.docs[(collection, doc_id)] = None
+
+    def add_history_entries(self, identifier, entries):
+        self.docs[("search_histories", identifier)] = {"queries": entries}
+
+    def commit(self):
+        if self.db.fail:
+            return False
+        self.db.gate.wait()
+        self.db.commits.append(self.docs)
+        return True
+
+
+class StubDB:
+    def __init__(self):
+        self.commits = []
+        self.fail = False
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def batch(self):
+        return StubBatch(self)
+
+
+def test_writes_are_coalesced_per_document():
+    """Testa se várias buscas do mesmo usuário viram uma única escrita."""
+    db = StubDB()
+    queue = WriteBehindQueue(db, flush_size=1000, flush_interval=60)
+    for query in ("luke", "leia", "han"):
+        queue.create_or_update_my_search_history("a@b.com", query)
+    queue.add_to_metadata_list("known_people", "Luke Skywalker")
+
+    assert queue.depth == 4
+    queue.close()
+
+    assert len(db.commits) == 1
+    history = db.commits[0][("search_histories", "a@b.com")]["queries"]
+    assert [entry["query"] for entry in history] == ["luke", "leia", "han"]
+    assert db.commits[0][("metadata", "nlp_settings")] == {
+        "known_people": ["Luke Skywalker"]
+    }
+
+
+def test_only_the_last_document_write_is_sent():
+    """Testa se várias escritas do mesmo documento viram apenas a última."""
+    db = StubDB()
+    queue = WriteBehindQueue(db, flush_size=1000, flush_interval=60)
+    queue.set_document("negative_cache", "planets__kamino", {"name": "Kamino"})
+    queue.delete_document("negative_cache", "planets__kamino")
+    queue.set_document("negative_cache", "people__yoda", {"name": "Yoda"})
+
+    assert queue.depth == 2
+    db.fail = True
+    queue.flush()
+    queue.set_document("negative_cache", "people__yoda", {"name": "Yoda 2"})
+    db.fail = False
+    queue.close()
+
+    assert db.commits == [
+        {
+            ("negative_cache", "planets__kamino"): None,
+            ("negative_cache", "people__yoda"): {"name": "Yoda 2"},
+        }
+    ]
+
+
+def test_flushes_on_size_and_time():
+    """Testa se a fila é enviada ao atingir o tamanho ou o tempo limite."""
+    db = StubDB()
+    queue = WriteBehindQueue(db, flush_size=2, flush_interval=0.05)
+
+    queue.add_to_metadata_list("known_people", "Luke Skywalker")
+    queue.add_to_metadata_list("known_planets", "Tatooine")
+    assert wait_until(lambda: len(db.commits) == 1, timeout=0.04)
+
+    queue.add_to_metadata_list("known_films", "A New Hope")
+    time.sleep(0.02)
+    assert len(db.commits) == 1
+    assert wait_until(lambda: len(db.commits) == 2)
+    assert queue.stats()["flushes"] == 2
+
+
+def test_slow_firestore_drops_instead_of_blocking():
+    """Testa se, com o Firestore travado, a fila descarta em vez de crescer."""
+    db = StubDB()
+    db.gate.clear()
+    queue = WriteBehindQueue(db, flush_size=1, flush_interval=0.01, max_pending=3)
+
+    started = time.monotonic()
+    for i in range(10):
+        queue.add_to_metadata_list("known_people", str(i))
+    assert time.monotonic() - started < 0.5
+    assert queue.depth <= 3
+    assert queue.dropped >= 6
+
+    db.gate.set()
+    queue.close()
+    assert queue.depth == 0
+
+
+def test_failed_flush_is_retried():
+    """Testa se um lote que falhou volta para a fila e é enviado depois."""
+    db = StubDB()
+    db.fail = True
+    queue = WriteBehindQueue(db, flush_size=1, flush_interval=0.02)
+    queue.add_to_metadata_list("known_people", "Luke Skywalker")
+
+    assert wait_until(lambda: queue.failed_flushes >= 1)
+    db.fail = False
+    assert wait_until(lambda: len(db.commits) == 1)
+    assert queue.depth == 0
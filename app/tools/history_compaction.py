@@ -0,0 +1,89 @@
+import argparse
+import os
+
+from dotenv import load_dotenv
+from google.cloud import firestore
+
+from app.models.database import (
+    BATCH_LIMIT,
+    HISTORY_COLLECTION,
+    HISTORY_ENTRIES,
+    FirestoreManager,
+)
+
+
+def compact_user(
+    manager: FirestoreManager, identifier: str, retention: int = None
+) -> int:
+    """
+    Migra o histórico de um usuário do formato antigo para a subcoleção.
+
+    As entradas da lista `queries` viram documentos em
+    `search_histories/{usuário}/queries`, o campo antigo é removido e o
+    contador `count` é atualizado. Se `retention` for informado, apenas as
+    entradas mais recentes são mantidas.
+
+    Returns
+    -------
+    int
+        Número de entradas migradas.
+    """
+    ref = manager.db.collection(HISTORY_COLLECTION).document(identifier)
+    doc = ref.get()
+    legacy = (doc.to_dict() or {}).get("queries") if doc.exists else None
+    if not legacy:
+        return 0
+
+    entries = FirestoreManager.legacy_history_entries(legacy)
+    entries.sort(key=lambda entry: entry["created_at"])
+    if retention is not None:
+        entries = entries[-retention:] if retention else []
+
+    for start in range(0, len(entries), BATCH_LIMIT):
+        batch = manager.db.batch()
+        for entry in entries[start : start + BATCH_LIMIT]:
+            batch.set(ref.collection(HISTORY_ENTRIES).document(), entry)
+        batch.commit()
+
+    # O campo antigo só é removido depois de todas as entradas gravadas.
+    ref.set(
+        {"queries": firestore.DELETE_FIELD, "count": firestore.Increment(len(entries))},
+        merge=True,
+    )
+    return len(entries)
+
+
+def compact_all(manager: FirestoreManager, retention: int = None) -> dict:
+    """Migra todos os históricos no formato antigo e aplica a retenção."""
+    migrated, pruned = 0, 0
+    for snapshot in manager.db.collection(HISTORY_COLLECTION).stream():
+        migrated += compact_user(manager, snapshot.id, retention)
+        if retention is not None:
+            pruned += manager.prune_search_history(snapshot.id, keep=retention)
+    return {"migrated": migrated, "pruned": pruned}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Migra o histórico de buscas para a subcoleção por usuário."
+    )
+    parser.add_argument(
+        "--retention",
+        type=int,
+        default=None,
+        help="Número máximo de buscas mantidas por usuário (padrão: HISTORY_RETENTION).",
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    retention = args.retention
+    if retention is None and os.getenv("HISTORY_RETENTION"):
+        retention = int(os.getenv("HISTORY_RETENTION"))
+
+    print("🚀 Iniciando a compactação do histórico de buscas...")
+    manager = FirestoreManager(os.getenv("GCP_PROJECT_ID"))
+    result = compact_all(manager, retention)
+    print(
+        f"\n✨ {result['migrated']} entradas migradas, "
+        f"{result['pruned']} apagadas pela retenção."
+    )
@@ -1,9 +1,14 @@
-from google.cloud import firestore
+from app.models.local_firestore import create_client
 
 
-def bootstrap_nlp_config():
-    project_id = "pod-ps-backend-python"
-    db = firestore.Client(project=project_id)
+def bootstrap_nlp_config(db=None, project_id: str = "pod-ps-backend-python"):
+    """
+    Grava a configuração inicial do NLP em `metadata/nlp_settings`.
+
+    Se `db` não for informado, o cliente é criado conforme `STORAGE_BACKEND`,
+    o que permite popular também os backends locais (memória e SQLite).
+    """
+    db = db if db is not None else create_client(project_id)
 
     print(f"🛰️ Conectando ao projeto: {project_id}...")
 
@@ -119,6 +124,8 @@ def bootstrap_nlp_config():
             "language": "species",
             "classification": "species",
         },
+        # Tipos sondados quando nada indica o tipo de um nome desconhecido.
+        "default_probe_types": ["people"],
         "translations": {
             "A Ameaça Fantasma": "The Phantom Menace",
             "Ataque dos Clones": "Attack of the Clones",
@@ -0,0 +1,89 @@
+import argparse
+import asyncio
+import math
+from datetime import datetime, timezone
+
+from app.models.name_index import UrlNameIndex
+from app.models.snapshot import SWAPI_RESOURCES, SWAPISnapshot
+from app.models.swapi import AsyncSWAPIClient
+
+
+async def _fetch_resource(client: AsyncSWAPIClient, resource: str) -> list:
+    """
+    Busca todas as páginas de um recurso da SWAPI.
+
+    A primeira página informa o total de registros; as demais páginas são
+    buscadas em paralelo.
+    """
+    first = await client._get_request(f"{client.base_url}/{resource}/?page=1")
+    if not first:
+        raise RuntimeError(f"Falha ao buscar a primeira página de '{resource}'.")
+
+    results = list(first.get("results", []))
+    page_size = len(results) or 1
+    total_pages = math.ceil(first.get("count", 0) / page_size)
+
+    pages = await asyncio.gather(
+        *(
+            client._get_request(f"{client.base_url}/{resource}/?page={page}")
+            for page in range(2, total_pages + 1)
+        )
+    )
+    for page, data in enumerate(pages, start=2):
+        if not data:
+            raise RuntimeError(f"Falha ao buscar a página {page} de '{resource}'.")
+        results.extend(data.get("results", []))
+
+    print(f"✅ {resource}: {len(results)} registros em {max(total_pages, 1)} páginas")
+    return results
+
+
+async def build_snapshot(
+    base_url: str = "https://swapi.dev/api", concurrency: int = 10
+) -> SWAPISnapshot:
+    """
+    Percorre os seis recursos da SWAPI e monta um snapshot local completo.
+
+    Parameters
+    ----------
+    base_url : str
+        URL base da API do SWAPI.
+    concurrency : int
+        Número máximo de páginas buscadas ao mesmo tempo.
+
+    Returns
+    -------
+    SWAPISnapshot
+        Snapshot com índices URL -> registro e nome -> registro.
+    """
+    async with AsyncSWAPIClient(base_url=base_url, pool_size=concurrency) as client:
+        fetched = await asyncio.gather(
+            *(_fetch_resource(client, resource) for resource in SWAPI_RESOURCES)
+        )
+    return SWAPISnapshot(
+        dict(zip(SWAPI_RESOURCES, fetched)),
+        created_at=datetime.now(timezone.utc).isoformat(),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Gera um snapshot local completo da SWAPI."
+    )
+    parser.add_argument("--output", default="swapi_snapshot.json")
+    parser.add_argument("--base-url", default="https://swapi.dev/api")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument(
+        "--name-index",
+        help="Também grava o índice URL -> nome neste arquivo.",
+    )
+    args = parser.parse_args()
+
+    print("🛰️ Baixando o catálogo da SWAPI...")
+    snapshot = asyncio.run(build_snapshot(args.base_url, args.concurrency))
+    path = snapshot.save(args.output)
+    print(f"\n✨ Snapshot salvo em '{path}' ({len(snapshot.by_url)} entidades).")
+
+    if args.name_index:
+        index_path = UrlNameIndex.from_snapshot(snapshot).save(args.name_index)
+        print(f"✨ Índice de nomes salvo em '{index_path}'.")
@@ -0,0 +1,275 @@
+"""Servidor HTTP local que imita a SWAPI para benchmarks e testes sem rede."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from app.models.swapi import SWAPIClient
+
+SWAPI_BASE_URL = "https://swapi.dev/api"
+
+RESOURCE_COUNTS = {
+    "people": 82,
+    "planets": 60,
+    "films": 6,
+    "species": 37,
+    "vehicles": 39,
+    "starships": 36,
+}
+
+PAGE_SIZE = 10
+
+
+def _url(resource: str, idx: int) -> str:
+    return f"{SWAPI_BASE_URL}/{resource}/{idx}/"
+
+
+def _related(resource: str, seed: int, amount: int) -> list:
+    total = RESOURCE_COUNTS[resource]
+    return [_url(resource, (seed * 7 + i * 3) % total + 1) for i in range(amount)]
+
+
+def build_catalog() -> dict:
+    """
+    Gera um catálogo determinístico com o mesmo formato dos recursos da SWAPI.
+
+    Returns
+    -------
+    dict
+        Mapa `recurso -> lista de registros`, na ordem dos ids.
+    """
+    common = {"created": "2014-12-09T13:50:51.644000Z"}
+    edited = "2014-12-20T21:17:56.891000Z"
+    catalog = {}
+
+    catalog["people"] = [
+        {
+            "name": f"Person {i}",
+            "birth_year": "19BBY",
+            "eye_color": "blue",
+            "gender": "male",
+            "hair_color": "blond",
+            "skin_color": "fair",
+            "height": "172",
+            "mass": "77",
+            "homeworld": _url("planets", i % RESOURCE_COUNTS["planets"] + 1),
+            "films": _related("films", i, 4),
+            "species": _related("species", i, 1),
+            "starships": _related("starships", i, 2),
+            "vehicles": _related("vehicles", i, 2),
+            "url": _url("people", i),
+            "edited": edited,
+            **common,
+        }
+        for i in range(1, RESOURCE_COUNTS["people"] + 1)
+    ]
+    catalog["planets"] = [
+        {
+            "name": f"Planet {i}",
+            "rotation_period": "23",
+            "orbital_period": "304",
+            "diameter": "10465",
+            "climate": "arid",
+            "gravity": "1 standard",
+            "terrain": "desert",
+            "surface_water": "1",
+            "population": "200000",
+            "residents": _related("people", i, 5),
+            "films": _related("films", i, 3),
+            "url": _url("planets", i),
+            "edited": edited,
+            **common,
+        }
+        for i in range(1, RESOURCE_COUNTS["planets"] + 1)
+    ]
+    catalog["films"] = [
+        {
+            "title": f"Film {i}",
+            "episode_id": i,
+            "opening_crawl": "It is a period of civil war.",
+            "director": "George Lucas",
+            "producer": "Gary Kurtz, Rick McCallum",
+            "release_date": "1977-05-25",
+            "characters": _related("people", i, 18),
+            "planets": _related("planets", i, 3),
+            "starships": _related("starships", i, 8),
+            "vehicles": _related("vehicles", i, 4),
+            "species": _related("species", i, 5),
+            "url": _url("films", i),
+            "edited": edited,
+            **common,
+        }
+        for i in range(1, RESOURCE_COUNTS["films"] + 1)
+    ]
+    catalog["species"] = [
+        {
+            "name": f"Species {i}",
+            "classification": "mammal",
+            "designation": "sentient",
+            "average_height": "180",
+            "average_lifespan": "120",
+            "hair_colors": "brown",
+            "eye_colors": "brown",
+            "skin_colors": "caucasian",
+            "language": "Galactic Basic",
+            "homeworld": _url("planets", i % RESOURCE_COUNTS["planets"] + 1),
+            "people": _related("people", i, 3),
+            "films": _related("films", i, 2),
+            "url": _url("species", i),
+            "edited": edited,
+            **common,
+        }
+        for i in range(1, RESOURCE_COUNTS["species"] + 1)
+    ]
+    for resource, prefix in (("vehicles", "Vehicle"), ("starships", "Starship")):
+        records = []
+        for i in range(1, RESOURCE_COUNTS[resource] + 1):
+            record = {
+                "name": f"{prefix} {i}",
+                "model": f"{prefix} model {i}",
+                "manufacturer": "Corellian Engineering Corporation",
+                "cost_in_credits": "100000",
+                "length": "34.37",
+                "max_atmosphering_speed": "1050",
+                "crew": "4",
+                "passengers": "6",
+                "cargo_capacity": "100000",
+                "consumables": "2 months",
+                "pilots": _related("people", i, 2),
+                "films": _related("films", i, 2),
+                "url": _url(resource, i),
+                "edited": edited,
+                **common,
+            }
+            if resource == "starships":
+                record.update(
+                    {
+                        "hyperdrive_rating": "0.5",
+                        "MGLT": "75",
+                        "starship_class": "Light freighter",
+                    }
+                )
+            records.append(record)
+        catalog[resource] = records
+    return catalog
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        # Cada conexão nova paga o custo simulado de handshake (TCP + TLS).
+        time.sleep(self.server.handshake_delay)
+        super().setup()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.server.request_count += 1
+        time.sleep(self.server.response_delay)
+
+        parsed = urlparse(self.path)
+        parts = [p for p in parsed.path.split("/") if p]
+        query = parse_qs(parsed.query)
+        payload = None
+
+        if len(parts) >= 2 and parts[0] == "api" and parts[1] in self.server.catalog:
+            records = self.server.catalog[parts[1]]
+            if len(parts) == 3 and parts[2].isdigit():
+                idx = int(parts[2])
+                if 1 <= idx <= len(records):
+                    payload = records[idx - 1]
+            elif len(parts) == 2:
+                payload = self._list_page(parts[1], records, query)
+
+        if payload is None:
+            self._send(404, {"detail": "Not found"})
+        else:
+            self._send(200, payload)
+
+    def _list_page(self, resource: str, records: list, query: dict) -> dict:
+        search = query.get("search", [""])[0].lower()
+        page = int(query.get("page", ["1"])[0])
+        if search:
+            records = [
+                r
+                for r in records
+                if search in (r.get("name") or r.get("title") or "").lower()
+            ]
+        start = (page - 1) * PAGE_SIZE
+        has_next = start + PAGE_SIZE < len(records)
+        base = f"{self.server.base_url}/{resource}/"
+        return {
+            "count": len(records),
+            "next": f"{base}?page={page + 1}" if has_next else None,
+            "previous": f"{base}?page={page - 1}" if page > 1 else None,
+            "results": records[start : start + PAGE_SIZE],
+        }
+
+    def _send(self, status: int, payload: dict):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class SWAPIStubServer:
+    """
+    Servidor SWAPI local executado em uma thread própria.
+
+    Parameters
+    ----------
+    handshake_delay : float
+        Atraso, em segundos, aplicado a cada nova conexão aceita.
+    response_delay : float
+        Atraso, em segundos, aplicado a cada resposta.
+
+    Examples
+    --------
+    >>> with SWAPIStubServer() as stub:
+    ...     client = SWAPIClient(base_url=stub.base_url)
+    """
+
+    def __init__(self, handshake_delay: float = 0.0, response_delay: float = 0.0):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.catalog = build_catalog()
+        self.httpd.handshake_delay = handshake_delay
+        self.httpd.response_delay = response_delay
+        self.httpd.request_count = 0
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_port}/api"
+        self.httpd.base_url = self.base_url
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def request_count(self) -> int:
+        return self.httpd.request_count
+
+    def local_url(self, url: str) -> str:
+        """Traduz uma URL canônica da SWAPI para o endereço do servidor local."""
+        return url.replace(SWAPI_BASE_URL, self.base_url)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class StubSWAPIClient(SWAPIClient):
+    """`SWAPIClient` que direciona as URLs canônicas da SWAPI para o servidor local."""
+
+    def __init__(self, stub: SWAPIStubServer, **kwargs):
+        super().__init__(base_url=stub.base_url, **kwargs)
+        self.stub = stub
+
+    def _get_request(self, url: str):
+        return super()._get_request(self.stub.local_url(url))
@@ -0,0 +1,60 @@
+import atexit
+import logging
+import os
+import signal
+import threading
+
+
+def _close_all(closers):
+    for close in closers:
+        try:
+            close()
+        except Exception as e:
+            logging.error(
+                f"Erro ao encerrar {getattr(close, '__qualname__', close)}: {e}"
+            )
+
+
+def on_shutdown(closers):
+    """
+    Executa as funções de encerramento ao receber SIGTERM e, de novo, no `atexit`.
+
+    O Cloud Run (e o Cloud Functions de 2ª geração) encerra a instância com
+    SIGTERM e, alguns segundos depois, SIGKILL. Com o tratamento padrão do
+    SIGTERM, o processo termina sem executar o `atexit`, e o que estiver nas
+    filas em memória (write-behind, incrementos de cota) se perde. Por isso,
+    o envio final depende deste tratador: ele chama `closers`, na ordem, e
+    depois o tratador anterior (ex: o do gunicorn, que encerra o worker).
+    Se não havia tratador, o sinal é reenviado com o tratamento padrão.
+
+    O `atexit` continua registrado para as saídas normais e para enviar o que
+    chegar depois do SIGTERM; por isso, cada função deve poder ser chamada
+    mais de uma vez.
+
+    Parameters
+    ----------
+    closers : Iterable[Callable[[], None]]
+        Funções de encerramento (ex: `write_behind.close`). Um erro em uma
+        delas é registrado no log e não impede as demais.
+    """
+    closers = list(closers)
+    atexit.register(_close_all, closers)
+    # Tratadores de sinal só podem ser instalados no thread principal.
+    if threading.current_thread() is not threading.main_thread():
+        logging.warning(
+            "⚠️ SIGTERM não tratado: módulo carregado fora do thread principal."
+        )
+        return
+
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def handle_sigterm(signum, frame):
+        logging.info("🛑 SIGTERM recebido: enviando as escritas pendentes.")
+        _close_all(closers)
+        if callable(previous):
+            previous(signum, frame)
+        elif previous in (signal.SIG_DFL, None):
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            os.kill(os.getpid(), signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
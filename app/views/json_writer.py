@@ -0,0 +1,72 @@
+"""
+Serialização rápida das respostas com o orjson.
+
+A saída é byte a byte igual à do pydantic (`model_dump_json`) e à do
+`json.dumps(..., ensure_ascii=False)` das respostas de erro. Por isso, só
+são aceitos os tipos que o orjson escreve exatamente como eles: `str`,
+`int` (até 64 bits), `float`, `bool`, `None`, `list`, `tuple` e `dict` com
+chaves `str`. Para qualquer outro valor (datas, conjuntos, subclasses,
+modelos), e também quando a versão instalada do orjson não escreve os
+números como o pydantic, as funções retornam None e a resposta é montada
+pelo caminho original.
+"""
+
+import logging
+from typing import Optional
+
+import orjson
+
+
+def compatible(module) -> bool:
+    """
+    Verifica se o orjson escreve os números como o pydantic.
+
+    A partir da versão 3.11, o orjson escreve os expoentes com sinal
+    (`1e+22`), enquanto o pydantic escreve `1e22`.
+    """
+    return module.dumps([1e22, 1.5e-07]) == b"[1e22,1.5e-7]"
+
+
+if not compatible(orjson):
+    logging.warning(
+        f"⚠️ orjson {orjson.__version__} escreve números diferente do pydantic; "
+        "as respostas usarão o pydantic."
+    )
+    orjson = None
+
+_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME
+    | orjson.OPT_PASSTHROUGH_DATACLASS
+    | orjson.OPT_PASSTHROUGH_SUBCLASS
+    if orjson is not None
+    else 0
+)
+
+
+def _unsupported(value):
+    raise TypeError(f"Tipo não suportado: {type(value).__name__}")
+
+
+def encode(value) -> Optional[bytes]:
+    """
+    JSON compacto de `value`, como o do pydantic.
+
+    Returns
+    -------
+    Optional[bytes]
+        O JSON em UTF-8, ou None se `value` tiver algum tipo não suportado
+        ou se o orjson não estiver disponível.
+    """
+    if orjson is None:
+        return None
+    try:
+        return orjson.dumps(value, default=_unsupported, option=_OPTIONS)
+    except TypeError:
+        return None
+
+
+def encode_text(value) -> Optional[bytes]:
+    """`encode` apenas para `str` e None, os únicos escritos igual pelo `json.dumps`."""
+    if value is not None and type(value) is not str:
+        return None
+    return encode(value)
@@ -1,8 +1,14 @@
 import json
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Hashable, Optional
 
 from pydantic import BaseModel, Field
 
+from app.models.cache import TTLCache
+from app.views.json_writer import encode, encode_text
+
+BODY_CACHE_MAX_BYTES = 16 * 1024 * 1024
+BODY_CACHE_TTL = 300.0
+
 
 class InsightResponse(BaseModel):
     status: str = "success"
@@ -18,11 +24,20 @@ class InsightResponse(BaseModel):
         json_encoders = {str: lambda v: v.encode("utf-8").decode("utf-8")}
 
 
+def new_body_cache(
+    max_bytes: int = BODY_CACHE_MAX_BYTES, ttl: float = BODY_CACHE_TTL
+) -> TTLCache:
+    """Cria o cache de entidades já serializadas, limitado pelo tamanho em bytes."""
+    return TTLCache(max_size=100_000, ttl=ttl, max_bytes=max_bytes, sizeof=len)
+
+
 def format_insight_response(
     data: Dict,
     filter_fields: Optional[list[str]] = None,
     source: str = "SWAPI Ecosystem",
     suggestion: Optional[str] = None,
+    body_cache: Optional[TTLCache] = None,
+    body_key: Optional[Hashable] = None,
 ) -> tuple:
     """
     Formata uma resposta para uma requisiçãoo de insight.
@@ -37,11 +52,23 @@ def format_insight_response(
         Origem da informação (Firestore/Live).
     suggestion : Optional[str]
         Sugestão de busca para o caso de não encontrar a entidade.
+    body_cache : Optional[TTLCache]
+        Cache da entidade já serializada (`new_body_cache`), usado nas
+        respostas sem filtro.
+    body_key : Optional[Hashable]
+        Chave da entidade em `body_cache`. Precisa mudar sempre que o
+        conteúdo de `data` mudar.
 
     Returns
     -------
     tuple
         Tupla com a resposta formatada em JSON, o c digo de status HTTP e os headers da resposta.
+
+    Notes
+    -----
+    O corpo é escrito diretamente pelo `app.views.json_writer`, sem criar o
+    `InsightResponse`, com o mesmo resultado de `model_dump_json`. Se algum
+    valor não puder ser escrito assim, o modelo é usado.
     """
     if not data or "error" in data:
         return _format_error_response(data, 404)
@@ -56,20 +83,60 @@ def format_insight_response(
     else:
         insight_value = data
 
-    response_model = InsightResponse(
-        entity=data.get("name") or data.get("title", "Unknown"),
-        category=data.get("type", "generic"),
-        insight_value=insight_value,
-        source=source,
-        suggestion=suggestion,
-    )
+    entity = data.get("name") or data.get("title", "Unknown")
+    category = data.get("type", "generic")
+    if body_cache is not None and body_key is not None and not filter_fields:
+        insight_json = body_cache.get(body_key)
+        if insight_json is None:
+            insight_json = encode(insight_value)
+            if insight_json is not None:
+                body_cache.set(body_key, insight_json)
+    else:
+        insight_json = encode(insight_value)
+
+    body = _insight_body(entity, category, insight_json, source, suggestion)
+    if body is None:
+        body = InsightResponse(
+            entity=entity,
+            category=category,
+            insight_value=insight_value,
+            source=source,
+            suggestion=suggestion,
+        ).model_dump_json(by_alias=True)
 
     headers = {
         "Content-Type": "application/json; charset=utf-8",
         "Access-Control-Allow-Origin": "*",
     }
 
-    return (response_model.model_dump_json(by_alias=True), 200, headers)
+    return (body, 200, headers)
+
+
+def _insight_body(entity, category, insight_json, source, suggestion):
+    """Corpo de `InsightResponse` montado diretamente; None se não for possível."""
+    if insight_json is None or any(
+        type(value) is not str for value in (entity, category, source)
+    ):
+        return None
+    parts = [encode_text(value) for value in (entity, category, source, suggestion)]
+    if None in parts:
+        return None
+    entity, category, source, suggestion = parts
+    return b"".join(
+        (
+            b'{"status":"success","entity":',
+            entity,
+            b',"category":',
+            category,
+            b',"insight_value":',
+            insight_json,
+            b',"source":',
+            source,
+            b',"suggestion":',
+            suggestion,
+            b"}",
+        )
+    ).decode("utf-8")
 
 
 def _format_error_response(error_data: Dict, status_code: int = 400) -> tuple:
@@ -92,13 +159,23 @@ def _format_error_response(error_data: Dict, status_code: int = 400) -> tuple:
         "Content-Type": "application/json; charset=utf-8",
         "Access-Control-Allow-Origin": "*",
     }
-    body = json.dumps(
-        {
-            "status": "error",
-            "message": error_data.get("error", "Erro desconhecido"),
-            "details": error_data.get("details", ""),
-        },
-        ensure_ascii=False,
-    )
+    message = error_data.get("error", "Erro desconhecido")
+    details = error_data.get("details", "")
+    message_json, details_json = encode_text(message), encode_text(details)
+    if message_json is not None and details_json is not None:
+        body = b"".join(
+            (
+                b'{"status": "error", "message": ',
+                message_json,
+                b', "details": ',
+                details_json,
+                b"}",
+            )
+        ).decode("utf-8")
+    else:
+        body = json.dumps(
+            {"status": "error", "message": message, "details": details},
+            ensure_ascii=False,
+        )
 
     return (body, status_code, headers)
@@ -0,0 +1,15 @@
+import os
+
+from dotenv import load_dotenv
+
+from app.models.local_firestore import MEMORY_BACKEND, create_client
+from app.tools.nlp_metadado_bootstrap import bootstrap_nlp_config
+
+# Sem STORAGE_BACKEND definido, os testes usam o backend em memória e não
+# dependem de um projeto no GCP. Use STORAGE_BACKEND=firestore para rodá-los
+# contra o Firestore de verdade.
+load_dotenv()
+os.environ.setdefault("STORAGE_BACKEND", MEMORY_BACKEND)
+
+if os.environ["STORAGE_BACKEND"] == MEMORY_BACKEND:
+    bootstrap_nlp_config(create_client(os.getenv("GCP_PROJECT_ID")))
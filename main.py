@@ -10,18 +10,84 @@ from flask import Response
 from app.controllers.auth_controller import AuthController
 from app.controllers.insight_controller import InsightController
 from app.models.database import FirestoreManager
+from app.models.executor import hydration_executor
+from app.models.metadata_cache import MetadataCache
+from app.models.name_index import UrlNameIndex
+from app.models.negative_cache import NegativeCache
+from app.models.quota import QuotaManager
+from app.models.snapshot import SWAPISnapshot
+from app.models.stats_reporter import StatsReporter
 from app.models.swapi import SWAPIClient
+from app.models.write_behind import WriteBehindQueue
 from app.utils.auth import verify_google_token
+from app.utils.shutdown import on_shutdown
+from app.views.responses import BODY_CACHE_MAX_BYTES, new_body_cache
 
 base_path = Path(__file__).resolve().parent
 load_dotenv(dotenv_path=base_path / ".env")
 
-db_manager = FirestoreManager(os.getenv("GCP_PROJECT_ID"))
+history_retention = os.getenv("HISTORY_RETENTION")
+db_manager = FirestoreManager(
+    os.getenv("GCP_PROJECT_ID"),
+    history_retention=int(history_retention) if history_retention else None,
+)
 frontend_url = os.getenv("FRONTEND_URL")
 frontend_short_url = os.getenv("FRONTEND_SHORT_URL")
-swapi_client = SWAPIClient()
-insight_controller = InsightController(db_manager, swapi_client)
+snapshot_path = os.getenv("SWAPI_SNAPSHOT_PATH")
+swapi_snapshot = SWAPISnapshot.load(snapshot_path) if snapshot_path else None
+swapi_client = SWAPIClient(snapshot=swapi_snapshot)
+name_index = (
+    UrlNameIndex.from_snapshot(swapi_snapshot, db_manager)
+    if swapi_snapshot
+    else UrlNameIndex(db_manager, path=os.getenv("SWAPI_NAME_INDEX_PATH"))
+)
+# Filas em memória enviadas no desligamento; veja `on_shutdown` no fim do
+# módulo. Sem o tratador de SIGTERM instalado por ele, o Cloud Run encerra a
+# instância sem executar o `atexit` e essas escritas se perdem.
+closers = []
+write_behind = WriteBehindQueue(db_manager)
+closers.append(write_behind.close)
+quota = QuotaManager(
+    db_manager,
+    daily_limit=int(os.getenv("QUOTA_DAILY_LIMIT") or 1000),
+    anonymous_daily_limit=int(os.getenv("QUOTA_ANONYMOUS_DAILY_LIMIT") or 200),
+)
+closers.append(quota.close)
+metadata_cache = MetadataCache(
+    db_manager, poll_interval=float(os.getenv("METADATA_POLL_INTERVAL") or 60)
+)
+if os.getenv("METADATA_LISTENER", "").lower() == "true":
+    metadata_cache.listen()
+    closers.append(metadata_cache.close)
+body_cache_max_bytes = int(
+    os.getenv("RESPONSE_BODY_CACHE_MAX_BYTES") or BODY_CACHE_MAX_BYTES
+)
+insight_controller = InsightController(
+    db_manager,
+    swapi_client,
+    name_index=name_index,
+    negative_cache=NegativeCache(db_manager),
+    write_behind=write_behind,
+    quota=quota,
+    metadata_cache=metadata_cache,
+    body_cache=new_body_cache(body_cache_max_bytes) if body_cache_max_bytes else None,
+    trusted_proxy_hops=int(os.getenv("TRUSTED_PROXY_HOPS") or 1),
+)
 auth_controller = AuthController()
+stats_log_interval = float(os.getenv("STATS_LOG_INTERVAL") or 300)
+if stats_log_interval > 0:
+    stats_reporter = StatsReporter(
+        {
+            "hydration_executor": hydration_executor.stats,
+            "write_behind": write_behind.stats,
+            "quota": quota.stats,
+            "resolution": insight_controller.data_service.resolution.stats,
+        },
+        interval=stats_log_interval,
+    )
+    stats_reporter.start()
+    closers.append(stats_reporter.close)
+on_shutdown(closers)
 
 
 @functions_framework.http
@@ -100,9 +166,9 @@ def star_wars_insights(request):
         return wrap_cors(auth_controller.get_user(user_data))
 
     if path == "metadata":
-        return wrap_cors(insight_controller.get_known_entities())
+        return wrap_cors(insight_controller.get_known_entities(request))
 
     if path == "history":
-        return wrap_cors(insight_controller.get_my_history(user_data))
+        return wrap_cors(insight_controller.get_my_history(user_data, request.args))
 
     return wrap_cors(insight_controller.handle_insight(request, user_data=user_data))